@@ -0,0 +1,120 @@
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+from bybit_gateway import bybit_gateway
+from private_stream import private_stream
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+# 스트림이 끊겼을 때 잔고를 REST로 다시 불러오는 주기 (초)
+ACCOUNT_REFRESH_INTERVAL = float(os.getenv('ACCOUNT_REFRESH_INTERVAL', '10'))
+# 스트림 연결 중에도 누락에 대비해 REST로 다시 맞추는 주기 (초)
+ACCOUNT_RESYNC_INTERVAL = float(os.getenv('ACCOUNT_RESYNC_INTERVAL', '300'))
+
+ACCOUNT_TYPE = "UNIFIED"
+
+
+class AccountState:
+    """
+    통합 계좌(UNIFIED)의 코인별 잔고 캐시.
+    비공개 WebSocket의 wallet 토픽으로 갱신되고, 스트림이 끊기면 주기적인 REST 조회로 대체합니다.
+    주문 수량 계산은 캐시된 USDT 평가금액을 사용하므로 주문마다 잔고 조회 왕복이 없습니다.
+    """
+
+    def __init__(self, gateway, stream, refresh_interval=ACCOUNT_REFRESH_INTERVAL,
+                 resync_interval=ACCOUNT_RESYNC_INTERVAL):
+        self.gateway = gateway
+        self.stream = stream
+        self.refresh_interval = refresh_interval
+        self.resync_interval = resync_interval
+        # coin -> 잔고 데이터 (Bybit coin 항목 그대로)
+        self.coins = {}
+        self.updated_at = 0.0
+        self._refresh_task = None
+        self._inflight = None
+
+        stream.add_handler('wallet', self._on_wallet_message)
+
+    async def start(self):
+        """잔고를 한 번 불러오고 새로고침 태스크를 시작합니다. (스트림은 position_tracker가 시작)"""
+        try:
+            await self.refresh()
+        except Exception as e:
+            print(f"⚠️ 계좌 잔고 초기 조회 실패: {e}")
+
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    def apply_wallet(self, accounts):
+        """wallet 토픽 / wallet-balance 응답의 계좌 목록을 반영합니다."""
+        for account in accounts:
+            if account.get('accountType', ACCOUNT_TYPE) != ACCOUNT_TYPE:
+                continue
+            for coin in account.get('coin', []):
+                self.coins[coin['coin']] = dict(self.coins.get(coin['coin'], {}), **coin)
+        self.updated_at = time.monotonic()
+
+    def _on_wallet_message(self, message):
+        self.apply_wallet(message.get('data', []))
+
+    async def refresh(self):
+        """REST로 잔고를 다시 불러옵니다. (진행 중인 조회가 있으면 그 결과를 기다림)"""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetch())
+            self._inflight.add_done_callback(self._clear_inflight)
+        await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, future):
+        if self._inflight is future:
+            self._inflight = None
+
+    async def _fetch(self):
+        wallet_balance = await self.gateway.get_wallet_balance(accountType=ACCOUNT_TYPE)
+        if wallet_balance['retCode'] != 0:
+            raise RuntimeError(f"잔고 조회 실패: {wallet_balance['retMsg']}")
+        self.apply_wallet(wallet_balance['result']['list'])
+
+    def is_fresh(self):
+        """스트림이 연결되어 있거나 마지막 갱신이 새로고침 주기 이내이면 True"""
+        if not self.coins:
+            return False
+        if self.stream.connected:
+            return True
+        return time.monotonic() - self.updated_at <= self.refresh_interval
+
+    def coin(self, coin='USDT'):
+        """캐시된 코인 잔고 데이터를 반환합니다. (네트워크 호출 없음, 없으면 None)"""
+        return self.coins.get(coin)
+
+    async def get_coin(self, coin='USDT'):
+        """코인 잔고 데이터를 반환합니다. 캐시가 오래되었을 때만 REST로 다시 불러옵니다."""
+        if not self.is_fresh():
+            await self.refresh()
+        return self.coin(coin)
+
+    async def usdt_equity(self):
+        """주문 수량 계산에 사용할 USDT 평가금액(equity)을 반환합니다. (없으면 None)"""
+        usdt = await self.get_coin('USDT')
+        return float(usdt['equity']) if usdt and usdt.get('equity') not in (None, '') else None
+
+    def _refresh_due(self):
+        age = time.monotonic() - self.updated_at
+        return age >= (self.resync_interval if self.stream.connected else self.refresh_interval)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            if not self._refresh_due():
+                continue
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"⚠️ 계좌 잔고 새로고침 실패: {e}")
+
+
+# 프로세스 전체에서 공유하는 계좌 상태
+account_state = AccountState(bybit_gateway, private_stream)
+
+__all__ = ['AccountState', 'account_state']
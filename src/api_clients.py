@@ -1,8 +1,5 @@
 import os
 from dotenv import load_dotenv
-from telethon import TelegramClient
-from pybit.unified_trading import HTTP
-import telegram
 
 # .env 파일에서 환경 변수 로드
 load_dotenv()
@@ -19,16 +16,53 @@ TELE_BYBIT_LOG_CHAT_ID = int(os.getenv('TELE_BYBIT_LOG_CHAT_ID'))
 # --- 테스트용 채널 ID (필요시 사용)
 TEST_CHANNEL_ID = int(os.getenv('TEST_CHANNEL_ID'))
 
-# Bybit 클라이언트 초기화
-bybit_client = HTTP(
-    testnet=False,
-    api_key=BYBIT_API_KEY,
-    api_secret=BYBIT_SECRET_KEY
-)
-# 텔레그램 유저 클라이언트 초기화
-client = TelegramClient('my_session', TELEGRAM_API_ID, TELEGRAM_API_HASH)
-# 텔레그램 봇 클라이언트 초기화
-bybit_bot = telegram.Bot(token=TELE_BYBIT_BOT_TOKEN)
+# Bybit 테스트넷 사용 여부
+BYBIT_TESTNET = os.getenv('BYBIT_TESTNET', 'false').lower() == 'true'
+# Bybit REST 주소 (로컬 대역 서버를 사용할 때만 지정, 예: http://127.0.0.1:8765)
+BYBIT_BASE_URL = os.getenv('BYBIT_BASE_URL')
+
+
+def _build_bybit_client():
+    from pybit.unified_trading import HTTP
+
+    bybit_client = HTTP(
+        testnet=BYBIT_TESTNET,
+        api_key=BYBIT_API_KEY,
+        api_secret=BYBIT_SECRET_KEY
+    )
+    if BYBIT_BASE_URL:
+        bybit_client.endpoint = BYBIT_BASE_URL.rstrip('/')
+    return bybit_client
+
+
+def _build_telegram_client():
+    from telethon import TelegramClient
+
+    return TelegramClient('my_session', TELEGRAM_API_ID, TELEGRAM_API_HASH)
+
+
+def _build_bybit_bot():
+    import telegram
+
+    return telegram.Bot(token=TELE_BYBIT_BOT_TOKEN)
+
+
+# 클라이언트는 import 시점이 아니라 처음 가져갈 때 만듭니다.
+# (예: bot.py만 실행하면 Telethon 세션 파일을 열지 않고, 필요 없는 라이브러리도 불러오지 않음)
+_CLIENT_FACTORIES = {
+    'bybit_client': _build_bybit_client,  # Bybit 클라이언트
+    'client': _build_telegram_client,     # 텔레그램 유저 클라이언트
+    'bybit_bot': _build_bybit_bot,        # 텔레그램 봇 클라이언트
+}
+
+
+def __getattr__(name):
+    factory = _CLIENT_FACTORIES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = factory()
+    return value
+
 
 # 다른 모듈에서 사용하기 위해 변수를 노출시킵니다.
-__all__ = ['bybit_client', 'client', 'bybit_bot', 'TARGET_CHANNEL_ID', 'TELE_BYBIT_LOG_CHAT_ID']
\ No newline at end of file
+__all__ = ['bybit_client', 'client', 'bybit_bot', 'TARGET_CHANNEL_ID', 'TELE_BYBIT_LOG_CHAT_ID', 'BYBIT_TESTNET', 'BYBIT_BASE_URL']
@@ -0,0 +1,205 @@
+"""
+trade_log 조회 벤치마크 도구.
+합성 거래 기록(기본 100만 건)으로 기존 스키마(v0)의 DB를 만들고,
+마이그레이션(created_ts / trade_key 컬럼 + 인덱스) 전후의 리포트 / 기록 조회 / 중복 확인 쿼리 시간을 비교합니다.
+
+사용법 (src 폴더에서):
+    python bench_trade_log.py                    # 100만 건
+    python bench_trade_log.py --rows 200000 --repeat 50
+    python bench_trade_log.py --keep bench.db    # 만든 DB를 지우지 않고 남김
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# 기존 스키마 (created_ts 컬럼과 인덱스가 없던 v0)
+LEGACY_TRADE_LOG_SQL = '''
+    CREATE TABLE trade_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        symbol TEXT NOT NULL,
+        side TEXT NOT NULL,
+        entry_price REAL,
+        exit_price REAL,
+        qty REAL,
+        pnl REAL,
+        fee REAL,
+        created_at TEXT NOT NULL
+    )
+'''
+
+ROLLUP_SQL = '''
+    CREATE TABLE trade_rollup (
+        bucket TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        side TEXT NOT NULL,
+        trades INTEGER NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        pnl REAL NOT NULL DEFAULT 0,
+        fee REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (bucket, symbol, side)
+    ) WITHOUT ROWID
+'''
+
+
+def configure_environment(workdir):
+    """database_manager를 불러올 때 실제 DB 경로 대신 임시 폴더를 사용하도록 설정합니다."""
+    os.environ['GDRIVE_PATH'] = workdir
+    os.environ['DB_LOCAL_PATH'] = ''
+
+
+def synthetic_trades(rows, symbols, days, seed):
+    """현재 시각 이전 days일 동안 고르게 퍼진 합성 거래 기록을 시간순으로 만듭니다."""
+    rng = random.Random(seed)
+    names = [f"SYM{i}USDT" for i in range(symbols)]
+    end = datetime.now()
+    step = timedelta(days=days) / rows
+    created = end - timedelta(days=days)
+    for _ in range(rows):
+        created += step
+        entry = rng.uniform(1, 1000)
+        exit_price = entry * rng.uniform(0.95, 1.05)
+        qty = round(rng.uniform(0.01, 10), 3)
+        yield (
+            rng.choice(names), rng.choice(('Buy', 'Sell')), entry, exit_price, qty,
+            round((exit_price - entry) * qty, 6), round(entry * qty * 0.00055, 6), created.isoformat()
+        )
+
+
+def build_legacy_db(path, args):
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute(LEGACY_TRADE_LOG_SQL)
+    conn.execute(ROLLUP_SQL)
+    conn.executemany('''
+        INSERT INTO trade_log (symbol, side, entry_price, exit_price, qty, pnl, fee, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', synthetic_trades(args.rows, args.symbols, args.days, args.seed))
+    conn.commit()
+    conn.close()
+
+
+def timed(repeat, func):
+    """func를 repeat번 실행하고 (평균 ms, 마지막 결과)를 반환합니다."""
+    result = None
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - started_at) * 1000 / repeat, result
+
+
+def query_plan(conn, sql, params):
+    return ' / '.join(row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params))
+
+
+def sample_trade(conn):
+    """중복 확인 쿼리에 사용할 기존 거래 한 건 (중간 지점)"""
+    return conn.execute(
+        'SELECT * FROM trade_log WHERE id = (SELECT MAX(id) / 2 FROM trade_log)'
+    ).fetchone()
+
+
+def legacy_queries(sample, since):
+    """마이그레이션 전 코드가 사용하던 쿼리 (이름, SQL, 파라미터)"""
+    return [
+        ('history (최근 20건)',
+         'SELECT * FROM trade_log ORDER BY created_at DESC LIMIT ?', (20,)),
+        ('report (최근 1일)',
+         "SELECT COUNT(*), SUM(pnl > 0), TOTAL(pnl) FROM trade_log WHERE created_at >= ?",
+         (since.strftime('%Y-%m-%d %H:%M:%S'),)),
+        ('duplicate check',
+         'SELECT COUNT(*) FROM trade_log WHERE symbol = ? AND side = ? AND pnl = ? AND qty = ? AND created_at = ?',
+         (sample['symbol'], sample['side'], sample['pnl'], sample['qty'], sample['created_at'])),
+    ]
+
+
+def indexed_queries(sample, since_ts):
+    """마이그레이션 후 코드가 사용하는 쿼리 (이름, SQL, 파라미터)"""
+    return [
+        ('history (최근 20건)',
+         'SELECT * FROM trade_log ORDER BY created_ts DESC LIMIT ?', (20,)),
+        ('report (최근 1일)',
+         'SELECT COUNT(*), TOTAL(pnl > 0), TOTAL(pnl) FROM trade_log WHERE created_ts >= ?', (since_ts,)),
+        ('duplicate check',
+         'SELECT 1 FROM trade_log WHERE trade_key = ?', (sample['trade_key'],)),
+    ]
+
+
+def run_queries(conn, queries, repeat):
+    results = []
+    for name, sql, params in queries:
+        elapsed_ms, _ = timed(repeat, lambda: conn.execute(sql, params).fetchall())
+        results.append((name, elapsed_ms, query_plan(conn, sql, params)))
+    return results
+
+
+def run_benchmark(args, path):
+    import database_manager
+
+    print(f"합성 거래 기록 {args.rows:,}건 생성 중... ({path})")
+    build_ms, _ = timed(1, lambda: build_legacy_db(path, args))
+    print(f"  생성: {build_ms / 1000:.1f}초")
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    since = datetime.now() - timedelta(days=1)
+    since_ts = round(since.timestamp() * 1000)
+
+    before = run_queries(conn, legacy_queries(sample_trade(conn), since), args.repeat)
+
+    def migrate():
+        conn.execute('BEGIN')
+        database_manager.migrate_schema(conn)
+        database_manager.rebuild_trade_rollup(conn)
+        conn.execute('COMMIT')
+
+    migrate_ms, _ = timed(1, migrate)
+    after = run_queries(conn, indexed_queries(sample_trade(conn), since_ts), args.repeat)
+    report_ms, summary = timed(args.repeat, lambda: database_manager.get_trade_summary(conn, since_ts))
+    conn.close()
+
+    latest = f"v{database_manager.SCHEMA_VERSION}"
+    print(f"\n마이그레이션 (created_ts / trade_key 채우기 + 인덱스 + 집계 재계산): {migrate_ms / 1000:.2f}초")
+    print(f"\n{'쿼리':<20} {'v0 (ms)':>10} {latest + ' (ms)':>10} {'배수':>8}")
+    for (name, before_ms, _), (_, after_ms, _) in zip(before, after):
+        print(f"{name:<20} {before_ms:>10.3f} {after_ms:>10.3f} {before_ms / after_ms:>7.0f}x")
+    print(f"{'generate_report':<20} {'':>10} {report_ms:>10.3f}   (trade_rollup + 첫 시간 범위 조회, {summary[0]}건)")
+
+    print("\n[쿼리 실행 계획]")
+    for label, results in (('v0', before), (latest, after)):
+        for name, _, plan in results:
+            print(f"  {label} {name}: {plan}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="합성 거래 기록으로 trade_log 조회 성능을 비교합니다.")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="합성 거래 기록 수 (기본 1,000,000)")
+    parser.add_argument('--symbols', type=int, default=200, help="종목 수")
+    parser.add_argument('--days', type=float, default=730, help="거래 기록이 퍼져 있는 기간 (일)")
+    parser.add_argument('--repeat', type=int, default=20, help="쿼리별 반복 횟수")
+    parser.add_argument('--seed', type=int, default=1, help="난수 시드")
+    parser.add_argument('--keep', help="만든 DB를 이 경로에 남김 (이미 있으면 덮어씀)")
+    args = parser.parse_args(argv)
+    if args.rows <= 0 or args.repeat <= 0:
+        parser.error("--rows와 --repeat는 0보다 커야 합니다.")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix='bench-trade-log-') as workdir:
+        configure_environment(workdir)
+        path = os.path.abspath(args.keep) if args.keep else os.path.join(workdir, 'bench.db')
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        run_benchmark(args, path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
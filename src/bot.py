@@ -2,19 +2,31 @@ import asyncio
 from datetime import datetime
 import json
 import os
+import time
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 
-from api_clients import bybit_client, bybit_bot, TELE_BYBIT_BOT_TOKEN
+from api_clients import bybit_bot, TELE_BYBIT_BOT_TOKEN
+from bybit_gateway import bybit_gateway
+from ticker_cache import ticker_cache
+from account_state import account_state
+from position_tracker import position_tracker
+from order_store import order_store
+from latency_tracker import latency_tracker, load_dump, format_summary, format_gauges
 from portfolio_manager import generate_report
+from trade_analytics import ANALYTICS_PERIODS, trade_analytics, format_stats, format_symbol_stats
 from utils import MESSAGES, log_error_and_send_message
-from database_manager import get_active_orders, get_db_connection, record_trade_result_db, update_filled_status
+from database_manager import get_db_connection, record_trade_result_db, get_recent_trades, trade_exists, trade_key, assign_trade_keys, db_writer, start_snapshots, close_database
 
 # 봇 명령어 처리 함수들
 async def open_orders_command(update: Update, context):
     try:
-        print("API 호출: bybit_client.get_open_orders(category='linear', settleCoin='USDT')")
-        orders_info = bybit_client.get_open_orders(category="linear", settleCoin="USDT")
+        print("API 호출: bybit_gateway.get_open_orders(category='linear', settleCoin='USDT')")
+        # 주문과 전체 시세를 동시에 조회합니다. (주문 수와 관계없이 한 번의 왕복)
+        orders_info, tickers = await asyncio.gather(
+            bybit_gateway.get_open_orders(category="linear", settleCoin="USDT"),
+            ticker_cache.snapshot()
+        )
         print(f"API 응답: {orders_info}")
 
         if orders_info['retCode'] == 0 and orders_info['result']['list']:
@@ -27,10 +39,7 @@ async def open_orders_command(update: Update, context):
                 message_text = MESSAGES['open_orders_title'] + "\n\n"
                 for order in filtered_orders:
                     symbol = order['symbol']
-                    ticker_info = bybit_client.get_tickers(category="linear", symbol=symbol)
-                    current_price = "정보 없음"
-                    if ticker_info['retCode'] == 0 and ticker_info['result']['list']:
-                        current_price = ticker_info['result']['list'][0]['lastPrice']
+                    current_price = tickers[symbol]['lastPrice'] if symbol in tickers else "정보 없음"
 
                     message_text += (
                         f"**{MESSAGES['symbol']}:** {symbol} | **{MESSAGES['side']}:** {order['side']}\n"
@@ -53,44 +62,46 @@ async def open_orders_command(update: Update, context):
             chat_id=update.effective_chat.id
         )
 
+def _unrealized_pnl(position, ticker):
+    """
+    시세 캐시의 markPrice로 미실현 손익을 계산합니다. (스트림의 unrealisedPnl은 포지션이 바뀔 때만 갱신되므로)
+    markPrice나 진입가가 없으면 포지션 데이터의 unrealisedPnl을 사용합니다.
+    """
+    entry_price = position.get('avgPrice') or position.get('entryPrice')
+    mark_price = ticker.get('markPrice') if ticker else None
+    try:
+        if entry_price and mark_price:
+            direction = 1 if position['side'] == 'Buy' else -1
+            return (float(mark_price) - float(entry_price)) * float(position['size']) * direction
+        return float(position.get('unrealisedPnl') or 0.0)
+    except (ValueError, TypeError):
+        return 0.0
+
 async def positions_command(update: Update, context):
     try:
-        print("API 호출: bybit_client.get_positions(category='linear', settleCoin='USDT')")
-        positions_info = bybit_client.get_positions(category="linear", settleCoin="USDT")
-        print(f"API 응답: {positions_info}")
-        
-        if positions_info['retCode'] == 0 and positions_info['result']['list']:
+        # 포지션은 공유 포지션 추적기의 캐시(스트림 + 주기적 재동기화)에서, 시세는 시세 캐시에서 가져옵니다.
+        positions, tickers = await asyncio.gather(
+            position_tracker.open_positions(),
+            ticker_cache.snapshot()
+        )
+
+        if positions:
             message_text = MESSAGES['positions_title'] + "\n\n"
-            found_position = False
             total_unrealized_pnl = 0.0
-            for position in positions_info['result']['list']:
-                if float(position['size']) > 0:
-                    found_position = True
-                    symbol = position['symbol']
-                    ticker_info = bybit_client.get_tickers(category="linear", symbol=symbol)
-                    current_price = "정보 없음"
-                    if ticker_info['retCode'] == 0 and ticker_info['result']['list']:
-                        current_price = ticker_info['result']['list'][0]['lastPrice']
-
-                    pnl_value_str = position.get('unrealisedPnl', '0')
-                    try:
-                        pnl_value = float(pnl_value_str)
-                        total_unrealized_pnl += pnl_value
-                    except (ValueError, TypeError):
-                        pnl_value = 0.0
-                    
-                    message_text += (
-                        f"**{MESSAGES['symbol']}:** {symbol} | **{MESSAGES['side']}:** {position['side']}\n"
-                        f"**{MESSAGES['qty']}:** {position['size']} | **{MESSAGES['entry_price']}:** {position['avgPrice']}\n"
-                        f"**{MESSAGES['current_price']}:** {current_price}\n"
-                        f"**{MESSAGES['unrealized_pnl']}:** {pnl_value}\n\n"
-                    )
-            
-            if found_position:
-                message_text += f"**{MESSAGES['total_unrealized_pnl']}:** `{total_unrealized_pnl:.2f}` USDT\n"
-            else:
-                message_text = MESSAGES['no_positions']
+            for position in positions:
+                symbol = position['symbol']
+                ticker = tickers.get(symbol)
+                current_price = ticker['lastPrice'] if ticker else "정보 없음"
+                pnl_value = _unrealized_pnl(position, ticker)
+                total_unrealized_pnl += pnl_value
 
+                message_text += (
+                    f"**{MESSAGES['symbol']}:** {symbol} | **{MESSAGES['side']}:** {position['side']}\n"
+                    f"**{MESSAGES['qty']}:** {position['size']} | **{MESSAGES['entry_price']}:** {position.get('avgPrice') or position.get('entryPrice')}\n"
+                    f"**{MESSAGES['current_price']}:** {current_price}\n"
+                    f"**{MESSAGES['unrealized_pnl']}:** {pnl_value:.4f}\n\n"
+                )
+            message_text += f"**{MESSAGES['total_unrealized_pnl']}:** `{total_unrealized_pnl:.2f}` USDT\n"
         else:
             message_text = MESSAGES['no_positions']
 
@@ -116,10 +127,9 @@ async def price_command(update: Update, context):
             return
 
         symbol = context.args[0].upper() + "USDT"
-        ticker_info = bybit_client.get_tickers(category="linear", symbol=symbol)
+        data = await ticker_cache.get(symbol)
         
-        if ticker_info['retCode'] == 0 and ticker_info['result']['list']:
-            data = ticker_info['result']['list'][0]
+        if data:
             price = data['lastPrice']
             change = float(data['price24hPcnt']) * 100
             
@@ -148,14 +158,15 @@ async def pf_command(update: Update, context):
         message_parts = context.args
         period = 'all'
         if message_parts:
-            if message_parts[0] == 'week':
+            if message_parts[0] == 'month':
+                period = 'month'
+            elif message_parts[0] == 'week':
                 period = 'week'
             elif message_parts[0] == 'day':
                 period = 'day'
         
         conn = get_db_connection()
         report = generate_report(conn, period=period)
-        conn.close()
 
         await bybit_bot.send_message(
             chat_id=update.effective_chat.id,
@@ -171,11 +182,10 @@ async def pf_command(update: Update, context):
 
 async def balance_command(update: Update, context):
     try:
-        balance_info = bybit_client.get_wallet_balance(accountType="UNIFIED")
-        
-        if balance_info['retCode'] == 0:
-            usdt_balance_data = next((item for item in balance_info['result']['list'][0]['coin'] if item['coin'] == 'USDT'), None)
-            
+        try:
+            # 잔고 캐시가 새로고침 주기 이내이면 API를 다시 호출하지 않습니다.
+            usdt_balance_data = await account_state.get_coin('USDT')
+
             if usdt_balance_data:
                 total_balance = float(usdt_balance_data.get('walletBalance') or 0.0)
                 available_balance = float(usdt_balance_data.get('availableToWithdraw') or 0.0)
@@ -187,8 +197,8 @@ async def balance_command(update: Update, context):
                 )
             else:
                 message_text = MESSAGES['usdt_balance_not_found']
-        else:
-            message_text = f"⚠️ 잔고 정보를 가져오는 데 실패했습니다: {balance_info['retMsg']}"
+        except RuntimeError as e:
+            message_text = f"⚠️ 잔고 정보를 가져오는 데 실패했습니다: {e}"
 
         await bybit_bot.send_message(
             chat_id=update.effective_chat.id,
@@ -204,8 +214,8 @@ async def balance_command(update: Update, context):
         
 async def cancel_all_command(update: Update, context):
     try:
-        print("API 호출: bybit_client.get_open_orders(category='linear', settleCoin='USDT')")
-        orders_info = bybit_client.get_open_orders(category='linear', settleCoin='USDT')
+        print("API 호출: bybit_gateway.get_open_orders(category='linear', settleCoin='USDT')")
+        orders_info = await bybit_gateway.get_open_orders(category='linear', settleCoin='USDT')
         print(f"API 응답: {orders_info}")
 
         if orders_info['retCode'] == 0 and orders_info['result']['list']:
@@ -215,17 +225,24 @@ async def cancel_all_command(update: Update, context):
             ]
             
             if orders_to_cancel:
-                for order in orders_to_cancel:
-                    try:
-                        bybit_client.cancel_order(
-                            category='linear',
-                            symbol=order['symbol'],
-                            orderId=order['orderId']
-                        )
-                        print(f"✅ 주문 취소 완료: {order['orderId']}")
-                    except Exception as e:
-                        print(f"⚠️ 주문 취소 실패: {order['orderId']}, 오류: {e}")
-                message_text = MESSAGES['cancel_all_success']
+                # 배치 취소 엔드포인트로 묶어서 동시에 취소합니다.
+                results = await bybit_gateway.run_batch(
+                    'cancel_batch_order',
+                    'linear',
+                    [{'symbol': order['symbol'], 'orderId': order['orderId']} for order in orders_to_cancel]
+                )
+                failed = []
+                for result in results:
+                    order_id = result['request']['orderId']
+                    if result['success']:
+                        print(f"✅ 주문 취소 완료: {order_id}")
+                    else:
+                        print(f"⚠️ 주문 취소 실패: {order_id}, 오류: {result['msg']}")
+                        failed.append(f"❌ {result['request']['symbol']} ({order_id}): {result['msg']}")
+                if failed:
+                    message_text = f"{MESSAGES['cancel_all_fail']} ({len(failed)}/{len(results)})\n" + "\n".join(failed)
+                else:
+                    message_text = MESSAGES['cancel_all_success_bot']
             else:
                 message_text = MESSAGES['no_open_order_to_cancel']
         else:
@@ -257,11 +274,7 @@ async def history_command(update: Update, context):
                 return
 
         conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM trade_log ORDER BY created_at DESC LIMIT ?", (limit,))
-        trade_history = cursor.fetchall()
-        conn.close()
+        trade_history = get_recent_trades(conn, limit)
 
         if not trade_history:
             message_text = MESSAGES['no_trade_history']
@@ -293,12 +306,12 @@ async def history_command(update: Update, context):
 
 async def health_command(update: Update, context):
     try:
-        health_check = bybit_client.get_wallet_balance(accountType="UNIFIED")
-        
-        if health_check['retCode'] == 0:
+        # 실제 API 응답을 확인하는 명령이므로 캐시 대신 REST로 조회하고, 결과로 잔고 캐시도 갱신합니다.
+        try:
+            await account_state.refresh()
             status_text = MESSAGES['health_status_ok']
-        else:
-            status_text = f"{MESSAGES['health_status_fail']}: {health_check.get('retMsg', '알 수 없는 오류')}"
+        except RuntimeError as e:
+            status_text = f"{MESSAGES['health_status_fail']}: {e}"
             
         message_text = (
             f"**{MESSAGES['health_title']}**\n"
@@ -318,6 +331,77 @@ async def health_command(update: Update, context):
             chat_id=update.effective_chat.id
         )
         
+async def latency_command(update: Update, context):
+    """
+    구간별 지연 시간(p50/p95/p99)을 보여줍니다.
+    같은 프로세스에서 신호를 처리 중이면 메모리의 값을, 아니면 트레이딩 프로세스가 저장한 요약 파일을 사용합니다.
+    """
+    try:
+        stages = latency_tracker.summary()
+        dump = {'dumped_at': time.time(), 'stages': stages, 'gauges': latency_tracker.gauges()} if stages else load_dump()
+        if not dump or not dump.get('stages'):
+            message_text = MESSAGES['latency_no_data']
+        else:
+            dumped_at = datetime.fromtimestamp(dump['dumped_at']).strftime('%Y-%m-%d %H:%M:%S')
+            message_text = (
+                MESSAGES['latency_title'].format(dumped_at=dumped_at) + "\n"
+                f"```\n{format_summary(dump['stages'])}\n```"
+            )
+            if dump.get('gauges'):
+                # 실행 레인 대기열 길이 등
+                message_text += f"\n```\n{format_gauges(dump['gauges'])}\n```"
+
+        await bybit_bot.send_message(
+            chat_id=update.effective_chat.id,
+            text=message_text,
+            parse_mode='Markdown'
+        )
+    except Exception as e:
+        log_error_and_send_message(
+            f"오류 발생: {e}",
+            exc=e,
+            chat_id=update.effective_chat.id
+        )
+
+async def _send_analytics(update: Update, context, formatter):
+    period = context.args[0].lower() if context.args else 'all'
+    if period not in ANALYTICS_PERIODS:
+        await bybit_bot.send_message(
+            chat_id=update.effective_chat.id,
+            text=MESSAGES['invalid_stats_period_usage']
+        )
+        return
+
+    # 첫 호출은 전체 거래 기록을 불러오므로 이벤트 루프를 막지 않도록 별도 스레드에서 계산합니다.
+    stats = await asyncio.to_thread(trade_analytics.report, get_db_connection(), period)
+    await bybit_bot.send_message(
+        chat_id=update.effective_chat.id,
+        text=formatter(stats, period),
+        parse_mode='Markdown'
+    )
+
+async def stats_command(update: Update, context):
+    """누적 손익 곡선 기반 성과 지표(최대 낙폭, Profit Factor, 기대값, Sharpe/Sortino 등)를 보여줍니다."""
+    try:
+        await _send_analytics(update, context, format_stats)
+    except Exception as e:
+        log_error_and_send_message(
+            f"오류 발생: {e}",
+            exc=e,
+            chat_id=update.effective_chat.id
+        )
+
+async def stats_symbols_command(update: Update, context):
+    """종목별 거래 수 / 손익 / 승률을 손익 순으로 보여줍니다."""
+    try:
+        await _send_analytics(update, context, format_symbol_stats)
+    except Exception as e:
+        log_error_and_send_message(
+            f"오류 발생: {e}",
+            exc=e,
+            chat_id=update.effective_chat.id
+        )
+
 async def menu_command(update: Update, context):
     keyboard = [
         [
@@ -332,6 +416,9 @@ async def menu_command(update: Update, context):
             InlineKeyboardButton(MESSAGES['menu_history'], callback_data="history"),
             InlineKeyboardButton(MESSAGES['menu_health'], callback_data="health")
         ],
+        [
+            InlineKeyboardButton(MESSAGES['menu_stats'], callback_data="stats")
+        ],
         [
             InlineKeyboardButton(MESSAGES['menu_cancel_all'], callback_data="cancel_all")
         ],
@@ -357,7 +444,7 @@ async def pnl_add_command(update: Update, context):
             return
 
         symbol = context.args[0].upper() + 'USDT'
-        response = bybit_client.get_closed_pnl(category="linear", symbol=symbol, limit=5)
+        response = await bybit_gateway.get_closed_pnl(category="linear", symbol=symbol, limit=5)
 
         if response['retCode'] == 0 and response['result']['list']:
             records = response['result']['list']
@@ -402,9 +489,11 @@ async def pnl_add_command(update: Update, context):
 async def pnl_dup_command(update: Update, context):
     """
     DB의 trade_log 테이블에서 중복된 레코드를 정리하는 명령어
+    (새 기록은 저장 시 걸러지므로 이전 버전이 남긴 키 없는 기록만 확인합니다)
     """
     try:
-        deleted_count = clean_up_duplicate_trade_log()
+        # 리스너와 같은 이벤트 루프에서 실행되므로 DB 커밋은 별도 스레드에서 기다립니다.
+        deleted_count = await asyncio.to_thread(clean_up_duplicate_trade_log)
         
         if deleted_count > 0:
             message_text = f"✅ 중복된 거래 기록 {deleted_count}개를 삭제했습니다."
@@ -428,7 +517,8 @@ async def button_callback_handler(update: Update, context):
     await query.answer()
 
     callback_data = query.data
-    data = json.loads(query.data)
+    # 메뉴 버튼은 일반 문자열, PNL 선택 버튼은 JSON을 callback_data로 사용합니다.
+    data = json.loads(callback_data) if callback_data.startswith('{') else {}
     action = data.get('a')
 
     if action == "select_pnl":
@@ -476,19 +566,19 @@ async def button_callback_handler(update: Update, context):
 
         context.user_data['aggregated_pnl_data'] = aggregated_data
         
-        # 새로운 중복 제거 함수 호출
-        is_duplicate = check_and_delete_duplicate_trade_log(aggregated_data)
-        if is_duplicate:
+        if is_duplicate_trade_log(aggregated_data):
             await query.edit_message_text(
-                text="❌ 동일한 PNL 기록이 이미 존재합니다. 중복 기록은 삭제되었습니다."
+                text="❌ 동일한 PNL 기록이 이미 존재합니다. 다시 저장하지 않습니다."
             )
             return
 
-        conn = get_db_connection()
         try:
+            # 활성 주문은 메모리 저장소(order_store)에서 조회합니다.
+            # 리스너를 따로 실행 중이면 그쪽에서 새로 접수한 주문이 DB에만 있으므로 바뀐 경우 먼저 다시 불러옵니다.
+            await order_store.refresh()
             active_orders_to_show = [
-                order for order in get_active_orders(conn).values() 
-                if order['symbol'] == aggregated_data['symbol'] and not order['filled']
+                order for order in order_store.for_symbol(aggregated_data['symbol'])
+                if not order['filled']
             ]
 
             keyboard = []
@@ -520,8 +610,6 @@ async def button_callback_handler(update: Update, context):
 
         except Exception as e:
             log_error_and_send_message(f"활성 주문 목록 가져오는 중 오류 발생: {e}", exc=e, chat_id=query.message.chat_id)
-        finally:
-            conn.close()
     elif action == "select_active_order":
         msg_id = data.get('msg_id')
         aggregated_data = context.user_data.get('aggregated_pnl_data')
@@ -532,7 +620,9 @@ async def button_callback_handler(update: Update, context):
 
         conn = get_db_connection()
         try:
-            update_filled_status(conn, msg_id, 1)
+            order_store.set_filled(msg_id, True)
+            # 리스너 프로세스가 중복 확인 전에 이 변경을 읽을 수 있도록 바로 커밋합니다.
+            await order_store.flush()
             
             trade_data = {
                 'symbol': aggregated_data['symbol'],
@@ -544,20 +634,20 @@ async def button_callback_handler(update: Update, context):
                 'fee': aggregated_data['fee'],
                 'created_at': datetime.fromtimestamp(aggregated_data['created_at'] / 1000).isoformat()
             }
-            record_trade_result_db(conn, trade_data)
+            inserted = await asyncio.to_thread(record_trade_result_db, conn, trade_data)
 
             del context.user_data['pnl_records']
             del context.user_data['selected_orders']
             del context.user_data['aggregated_pnl_data']
 
-            await query.edit_message_text(
-                text=f"✅ 선택한 활성 주문({msg_id})이 '체결 완료' 상태로 변경되었으며, PNL 기록이 성공적으로 저장되었습니다."
-            )
+            if inserted:
+                text = f"✅ 선택한 활성 주문({msg_id})이 '체결 완료' 상태로 변경되었으며, PNL 기록이 성공적으로 저장되었습니다."
+            else:
+                text = f"✅ 선택한 활성 주문({msg_id})이 '체결 완료' 상태로 변경되었습니다. (동일한 PNL 기록이 이미 있어 다시 저장하지 않음)"
+            await query.edit_message_text(text=text)
 
         except Exception as e:
             log_error_and_send_message(f"활성 주문 업데이트 중 오류 발생: {e}", exc=e, chat_id=query.message.chat_id)
-        finally:
-            conn.close()
 
     elif action == "skip_active_order":
         await handle_skip_active_order(query, context)
@@ -569,6 +659,8 @@ async def button_callback_handler(update: Update, context):
         await balance_command(update, context)
     elif callback_data == "pf":
         await pf_command(update, context)
+    elif callback_data == "stats":
+        await stats_command(update, context)
     elif callback_data == "history":
         await history_command(update, context)
     elif callback_data == "health":
@@ -629,10 +721,9 @@ async def handle_skip_active_order(query, context):
         await query.edit_message_text(text="⚠️ PNL 기록 데이터가 유효하지 않습니다. 다시 시도해주세요.")
         return
     
-    is_duplicate = check_and_delete_duplicate_trade_log(aggregated_data)
-    if is_duplicate:
+    if is_duplicate_trade_log(aggregated_data):
         await query.edit_message_text(
-            text="❌ 동일한 PNL 기록이 이미 존재합니다. 중복 기록은 삭제되었습니다."
+            text="❌ 동일한 PNL 기록이 이미 존재합니다. 다시 저장하지 않습니다."
         )
         return
 
@@ -648,101 +739,58 @@ async def handle_skip_active_order(query, context):
             'fee': aggregated_data['fee'],
             'created_at': datetime.fromtimestamp(aggregated_data['created_at'] / 1000).isoformat()
         }
-        record_trade_result_db(conn, trade_data)
+        inserted = await asyncio.to_thread(record_trade_result_db, conn, trade_data)
 
         del context.user_data['pnl_records']
         del context.user_data['selected_orders']
         del context.user_data['aggregated_pnl_data']
 
-        await query.edit_message_text(
-            text=f"✅ PNL 기록이 DB에 성공적으로 저장되었습니다. (활성 주문 건너뜀)"
-        )
+        if inserted:
+            text = f"✅ PNL 기록이 DB에 성공적으로 저장되었습니다. (활성 주문 건너뜀)"
+        else:
+            text = "❌ 동일한 PNL 기록이 이미 존재합니다. 다시 저장하지 않습니다."
+        await query.edit_message_text(text=text)
     except Exception as e:
         log_error_and_send_message(f"PNL 기록 저장 중 오류 발생: {e}", exc=e, chat_id=query.message.chat_id)
-    finally:
-        conn.close()
 
-def check_and_delete_duplicate_trade_log(trade_data):
+def is_duplicate_trade_log(trade_data):
     """
-    단일 trade_data에 대한 중복 레코드를 확인하고 삭제
+    단일 trade_data(created_at은 밀리초)와 같은 거래 기록이 이미 저장되어 있는지 확인합니다.
+    trade_key UNIQUE 인덱스 조회 한 번으로 끝나며, 저장 시에도 같은 키는 DB에서 걸러집니다.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    pnl_rounded = round(trade_data['pnl'], 6)
-    qty_rounded = round(trade_data['qty'], 6)
-    created_at_dt = datetime.fromtimestamp(trade_data['created_at'] / 1000)
-    created_at_str = created_at_dt.strftime('%Y-%m-%d %H:%M:%S')
-
+    key = trade_key(trade_data['symbol'], trade_data['side'], trade_data['created_at'], trade_data['qty'], trade_data['pnl'])
     try:
-        cursor.execute("""
-            SELECT COUNT(*) FROM trade_log
-            WHERE symbol = ? AND side = ? AND pnl = ? AND qty = ? AND created_at = ?
-        """, (trade_data['symbol'], trade_data['side'], pnl_rounded, qty_rounded, created_at_str))
-        count = cursor.fetchone()[0]
-
-        if count > 0:
-            print("❌ 중복 레코드가 발견되었습니다. 삭제합니다.")
-            cursor.execute("""
-                DELETE FROM trade_log
-                WHERE symbol = ? AND side = ? AND pnl = ? AND qty = ? AND created_at = ?
-            """, (trade_data['symbol'], trade_data['side'], pnl_rounded, qty_rounded, created_at_str))
-            conn.commit()
-            return True
-        else:
-            print("✅ 중복 레코드가 없습니다. 정상적으로 진행합니다.")
-            return False
-
+        return trade_exists(get_db_connection(), key)
     except Exception as e:
-        print(f"중복 레코드 확인 및 삭제 중 오류 발생: {e}")
+        print(f"중복 레코드 확인 중 오류 발생: {e}")
         return False
-    finally:
-        conn.close()
 
 def clean_up_duplicate_trade_log():
     """
-    DB의 trade_log 테이블 전체를 스캔하여 중복된 레코드를 모두 삭제
+    trade_key가 없는 거래 기록(이전 버전이 저장한 행)만 확인하여 키를 채우고 중복이면 삭제
+    새 기록은 저장 시 UNIQUE 인덱스로 걸러지므로 전체 테이블을 스캔하지 않습니다.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    deleted_count = 0
     try:
-        # 중복된 레코드를 찾는 쿼리
-        cursor.execute("""
-            SELECT symbol, side, pnl, qty, created_at, MIN(rowid)
-            FROM trade_log
-            GROUP BY symbol, side, pnl, qty, created_at
-            HAVING COUNT(*) > 1
-        """)
-        duplicates = cursor.fetchall()
-        
-        if not duplicates:
-            print("ℹ️ DB에 중복된 레코드가 없습니다.")
-            return 0
-
-        # 중복된 각 그룹에서 가장 오래된 하나를 제외하고 모두 삭제
-        for dup in duplicates:
-            symbol, side, pnl, qty, created_at, min_rowid = dup
-            cursor.execute("""
-                DELETE FROM trade_log
-                WHERE symbol = ? AND side = ? AND pnl = ? AND qty = ? AND created_at = ? AND rowid != ?
-            """, (symbol, side, pnl, qty, created_at, min_rowid))
-            deleted_count += cursor.rowcount
-        
-        conn.commit()
-        print(f"✅ DB에서 중복된 레코드 {deleted_count}개를 삭제했습니다.")
-        return deleted_count
-    
+        deleted_count = db_writer.run(assign_trade_keys)
     except Exception as e:
         print(f"전체 중복 레코드 정리 중 오류 발생: {e}")
-        conn.rollback()
         return 0
-    finally:
-        conn.close()
 
-def main():
-    application = Application.builder().token(TELE_BYBIT_BOT_TOKEN).build()
-    
+    if not deleted_count:
+        print("ℹ️ DB에 중복된 레코드가 없습니다.")
+        return 0
+    print(f"✅ DB에서 중복된 레코드 {deleted_count}개를 삭제했습니다.")
+    return deleted_count
+
+def build_application(post_init=None, post_shutdown=None):
+    """제어 봇 Application을 만들고 명령어 핸들러를 등록합니다. (알림과 같은 Bot 인스턴스를 사용)"""
+    builder = Application.builder().bot(bybit_bot)
+    if post_init:
+        builder = builder.post_init(post_init)
+    if post_shutdown:
+        builder = builder.post_shutdown(post_shutdown)
+    application = builder.build()
+
     application.add_handler(CommandHandler("open_orders", open_orders_command))
     application.add_handler(CommandHandler("positions", positions_command))
     application.add_handler(CommandHandler("price", price_command))
@@ -751,13 +799,54 @@ def main():
     application.add_handler(CommandHandler("cancel_all", cancel_all_command))
     application.add_handler(CommandHandler("history", history_command))
     application.add_handler(CommandHandler("health", health_command))
+    application.add_handler(CommandHandler("latency", latency_command))
+    application.add_handler(CommandHandler("stats", stats_command))
+    application.add_handler(CommandHandler("stats_symbols", stats_symbols_command))
     application.add_handler(CommandHandler("menu", menu_command))
     application.add_handler(CommandHandler("pnl_add", pnl_add_command))
     application.add_handler(CommandHandler("pnl_dup", pnl_dup_command))
     application.add_handler(CallbackQueryHandler(button_callback_handler))
-    
+    return application
+
+async def start_control_bot():
+    """
+    main.py의 이벤트 루프 안에서 제어 봇 폴링을 시작합니다.
+    리스너와 같은 프로세스이므로 포지션 / 잔고 / 시세 / 활성 주문 캐시와 DB 연결을 그대로 공유합니다.
+    """
+    application = build_application()
+    await application.initialize()
+    await application.start()
+    await application.updater.start_polling(poll_interval=1)
     print("Telegram bot started...")
-    application.run_polling(poll_interval=1)
+    return application
+
+async def stop_control_bot(application):
+    """제어 봇 폴링을 멈추고 정리합니다. (Bot의 연결도 닫히므로 알림 전송을 마친 뒤 호출)"""
+    if application.updater and application.updater.running:
+        await application.updater.stop()
+    if application.running:
+        await application.stop()
+    await application.shutdown()
+
+async def _standalone_post_init(application):
+    order_store.load(get_db_connection())
+    order_store.start()
+
+async def _standalone_post_shutdown(application):
+    await order_store.flush()
+
+def main():
+    """제어 봇만 단독으로 실행합니다. (main.py에서 CONTROL_BOT_ENABLED=false로 리스너를 따로 운영할 때)"""
+    application = build_application(post_init=_standalone_post_init, post_shutdown=_standalone_post_shutdown)
+
+    # 로컬 주 DB를 사용하는 경우 동기화 폴더로 주기적인 스냅샷을 저장합니다.
+    start_snapshots()
+
+    print("Telegram bot started...")
+    try:
+        application.run_polling(poll_interval=1)
+    finally:
+        close_database()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,179 @@
+import asyncio
+import collections
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from api_clients import bybit_client
+from latency_tracker import latency_tracker
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+# Bybit REST 호출을 처리할 워커 스레드 수 (동시에 진행할 수 있는 요청 수)
+BYBIT_HTTP_WORKERS = int(os.getenv('BYBIT_HTTP_WORKERS', '8'))
+
+# 이 프로세스가 사용할 REST 요청 예산 (초당 요청 수). 폴링 주기 조절에 사용합니다.
+BYBIT_REST_BUDGET_PER_SEC = float(os.getenv('BYBIT_REST_BUDGET_PER_SEC', '10'))
+
+# 요청 빈도를 계산할 구간 (초)
+RATE_WINDOW_SECONDS = 5
+
+# 배치 주문 / 취소 요청 하나에 담을 최대 주문 수
+BYBIT_BATCH_SIZE = int(os.getenv('BYBIT_BATCH_SIZE', '10'))
+
+# position/list 한 페이지에서 가져올 최대 포지션 수 (Bybit 최대값, 지정하지 않으면 20)
+POSITION_PAGE_LIMIT = 200
+
+# 시작할 때 미리 열어 둘 keep-alive 연결 수
+BYBIT_WARM_CONNECTIONS = int(os.getenv('BYBIT_WARM_CONNECTIONS', '4'))
+
+
+class AsyncBybitClient:
+    """
+    pybit HTTP 클라이언트를 전용 스레드 풀에서 실행하는 asyncio용 Bybit 게이트웨이.
+    모든 REST 호출은 이 객체를 통해 await 되므로 이벤트 루프가 막히지 않습니다.
+    """
+
+    def __init__(self, client, max_workers=BYBIT_HTTP_WORKERS, budget_per_sec=BYBIT_REST_BUDGET_PER_SEC):
+        self.client = client
+        self.budget_per_sec = budget_per_sec
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bybit-http')
+        # 최근 요청 시각 (요청 빈도 / 남은 여유 계산용)
+        self._request_times = collections.deque(maxlen=4096)
+
+        # 워커 수만큼 keep-alive 연결을 유지하도록 requests 세션의 커넥션 풀 크기를 맞춥니다.
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        client.client.mount('https://', adapter)
+        client.client.mount('http://', adapter)
+
+    async def _call(self, method_name, **kwargs):
+        """pybit 메서드를 워커 스레드에서 실행하고 결과를 반환합니다. (예외는 그대로 전달)"""
+        loop = asyncio.get_running_loop()
+        method = getattr(self.client, method_name)
+        self._request_times.append(time.monotonic())
+        # 워커 대기 시간을 포함한 호출 단위 지연 시간을 엔드포인트별로 기록합니다.
+        with latency_tracker.span(f'bybit.{method_name}'):
+            return await loop.run_in_executor(self._executor, functools.partial(method, **kwargs))
+
+    async def warm_up(self, connections=BYBIT_WARM_CONNECTIONS):
+        """
+        가벼운 공개 엔드포인트(get_server_time)를 동시에 호출하여 keep-alive 연결을 미리 열어 둡니다.
+        첫 주문이 TLS 연결 수립 비용을 내지 않도록 시작 단계에서 사용하며, 연결된 수를 반환합니다.
+        """
+        connections = max(1, min(connections, self.max_workers))
+        results = await asyncio.gather(
+            *(self._call('get_server_time') for _ in range(connections)),
+            return_exceptions=True
+        )
+        return sum(1 for result in results if not isinstance(result, Exception))
+
+    def request_rate(self):
+        """최근 RATE_WINDOW_SECONDS 동안의 초당 요청 수를 반환합니다."""
+        cutoff = time.monotonic() - RATE_WINDOW_SECONDS
+        while self._request_times and self._request_times[0] < cutoff:
+            self._request_times.popleft()
+        return len(self._request_times) / RATE_WINDOW_SECONDS
+
+    def headroom(self):
+        """요청 예산 중 남은 비율(0.0 ~ 1.0)을 반환합니다."""
+        if self.budget_per_sec <= 0:
+            return 1.0
+        return max(0.0, 1.0 - self.request_rate() / self.budget_per_sec)
+
+    # --- 계좌 ---
+    async def get_wallet_balance(self, **kwargs):
+        return await self._call('get_wallet_balance', **kwargs)
+
+    # --- 시세 / 종목 정보 ---
+    async def get_tickers(self, **kwargs):
+        return await self._call('get_tickers', **kwargs)
+
+    async def get_instruments_info(self, **kwargs):
+        return await self._call('get_instruments_info', **kwargs)
+
+    # --- 포지션 ---
+    async def get_positions(self, **kwargs):
+        return await self._call('get_positions', **kwargs)
+
+    async def get_all_positions(self, **kwargs):
+        """
+        nextPageCursor를 따라가며 모든 페이지의 포지션을 모아 get_positions와 같은 형식으로 반환합니다.
+        한 페이지라도 실패하면 그 응답을 그대로 반환하므로, 일부 페이지만 받은 목록을 전체 포지션으로 오인하지 않습니다.
+        """
+        positions = []
+        cursor = None
+        while True:
+            page = await self.get_positions(limit=POSITION_PAGE_LIMIT, cursor=cursor, **kwargs)
+            if page['retCode'] != 0:
+                return page
+            positions.extend(page['result']['list'])
+            cursor = page['result'].get('nextPageCursor')
+            if not cursor:
+                return dict(page, result=dict(page['result'], list=positions, nextPageCursor=''))
+
+    async def set_leverage(self, **kwargs):
+        return await self._call('set_leverage', **kwargs)
+
+    async def set_trading_stop(self, **kwargs):
+        return await self._call('set_trading_stop', **kwargs)
+
+    async def get_closed_pnl(self, **kwargs):
+        return await self._call('get_closed_pnl', **kwargs)
+
+    # --- 주문 ---
+    async def place_order(self, **kwargs):
+        return await self._call('place_order', **kwargs)
+
+    async def cancel_order(self, **kwargs):
+        return await self._call('cancel_order', **kwargs)
+
+    async def cancel_all_orders(self, **kwargs):
+        return await self._call('cancel_all_orders', **kwargs)
+
+    async def get_open_orders(self, **kwargs):
+        return await self._call('get_open_orders', **kwargs)
+
+    async def place_batch_order(self, **kwargs):
+        return await self._call('place_batch_order', **kwargs)
+
+    async def cancel_batch_order(self, **kwargs):
+        return await self._call('cancel_batch_order', **kwargs)
+
+    async def run_batch(self, method_name, category, requests, chunk_size=BYBIT_BATCH_SIZE):
+        """
+        주문 목록을 chunk_size개씩 나눠 배치 엔드포인트(place_batch_order / cancel_batch_order)로 동시에 보냅니다.
+        요청 순서대로 {'request', 'success', 'orderId', 'msg'} 목록을 반환합니다.
+        """
+        chunks = [requests[i:i + chunk_size] for i in range(0, len(requests), chunk_size)]
+        responses = await asyncio.gather(
+            *(self._call(method_name, category=category, request=chunk) for chunk in chunks),
+            return_exceptions=True
+        )
+
+        results = []
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, Exception):
+                results.extend({'request': request, 'success': False, 'orderId': None, 'msg': str(response)} for request in chunk)
+                continue
+            items = response['result'].get('list') or []
+            ext_items = (response.get('retExtInfo') or {}).get('list') or []
+            for i, request in enumerate(chunk):
+                item = items[i] if i < len(items) else {}
+                ext = ext_items[i] if i < len(ext_items) else {'code': response['retCode'], 'msg': response['retMsg']}
+                results.append({
+                    'request': request,
+                    'success': ext.get('code') == 0,
+                    'orderId': item.get('orderId'),
+                    'msg': ext.get('msg', '')
+                })
+        return results
+
+
+# 프로세스 전체에서 공유하는 게이트웨이 인스턴스
+bybit_gateway = AsyncBybitClient(bybit_client)
+
+__all__ = ['AsyncBybitClient', 'bybit_gateway', 'BYBIT_WARM_CONNECTIONS']
@@ -1,6 +1,13 @@
+import ast
+import hashlib
 import sqlite3
 import os
+import queue
+import shutil
 import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 # .env 파일에서 환경 변수 로드
@@ -8,26 +15,304 @@ load_dotenv()
 
 # 환경 변수에서 DB 경로 가져오기
 GDRIVE_PATH = os.getenv('GDRIVE_PATH')
-print(f"GDRIVE_PATH: {GDRIVE_PATH}")
-DB_PATH = os.path.join(GDRIVE_PATH, 'trading_bot.db')
-print(f"DB_PATH: {DB_PATH}")
+SNAPSHOT_DB_PATH = os.path.join(GDRIVE_PATH, 'trading_bot.db')
 
-# ✅ 데이터베이스 접근을 위한 전역 Lock 객체 생성
+# 로컬 디스크의 주 DB 경로 (지정하면 동기화 폴더에는 주기적인 스냅샷만 저장합니다)
+DB_LOCAL_PATH = os.getenv('DB_LOCAL_PATH')
+DB_PATH = DB_LOCAL_PATH or SNAPSHOT_DB_PATH
+
+# 동기화 폴더로 스냅샷을 저장하는 주기 (초)
+DB_SNAPSHOT_INTERVAL = float(os.getenv('DB_SNAPSHOT_INTERVAL', '300'))
+# 쓰기 요청을 모아서 한 번에 커밋하기 위해 기다리는 시간 (밀리초)
+DB_COMMIT_WINDOW_MS = float(os.getenv('DB_COMMIT_WINDOW_MS', '2'))
+# 연결마다 캐시할 prepared statement 수
+DB_CACHED_STATEMENTS = 256
+
+# ✅ 공유 읽기 연결에 대한 접근을 직렬화하는 Lock 객체
 db_lock = threading.Lock()
 
-def get_db_connection():
-    """SQLite 데이터베이스 연결을 반환합니다."""
-    # 디렉토리가 없으면 생성
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+_shared_conn = None
+_snapshot_thread = None
+_snapshot_stop = threading.Event()
+
+
+def _connect(path):
+    """WAL 모드와 튜닝된 PRAGMA가 적용된 SQLite 연결을 만듭니다."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, cached_statements=DB_CACHED_STATEMENTS)
     conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    # WAL에서는 NORMAL로도 손상 없이 안전하며, 커밋마다 fsync하지 않습니다.
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=30000')
     return conn
 
+
+def _seed_local_primary():
+    """로컬 주 DB가 아직 없으면 동기화 폴더의 스냅샷으로부터 복원합니다."""
+    if not DB_LOCAL_PATH or os.path.exists(DB_LOCAL_PATH) or not os.path.exists(SNAPSHOT_DB_PATH):
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(DB_LOCAL_PATH)), exist_ok=True)
+    shutil.copyfile(SNAPSHOT_DB_PATH, DB_LOCAL_PATH)
+    print(f"✅ 스냅샷에서 로컬 DB를 복원했습니다: {SNAPSHOT_DB_PATH} -> {DB_LOCAL_PATH}")
+
+
+class DatabaseWriter:
+    """
+    모든 쓰기를 전용 스레드 하나에서 처리하는 SQLite 기록기.
+    큐에 쌓인 쓰기 작업을 하나의 트랜잭션으로 묶어 커밋하므로 (group commit)
+    요청이 몰려도 커밋 횟수가 늘지 않고, 읽기 연결은 WAL 덕분에 기다리지 않습니다.
+    """
+
+    def __init__(self, path, commit_window_ms=DB_COMMIT_WINDOW_MS):
+        self.path = path
+        self.commit_window = commit_window_ms / 1000
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, work):
+        """
+        쓰기 작업(work(conn) 함수)을 큐에 넣고 Future를 반환합니다.
+        Future의 결과는 작업이 커밋된 뒤에 work의 반환값으로 채워집니다.
+        """
+        self.start()
+        future = Future()
+        self._queue.put((work, future))
+        return future
+
+    def run(self, work):
+        """쓰기 작업을 넣고 커밋될 때까지 기다린 뒤 결과를 반환합니다."""
+        return self.submit(work).result()
+
+    def stop(self):
+        """남은 작업을 모두 커밋한 뒤 기록 스레드를 종료합니다."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        conn = _connect(self.path)
+        conn.isolation_level = None  # 트랜잭션을 직접 관리합니다.
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                batch = [item]
+                stopping = self._collect(batch)
+                self._commit(conn, batch)
+                if stopping:
+                    return
+        finally:
+            conn.close()
+
+    def _collect(self, batch):
+        """커밋 대기 시간 동안 들어온 작업을 배치에 모읍니다. 종료 요청을 받으면 True를 반환합니다."""
+        deadline = time.monotonic() + self.commit_window
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                return False
+            if item is None:
+                return True
+            batch.append(item)
+
+    def _commit(self, conn, batch):
+        results = []
+        try:
+            conn.execute('BEGIN')
+            for work, future in batch:
+                # 작업 하나가 실패해도 같은 배치의 다른 작업은 커밋되도록 SAVEPOINT로 감쌉니다.
+                conn.execute('SAVEPOINT work')
+                try:
+                    results.append((future, work(conn), None))
+                    conn.execute('RELEASE work')
+                except Exception as e:
+                    conn.execute('ROLLBACK TO work')
+                    conn.execute('RELEASE work')
+                    results.append((future, None, e))
+            conn.execute('COMMIT')
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+# 프로세스 전체에서 공유하는 기록기
+db_writer = DatabaseWriter(DB_PATH)
+
+
+def get_db_connection():
+    """프로세스 전체에서 공유하는 SQLite (읽기) 연결을 반환합니다. 쓰기는 db_writer를 통해 처리됩니다."""
+    global _shared_conn
+    with db_lock:
+        if _shared_conn is None:
+            print(f"GDRIVE_PATH: {GDRIVE_PATH}")
+            print(f"DB_PATH: {DB_PATH}")
+            _seed_local_primary()
+            _shared_conn = _connect(DB_PATH)
+        return _shared_conn
+
+
+def snapshot_database():
+    """로컬 주 DB를 동기화 폴더로 스냅샷 저장합니다. (일관된 사본을 만든 뒤 교체)"""
+    if not DB_LOCAL_PATH or os.path.abspath(DB_LOCAL_PATH) == os.path.abspath(SNAPSHOT_DB_PATH):
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(SNAPSHOT_DB_PATH)), exist_ok=True)
+    tmp_path = SNAPSHOT_DB_PATH + '.tmp'
+    source = _connect(DB_PATH)
+    target = sqlite3.connect(tmp_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    os.replace(tmp_path, SNAPSHOT_DB_PATH)
+
+
+def _snapshot_loop():
+    while not _snapshot_stop.wait(DB_SNAPSHOT_INTERVAL):
+        try:
+            snapshot_database()
+        except Exception as e:
+            print(f"⚠️ DB 스냅샷 저장 실패: {e}")
+
+
+def start_snapshots():
+    """로컬 주 DB를 사용할 때 주기적인 스냅샷 저장을 시작합니다."""
+    global _snapshot_thread
+    if not DB_LOCAL_PATH or (_snapshot_thread is not None and _snapshot_thread.is_alive()):
+        return
+    _snapshot_stop.clear()
+    _snapshot_thread = threading.Thread(target=_snapshot_loop, name='db-snapshot', daemon=True)
+    _snapshot_thread.start()
+
+
+def close_database():
+    """남은 쓰기를 커밋하고, 마지막 스냅샷을 저장한 뒤 연결을 닫습니다. (프로그램 종료 시)"""
+    global _shared_conn
+    db_writer.stop()
+    _snapshot_stop.set()
+    try:
+        snapshot_database()
+    except Exception as e:
+        print(f"⚠️ DB 스냅샷 저장 실패: {e}")
+    with db_lock:
+        if _shared_conn is not None:
+            _shared_conn.close()
+            _shared_conn = None
+
+
+# PRAGMA user_version으로 기록하는 현재 스키마 버전
+SCHEMA_VERSION = 4
+
+# SQL에서 created_at(로컬 시각 ISO 문자열)을 epoch 밀리초로 바꾸는 식 (to_epoch_ms()와 같은 값)
+CREATED_TS_SQL = "CAST(ROUND((julianday(created_at, 'utc') - 2440587.5) * 86400000) AS INTEGER)"
+
+
+def to_epoch_ms(created_at):
+    """created_at(로컬 시각 ISO 문자열)을 epoch 밀리초 정수로 바꿉니다."""
+    return round(datetime.fromisoformat(created_at).timestamp() * 1000)
+
+
+def trade_key(symbol, side, created_ts, qty, pnl):
+    """
+    거래 내용(종목 / 방향 / 청산 시각 / 수량 / 손익)으로 만든 자연 키.
+    자동 기록과 /pnl 수동 기록이 같은 청산을 저장하면 같은 키가 되어 UNIQUE 인덱스에서 걸러집니다.
+    """
+    content = f"{symbol}|{side}|{created_ts}|{float(qty or 0):.6f}|{float(pnl or 0):.6f}"
+    return hashlib.sha1(content.encode()).hexdigest()
+
+
+def _column_names(write_conn, table):
+    return {row['name'] for row in write_conn.execute(f'PRAGMA table_info({table})')}
+
+
+def migrate_schema(write_conn):
+    """
+    PRAGMA user_version을 기준으로 아직 적용되지 않은 스키마 변경을 순서대로 적용합니다.
+    (기록 스레드의 연결로 호출)
+    """
+    version = write_conn.execute('PRAGMA user_version').fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+
+    if version < 1:
+        # v1: trade_log에 정수 시각(created_ts, epoch 밀리초) 컬럼과 인덱스 추가
+        if 'created_ts' not in _column_names(write_conn, 'trade_log'):
+            write_conn.execute('ALTER TABLE trade_log ADD COLUMN created_ts INTEGER')
+        backfilled = write_conn.execute(
+            f'UPDATE trade_log SET created_ts = {CREATED_TS_SQL} WHERE created_ts IS NULL'
+        ).rowcount
+        write_conn.execute('CREATE INDEX IF NOT EXISTS idx_trade_log_created_ts ON trade_log (created_ts)')
+        write_conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_trade_log_symbol_side_ts ON trade_log (symbol, side, created_ts)'
+        )
+        if backfilled:
+            print(f"✅ 거래 기록 {backfilled}건의 created_ts를 채웠습니다.")
+
+    if version < 2:
+        # v2: 같은 거래를 두 번 저장하지 못하도록 자연 키(trade_key)와 UNIQUE 인덱스 추가
+        if 'trade_key' not in _column_names(write_conn, 'trade_log'):
+            write_conn.execute('ALTER TABLE trade_log ADD COLUMN trade_key TEXT')
+        # 키를 모두 채운 뒤 인덱스를 한 번에 만드는 편이 행마다 인덱스를 갱신하는 것보다 빠릅니다.
+        removed = assign_trade_keys(write_conn)
+        write_conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_trade_log_trade_key ON trade_log (trade_key)')
+        if removed:
+            print(f"✅ 중복된 거래 기록 {removed}건을 정리했습니다.")
+
+    if version < 3:
+        # v3: 보유 시간 분석을 위한 진입 시각(opened_ts, epoch 밀리초). 이전 기록은 알 수 없으므로 NULL입니다.
+        if 'opened_ts' not in _column_names(write_conn, 'trade_log'):
+            write_conn.execute('ALTER TABLE trade_log ADD COLUMN opened_ts INTEGER')
+
+    if version < 4:
+        # v4: trade_log의 기존 행이 삭제 / 수정된 횟수. 메모리에 불러온 분석 데이터는 새 행(id 증가)만 이어서 읽고,
+        # 이 값이 바뀌었을 때만 전체를 다시 불러옵니다. (다른 프로세스나 직접 실행한 SQL의 변경도 트리거로 반영)
+        write_conn.execute(
+            'CREATE TABLE IF NOT EXISTS trade_log_changes ('
+            'id INTEGER PRIMARY KEY CHECK (id = 1), rewrites INTEGER NOT NULL DEFAULT 0)'
+        )
+        write_conn.execute('INSERT OR IGNORE INTO trade_log_changes (id, rewrites) VALUES (1, 0)')
+        write_conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS trade_log_after_delete AFTER DELETE ON trade_log
+            BEGIN
+                UPDATE trade_log_changes SET rewrites = rewrites + 1 WHERE id = 1;
+            END
+        ''')
+        write_conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS trade_log_after_update
+            AFTER UPDATE OF symbol, side, entry_price, qty, pnl, fee, created_ts, opened_ts ON trade_log
+            BEGIN
+                UPDATE trade_log_changes SET rewrites = rewrites + 1 WHERE id = 1;
+            END
+        ''')
+
+    write_conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    print(f"✅ DB 스키마를 v{version}에서 v{SCHEMA_VERSION}(으)로 갱신했습니다.")
+
+
 def setup_database(conn):
     """데이터베이스 테이블을 생성합니다."""
-    with db_lock:
-        cursor = conn.cursor()
-        
+    def work(write_conn):
+        cursor = write_conn.cursor()
+
         # trade_log 테이블: 거래 기록
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS trade_log (
@@ -39,10 +324,36 @@ def setup_database(conn):
                 qty REAL,
                 pnl REAL,
                 fee REAL,
-                created_at TEXT NOT NULL
+                created_at TEXT NOT NULL,
+                created_ts INTEGER,
+                trade_key TEXT,
+                opened_ts INTEGER
             )
         ''')
-        
+
+        # trade_rollup 테이블: 시간(bucket) / 종목 / 방향별 거래 집계
+        # 리포트는 trade_log 전체를 읽지 않고 이 테이블의 bucket만 합산합니다.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trade_rollup (
+                bucket TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                side TEXT NOT NULL,
+                trades INTEGER NOT NULL DEFAULT 0,
+                wins INTEGER NOT NULL DEFAULT 0,
+                pnl REAL NOT NULL DEFAULT 0,
+                fee REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (bucket, symbol, side)
+            ) WITHOUT ROWID
+        ''')
+        migrate_schema(write_conn)
+
+        # 집계 테이블이 새로 생긴 기존 DB는 거래 기록으로 한 번 채웁니다.
+        has_rollup = cursor.execute('SELECT 1 FROM trade_rollup LIMIT 1').fetchone()
+        has_trades = cursor.execute('SELECT 1 FROM trade_log LIMIT 1').fetchone()
+        if has_trades and not has_rollup:
+            rebuild_trade_rollup(write_conn)
+            print("✅ 거래 기록으로 집계 테이블(trade_rollup)을 채웠습니다.")
+
         # active_orders 테이블: 활성 주문 정보
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS active_orders (
@@ -58,70 +369,198 @@ def setup_database(conn):
                 filled BOOLEAN NOT NULL CHECK (filled IN (0, 1)) DEFAULT 0
             )
         ''')
-        
-        conn.commit()
+
+    db_writer.run(work)
 
 def save_active_order(conn, order_info):
     """활성 주문 정보를 데이터베이스에 저장합니다."""
-    with db_lock:
-        cursor = conn.cursor()
-        # ✅ 수정: filled 컬럼 추가
-        cursor.execute('''
-            INSERT OR REPLACE INTO active_orders (
-                message_id, symbol, side, entry_price, targets,
-                orderId, fund_percentage, leverage, original_message, filled
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            order_info['message_id'], order_info['symbol'], order_info['side'],
-            order_info['entry_price'], str(order_info['targets']),
-            order_info['orderId'], order_info['fund_percentage'], order_info['leverage'],
-            order_info['original_message'], order_info['filled']
-        ))
-        conn.commit()
+    # ✅ 수정: filled 컬럼 추가
+    params = (
+        order_info['message_id'], order_info['symbol'], order_info['side'],
+        order_info['entry_price'], str(order_info['targets']),
+        order_info['orderId'], order_info['fund_percentage'], order_info['leverage'],
+        order_info['original_message'], order_info['filled']
+    )
+    db_writer.run(lambda write_conn: write_conn.execute('''
+        INSERT OR REPLACE INTO active_orders (
+            message_id, symbol, side, entry_price, targets,
+            orderId, fund_percentage, leverage, original_message, filled
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', params))
 
 def update_filled_status(conn, message_id, status):
     """주문의 'filled' 상태를 업데이트합니다."""
-    with db_lock:
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE active_orders SET filled = ? WHERE message_id = ?
-        ''', (status, message_id))
-        conn.commit()
+    db_writer.run(lambda write_conn: write_conn.execute('''
+        UPDATE active_orders SET filled = ? WHERE message_id = ?
+    ''', (status, message_id)))
 
 def delete_active_order(conn, message_id):
     """활성 주문 정보를 데이터베이스에서 삭제합니다."""
-    with db_lock:
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM active_orders WHERE message_id = ?', (message_id,))
-        conn.commit()
+    db_writer.run(lambda write_conn: write_conn.execute('DELETE FROM active_orders WHERE message_id = ?', (message_id,)))
+
+def get_data_version():
+    """
+    기록 스레드 연결의 PRAGMA data_version을 반환합니다. 다른 연결(다른 프로세스 포함)이 커밋할 때만 값이 바뀌고
+    이 프로세스의 쓰기(모두 같은 기록 스레드 연결로 커밋)로는 바뀌지 않으므로,
+    메모리에 불러온 데이터를 다른 프로세스 때문에 다시 읽어야 하는지 확인할 수 있습니다. (기록 스레드를 기다리므로 워커 스레드에서 호출)
+    """
+    return db_writer.run(lambda write_conn: write_conn.execute('PRAGMA data_version').fetchone()[0])
 
 def get_active_orders(conn):
     """데이터베이스에서 모든 활성 주문 정보를 불러옵니다."""
     with db_lock:
-        conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM active_orders')
         rows = cursor.fetchall()
-        conn.close()
-    
+
     # Dict 형태로 변환하여 반환
     orders = {}
     for row in rows:
         order_info = dict(row)
-        order_info['targets'] = eval(order_info['targets']) # targets는 리스트로 변환
+        order_info['targets'] = ast.literal_eval(order_info['targets']) # targets는 리스트로 변환
         orders[order_info['message_id']] = order_info
     return orders
 
-def record_trade_result_db(conn, trade_data):
-    """거래 결과를 데이터베이스에 기록합니다."""
+def rollup_bucket(created_at):
+    """created_at('YYYY-MM-DDTHH:MM:SS' 또는 'YYYY-MM-DD HH:MM:SS')을 집계 bucket('YYYY-MM-DD HH')으로 바꿉니다."""
+    return created_at[:13].replace('T', ' ')
+
+# SQL에서 rollup_bucket()과 같은 값을 만드는 식
+ROLLUP_BUCKET_SQL = "replace(substr(created_at, 1, 13), 'T', ' ')"
+
+def _add_to_rollup(write_conn, symbol, side, created_at, pnl, fee, sign=1):
+    """거래 한 건을 집계 테이블에 더합니다. (sign=-1이면 뺍니다)"""
+    pnl = pnl or 0.0
+    write_conn.execute('''
+        INSERT INTO trade_rollup (bucket, symbol, side, trades, wins, pnl, fee)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (bucket, symbol, side) DO UPDATE SET
+            trades = trades + excluded.trades,
+            wins = wins + excluded.wins,
+            pnl = pnl + excluded.pnl,
+            fee = fee + excluded.fee
+    ''', (rollup_bucket(created_at), symbol, side, sign, sign * (pnl > 0), sign * pnl, sign * (fee or 0.0)))
+
+def rebuild_trade_rollup(write_conn):
+    """집계 테이블을 trade_log 전체로부터 다시 계산합니다. (기록 스레드의 연결로 호출)"""
+    write_conn.execute('DELETE FROM trade_rollup')
+    write_conn.execute(f'''
+        INSERT INTO trade_rollup (bucket, symbol, side, trades, wins, pnl, fee)
+        SELECT {ROLLUP_BUCKET_SQL}, symbol, side, COUNT(*), SUM(pnl > 0), TOTAL(pnl), TOTAL(fee)
+        FROM trade_log
+        GROUP BY 1, symbol, side
+    ''')
+
+def delete_trade_logs(write_conn, where, params):
+    """
+    조건에 맞는 거래 기록을 삭제하고 집계 테이블에서도 뺍니다. (기록 스레드의 연결로 호출)
+    삭제한 행 수를 반환합니다.
+    """
+    rows = write_conn.execute(f'SELECT symbol, side, created_at, pnl, fee FROM trade_log WHERE {where}', params).fetchall()
+    for row in rows:
+        _add_to_rollup(write_conn, row['symbol'], row['side'], row['created_at'], row['pnl'], row['fee'], sign=-1)
+    write_conn.execute('DELETE FROM trade_rollup WHERE trades <= 0')
+    return write_conn.execute(f'DELETE FROM trade_log WHERE {where}', params).rowcount
+
+def assign_trade_keys(write_conn):
+    """
+    trade_key가 없는 거래 기록(이전 버전이 저장한 행)에 키를 채웁니다. (기록 스레드의 연결로 호출)
+    이미 같은 키의 기록이 있으면 나중에 저장된 행을 삭제하고, 삭제한 행 수를 반환합니다.
+    """
+    rows = write_conn.execute(
+        'SELECT id, symbol, side, created_at, created_ts, qty, pnl FROM trade_log WHERE trade_key IS NULL ORDER BY id'
+    ).fetchall()
+    if not rows:
+        return 0
+    # 키가 있는 기록이 하나도 없으면 (마이그레이션 중) 기존 키와 비교할 필요가 없습니다.
+    has_keys = write_conn.execute('SELECT 1 FROM trade_log WHERE trade_key IS NOT NULL LIMIT 1').fetchone()
+    keys = {}
+    missing_ts = []
+    duplicate_ids = []
+    for row in rows:
+        created_ts = row['created_ts']
+        if created_ts is None:
+            created_ts = to_epoch_ms(row['created_at'])
+            missing_ts.append((created_ts, row['id']))
+        key = trade_key(row['symbol'], row['side'], created_ts, row['qty'], row['pnl'])
+        if key in keys or (has_keys and write_conn.execute('SELECT 1 FROM trade_log WHERE trade_key = ?', (key,)).fetchone()):
+            duplicate_ids.append(row['id'])
+        else:
+            keys[key] = row['id']
+
+    write_conn.executemany('UPDATE trade_log SET created_ts = ? WHERE id = ?', missing_ts)
+    for duplicate_id in duplicate_ids:
+        delete_trade_logs(write_conn, 'id = ?', (duplicate_id,))
+    write_conn.executemany('UPDATE trade_log SET trade_key = ? WHERE id = ?', keys.items())
+    return len(duplicate_ids)
+
+def trade_exists(conn, key):
+    """같은 trade_key의 거래 기록이 이미 있으면 True (UNIQUE 인덱스 조회)"""
     with db_lock:
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO trade_log (symbol, side, entry_price, exit_price, qty, pnl, fee, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            trade_data['symbol'], trade_data['side'], trade_data['entry_price'],
-            trade_data['exit_price'], trade_data['qty'], trade_data['pnl'],
-            trade_data['fee'], trade_data['created_at']
-        ))
-        conn.commit()
\ No newline at end of file
+        return conn.execute('SELECT 1 FROM trade_log WHERE trade_key = ?', (key,)).fetchone() is not None
+
+def get_trade_summary(conn, since_ts=None):
+    """
+    (거래 수, 수익 거래 수, 총 손익)을 반환합니다.
+    since_ts(epoch 밀리초)를 주면 그 시각 이후 거래만 합산합니다.
+    온전히 포함되는 시간 bucket은 집계 테이블에서, since_ts가 걸친 첫 시간의 나머지는
+    trade_log의 created_ts 인덱스 범위 조회로 더하므로 거래 기록 전체를 읽지 않습니다.
+    """
+    with db_lock:
+        if since_ts is None:
+            trades, wins, pnl = conn.execute(
+                'SELECT TOTAL(trades), TOTAL(wins), TOTAL(pnl) FROM trade_rollup'
+            ).fetchone()
+            return int(trades), int(wins), pnl
+
+        since = datetime.fromtimestamp(since_ts / 1000)
+        next_hour = since.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        trades, wins, pnl = conn.execute(
+            'SELECT TOTAL(trades), TOTAL(wins), TOTAL(pnl) FROM trade_rollup WHERE bucket >= ?',
+            (rollup_bucket(next_hour.isoformat()),)
+        ).fetchone()
+        head_trades, head_wins, head_pnl = conn.execute(
+            'SELECT COUNT(*), TOTAL(pnl > 0), TOTAL(pnl) FROM trade_log WHERE created_ts >= ? AND created_ts < ?',
+            (since_ts, to_epoch_ms(next_hour.isoformat()))
+        ).fetchone()
+    return int(trades + head_trades), int(wins + head_wins), pnl + head_pnl
+
+def get_trade_log_rewrites(conn):
+    """trade_log의 기존 행이 삭제 / 수정된 누적 횟수를 반환합니다. (호출하는 쪽에서 db_lock 보유)"""
+    return conn.execute('SELECT rewrites FROM trade_log_changes WHERE id = 1').fetchone()[0]
+
+def get_recent_trades(conn, limit):
+    """최근 거래 기록 limit건을 최신순으로 반환합니다. (created_ts 인덱스를 역순으로 읽음)"""
+    with db_lock:
+        return conn.execute(
+            'SELECT * FROM trade_log ORDER BY created_ts DESC LIMIT ?', (limit,)
+        ).fetchall()
+
+def record_trade_result_db(conn, trade_data):
+    """
+    거래 결과를 데이터베이스에 기록하고, 같은 트랜잭션에서 집계 테이블을 갱신합니다.
+    같은 거래(trade_key)가 이미 있으면 저장하지 않고 False를, 새로 저장했으면 True를 반환합니다.
+    """
+    created_ts = to_epoch_ms(trade_data['created_at'])
+    params = (
+        trade_data['symbol'], trade_data['side'], trade_data['entry_price'],
+        trade_data['exit_price'], trade_data['qty'], trade_data['pnl'],
+        trade_data['fee'], trade_data['created_at'], created_ts,
+        trade_key(trade_data['symbol'], trade_data['side'], created_ts, trade_data['qty'], trade_data['pnl']),
+        trade_data.get('opened_ts')
+    )
+
+    def work(write_conn):
+        inserted = write_conn.execute('''
+            INSERT INTO trade_log (symbol, side, entry_price, exit_price, qty, pnl, fee, created_at, created_ts, trade_key, opened_ts)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (trade_key) DO NOTHING
+        ''', params).rowcount
+        if inserted:
+            _add_to_rollup(
+                write_conn, trade_data['symbol'], trade_data['side'], trade_data['created_at'],
+                trade_data['pnl'], trade_data['fee']
+            )
+        return bool(inserted)
+
+    return db_writer.run(work)
@@ -0,0 +1,158 @@
+import asyncio
+import collections
+import os
+import time
+from dotenv import load_dotenv
+
+from latency_tracker import latency_tracker
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+# 서로 다른 종목의 작업을 동시에 실행할 최대 개수
+EXECUTION_MAX_PARALLEL = int(os.getenv('EXECUTION_MAX_PARALLEL', '4'))
+
+
+class ExecutionLanes:
+    """
+    종목별 실행 레인 스케줄러.
+    같은 종목의 작업(신규 / 수정 / 취소 / DCA / SL 이동)은 접수 순서대로 하나씩 실행하고,
+    다른 종목의 작업은 최대 max_parallel개까지 동시에 실행하여 서로의 지연에 영향을 주지 않게 합니다.
+    전체 청산처럼 모든 종목에 걸친 작업은 run_exclusive()로 앞선 작업이 끝난 뒤 단독으로 실행합니다.
+    """
+
+    def __init__(self, max_parallel=EXECUTION_MAX_PARALLEL):
+        self.max_parallel = max(1, max_parallel)
+        # key -> 대기 중인 작업 (seq, func, args, future, enqueued_at)
+        self._lanes = {}
+        # key -> 레인을 비우는 워커 태스크
+        self._workers = {}
+        self._semaphore = asyncio.Semaphore(self.max_parallel)
+        # 접수 순번과 아직 끝나지 않은 레인 작업 / 단독 작업의 순번
+        self._seq = 0
+        self._pending = set()
+        self._exclusive = []
+        self._gate = asyncio.Condition()
+        self._running = 0
+
+    def _next_seq(self):
+        self._seq += 1
+        return self._seq
+
+    def depth(self, key=None):
+        """key 레인(없으면 전체)에서 대기 중인 작업 수 (실행 중인 작업 제외)"""
+        if key is not None:
+            return len(self._lanes.get(key, ()))
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def _update_gauges(self):
+        latency_tracker.gauge('lane.queued', self.depth())
+        # 가장 많이 밀린 한 종목의 대기 작업 수
+        latency_tracker.gauge('lane.depth', max(map(len, self._lanes.values()), default=0))
+        latency_tracker.gauge('lane.running', self._running)
+        latency_tracker.gauge('lane.active', len(self._workers))
+
+    def submit(self, key, func, *args):
+        """
+        func(*args) 코루틴을 key 레인의 끝에 넣고 결과를 받을 Future를 반환합니다.
+        순서는 이 함수를 호출한 시점에 정해지므로, 호출 전에 await를 두지 않아야 이벤트 수신 순서가 유지됩니다.
+        """
+        future = asyncio.get_running_loop().create_future()
+        seq = self._next_seq()
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = collections.deque()
+        lane.append((seq, func, args, future, time.perf_counter()))
+        self._pending.add(seq)
+        if key not in self._workers:
+            self._workers[key] = asyncio.create_task(self._drain(key))
+        self._update_gauges()
+        return future
+
+    async def run(self, key, func, *args):
+        """key 레인에서 func(*args)를 실행하고 끝날 때까지 기다립니다."""
+        return await self.submit(key, func, *args)
+
+    async def run_exclusive(self, func, *args):
+        """앞서 접수된 모든 레인 작업이 끝난 뒤 func(*args)를 단독으로 실행합니다. 그동안 새로 접수된 작업은 대기합니다."""
+        seq = self._next_seq()
+        self._exclusive.append(seq)
+        enqueued_at = time.perf_counter()
+        try:
+            async with self._gate:
+                await self._gate.wait_for(
+                    lambda: self._exclusive[0] == seq and all(pending > seq for pending in self._pending)
+                )
+            latency_tracker.record('lane.wait', time.perf_counter() - enqueued_at)
+            return await func(*args)
+        finally:
+            self._exclusive.remove(seq)
+            async with self._gate:
+                self._gate.notify_all()
+
+    async def _wait_turn(self, seq):
+        """앞서 접수된 단독 작업이 있으면 끝날 때까지 기다립니다."""
+        if self._exclusive and self._exclusive[0] < seq:
+            async with self._gate:
+                await self._gate.wait_for(lambda: not self._exclusive or self._exclusive[0] > seq)
+
+    async def _finish(self, seq):
+        self._pending.discard(seq)
+        if self._exclusive:
+            async with self._gate:
+                self._gate.notify_all()
+
+    async def _drain(self, key):
+        lane = self._lanes[key]
+        try:
+            while lane:
+                seq, func, args, future, enqueued_at = lane.popleft()
+                try:
+                    await self._wait_turn(seq)
+                    async with self._semaphore:
+                        latency_tracker.record('lane.wait', time.perf_counter() - enqueued_at)
+                        self._running += 1
+                        self._update_gauges()
+                        try:
+                            result = await func(*args)
+                        finally:
+                            self._running -= 1
+                    if not future.done():
+                        future.set_result(result)
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                finally:
+                    await self._finish(seq)
+        finally:
+            # 취소 등으로 워커가 멈추면 남은 작업도 취소하여 기다리는 쪽이 멈추지 않게 합니다.
+            for seq, _, _, future, _ in lane:
+                self._pending.discard(seq)
+                future.cancel()
+            lane.clear()
+            del self._lanes[key]
+            del self._workers[key]
+            self._update_gauges()
+
+    async def join(self):
+        """지금까지 접수된 모든 레인 작업이 끝날 때까지 기다립니다."""
+        while self._workers:
+            await asyncio.gather(*list(self._workers.values()), return_exceptions=True)
+
+    def stats(self):
+        """레인별 대기 작업 수와 실행 중인 작업 수"""
+        return {
+            'lanes': {key: len(lane) for key, lane in self._lanes.items()},
+            'queued': self.depth(),
+            'running': self._running,
+            'max_parallel': self.max_parallel,
+        }
+
+
+# 프로세스 전체에서 공유하는 종목별 실행 레인
+execution_lanes = ExecutionLanes()
+
+__all__ = ['ExecutionLanes', 'execution_lanes', 'EXECUTION_MAX_PARALLEL']
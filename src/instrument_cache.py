@@ -0,0 +1,137 @@
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+from bybit_gateway import bybit_gateway
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+# 종목 정보 전체를 다시 불러오는 주기 (초)
+INSTRUMENT_REFRESH_INTERVAL = int(os.getenv('INSTRUMENT_REFRESH_INTERVAL', '3600'))
+
+# instruments-info 한 페이지에서 가져올 최대 종목 수 (Bybit 최대값)
+INSTRUMENT_PAGE_LIMIT = 1000
+
+
+class InstrumentNotFoundError(Exception):
+    """Bybit에 존재하지 않는 종목을 조회했을 때 발생합니다."""
+
+    def __init__(self, symbol):
+        super().__init__(f"종목 정보를 찾을 수 없습니다: {symbol}")
+        self.symbol = symbol
+
+
+class InstrumentCache:
+    """
+    linear 종목 정보(lotSizeFilter, priceFilter, leverageFilter)를 메모리에 보관하는 캐시.
+    시작 시 전체 목록을 한 번에 불러오고, 백그라운드에서 주기적으로 갱신합니다.
+    """
+
+    def __init__(self, gateway, refresh_interval=INSTRUMENT_REFRESH_INTERVAL):
+        self.gateway = gateway
+        self.refresh_interval = refresh_interval
+        self.instruments = {}
+        self.loaded_at = 0.0
+        self._refresh_task = None
+        self._listeners = []
+        # symbol -> 진행 중인 개별 조회 (동시에 들어온 조회는 결과를 함께 기다림)
+        self._inflight = {}
+
+    async def warm_up(self):
+        """
+        모든 linear 종목 정보를 페이지 단위로 불러와 캐시를 통째로 교체합니다.
+        """
+        instruments = {}
+        cursor = None
+        while True:
+            result = await self.gateway.get_instruments_info(
+                category="linear",
+                limit=INSTRUMENT_PAGE_LIMIT,
+                cursor=cursor
+            )
+            if result['retCode'] != 0:
+                raise RuntimeError(f"종목 정보 조회 실패: {result['retMsg']}")
+
+            for instrument in result['result']['list']:
+                instruments[instrument['symbol']] = instrument
+
+            cursor = result['result'].get('nextPageCursor')
+            if not cursor:
+                break
+
+        new_symbols = set(instruments) - set(self.instruments)
+        self.instruments = instruments
+        self.loaded_at = time.time()
+        print(f"✅ 종목 정보 {len(instruments)}개를 캐시에 불러왔습니다.")
+
+        for listener in self._listeners:
+            listener(instruments, new_symbols)
+        return instruments
+
+    def add_listener(self, callback):
+        """
+        전체 목록을 다시 불러올 때마다 호출될 콜백을 등록합니다.
+        콜백은 (전체 종목 dict, 새로 추가된 종목 set)을 인자로 받습니다.
+        """
+        self._listeners.append(callback)
+
+    def get(self, symbol):
+        """캐시에 있는 종목 정보를 반환합니다. (네트워크 호출 없음)"""
+        return self.instruments.get(symbol)
+
+    async def fetch(self, symbol):
+        """
+        캐시에서 종목 정보를 찾고, 없으면 해당 종목만 조회하여 캐시에 추가합니다.
+        존재하지 않는 종목이면 InstrumentNotFoundError를 발생시킵니다.
+        """
+        instrument = self.instruments.get(symbol)
+        if instrument:
+            return instrument
+
+        inflight = self._inflight.get(symbol)
+        if inflight is None:
+            inflight = self._inflight[symbol] = asyncio.ensure_future(self._fetch(symbol))
+            inflight.add_done_callback(lambda _: self._inflight.pop(symbol, None))
+        return await asyncio.shield(inflight)
+
+    async def _fetch(self, symbol):
+        result = await self.gateway.get_instruments_info(category="linear", symbol=symbol)
+        if result['retCode'] == 0 and result['result']['list']:
+            instrument = result['result']['list'][0]
+            self.instruments[symbol] = instrument
+            return instrument
+
+        raise InstrumentNotFoundError(symbol)
+
+    def invalidate(self, symbol=None):
+        """
+        주문 오류 등으로 정보가 바뀌었을 수 있는 종목을 캐시에서 제거합니다.
+        symbol을 생략하면 전체 캐시를 비웁니다.
+        """
+        if symbol is None:
+            self.instruments = {}
+            self.loaded_at = 0.0
+        else:
+            self.instruments.pop(symbol, None)
+
+    def start_background_refresh(self):
+        """주기적으로 전체 종목 정보를 다시 불러오는 백그라운드 태스크를 시작합니다."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+        return self._refresh_task
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.warm_up()
+            except Exception as e:
+                # 갱신에 실패해도 기존 캐시는 그대로 사용합니다.
+                print(f"⚠️ 종목 정보 갱신 실패: {e}")
+
+
+# 프로세스 전체에서 공유하는 종목 정보 캐시
+instrument_cache = InstrumentCache(bybit_gateway)
+
+__all__ = ['InstrumentCache', 'InstrumentNotFoundError', 'instrument_cache']
@@ -0,0 +1,137 @@
+import asyncio
+import collections
+import json
+import os
+import time
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+# 구간별 지연 시간 요약을 저장하는 파일 (제어 봇의 /latency 명령이 읽습니다)
+LATENCY_DUMP_PATH = os.getenv('LATENCY_DUMP_PATH') or os.path.join(os.getenv('GDRIVE_PATH', '.'), 'latency.json')
+# 요약 파일을 저장하는 주기 (초)
+LATENCY_DUMP_INTERVAL = float(os.getenv('LATENCY_DUMP_INTERVAL', '60'))
+# 구간별로 보관할 최근 측정값 수
+LATENCY_SAMPLE_SIZE = int(os.getenv('LATENCY_SAMPLE_SIZE', '1000'))
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_samples, pct):
+    """정렬된 측정값에서 nearest-rank 방식의 백분위수를 반환합니다."""
+    if not sorted_samples:
+        return None
+    rank = max(1, -(-len(sorted_samples) * pct // 100))
+    return sorted_samples[int(rank) - 1]
+
+
+class LatencyTracker:
+    """
+    신호 수신부터 주문 접수, DB 저장, 알림 전송까지 구간별 지연 시간을 모으는 측정기.
+    구간(stage)마다 최근 측정값을 보관하고 p50 / p95 / p99를 계산합니다.
+    """
+
+    def __init__(self, sample_size=LATENCY_SAMPLE_SIZE, dump_path=LATENCY_DUMP_PATH):
+        self.sample_size = sample_size
+        self.dump_path = dump_path
+        # stage -> 최근 측정값 (초)
+        self._samples = {}
+        # stage -> 전체 측정 횟수
+        self._counts = collections.Counter()
+        # name -> {'value': 현재값, 'max': 최대값} (큐 길이처럼 시간이 아닌 값)
+        self._gauges = {}
+        self._dump_task = None
+
+    def record(self, stage, seconds):
+        samples = self._samples.get(stage)
+        if samples is None:
+            samples = self._samples[stage] = collections.deque(maxlen=self.sample_size)
+        samples.append(seconds)
+        self._counts[stage] += 1
+
+    @contextmanager
+    def span(self, stage):
+        """with 블록의 실행 시간을 stage 구간으로 기록합니다. (async 코드 안에서도 사용 가능)"""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started_at)
+
+    def gauge(self, name, value):
+        """큐 길이 등 현재 값을 기록합니다. (현재값과 지금까지의 최대값을 보관)"""
+        current = self._gauges.get(name)
+        if current is None:
+            current = self._gauges[name] = {'value': value, 'max': value}
+        current['value'] = value
+        current['max'] = max(current['max'], value)
+
+    def gauges(self):
+        """게이지별 {value, max}를 반환합니다."""
+        return {name: dict(values) for name, values in sorted(self._gauges.items())}
+
+    def summary(self):
+        """구간별 {count, p50, p95, p99, max} (밀리초)를 반환합니다."""
+        result = {}
+        for stage, samples in sorted(self._samples.items()):
+            ordered = sorted(samples)
+            stats = {'count': self._counts[stage]}
+            for pct in PERCENTILES:
+                stats[f'p{pct}'] = round(percentile(ordered, pct) * 1000, 2)
+            stats['max'] = round(ordered[-1] * 1000, 2)
+            result[stage] = stats
+        return result
+
+    def dump(self, path=None):
+        """요약을 JSON 파일로 저장합니다."""
+        path = path or self.dump_path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'dumped_at': time.time(), 'stages': self.summary(), 'gauges': self.gauges()}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def start_periodic_dump(self, interval=LATENCY_DUMP_INTERVAL):
+        if self._dump_task is None or self._dump_task.done():
+            self._dump_task = asyncio.create_task(self._dump_loop(interval))
+
+    async def _dump_loop(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.dump()
+            except OSError as e:
+                print(f"⚠️ 지연 시간 요약 저장 실패: {e}")
+
+
+def load_dump(path=LATENCY_DUMP_PATH):
+    """저장된 요약 파일을 읽습니다. 없으면 None을 반환합니다."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def format_summary(stages):
+    """구간별 요약을 텔레그램 메시지용 표로 만듭니다."""
+    lines = ["stage | n | p50 | p95 | p99 | max (ms)"]
+    for stage, stats in stages.items():
+        lines.append(f"{stage} | {stats['count']} | {stats['p50']} | {stats['p95']} | {stats['p99']} | {stats['max']}")
+    return "\n".join(lines)
+
+
+def format_gauges(gauges):
+    """게이지 요약을 텔레그램 메시지용 표로 만듭니다."""
+    lines = ["gauge | now | max"]
+    for name, values in gauges.items():
+        lines.append(f"{name} | {values['value']} | {values['max']}")
+    return "\n".join(lines)
+
+
+# 프로세스 전체에서 공유하는 지연 시간 측정기
+latency_tracker = LatencyTracker()
+
+__all__ = ['LatencyTracker', 'latency_tracker', 'load_dump', 'format_summary', 'format_gauges', 'percentile']
@@ -0,0 +1,114 @@
+import asyncio
+from pybit.exceptions import InvalidRequestError
+from bybit_gateway import bybit_gateway
+from instrument_cache import instrument_cache
+from private_stream import private_stream
+from utils import MESSAGES
+
+# Bybit: 요청한 레버리지가 현재 값과 같을 때의 오류 코드
+LEVERAGE_NOT_MODIFIED = 110043
+
+
+class LeverageCache:
+    """
+    종목별 현재 레버리지 캐시.
+    시작 시 전체 포지션 조회로 채우고, set_leverage 성공과 position 토픽으로 갱신합니다.
+    요청 레버리지는 종목 정보의 최대 레버리지로 먼저 제한하므로,
+    캐시된 값과 같으면 주문 시 레버리지 관련 호출이 전혀 없습니다.
+    """
+
+    def __init__(self, gateway, instruments, stream):
+        self.gateway = gateway
+        self.instruments = instruments
+        # symbol -> 현재 레버리지
+        self.leverage = {}
+        # symbol -> 진행 중인 레버리지 조회
+        self._inflight = {}
+
+        stream.add_handler('position', self._on_position_message)
+
+    def apply_positions(self, positions):
+        for position in positions:
+            if position.get('leverage'):
+                self.leverage[position['symbol']] = float(position['leverage'])
+
+    def _on_position_message(self, message):
+        self.apply_positions(position for position in message.get('data', []) if position.get('category', 'linear') == 'linear')
+
+    async def load(self):
+        """USDT 무기한 포지션 전체(모든 페이지)의 레버리지를 불러옵니다."""
+        positions_info = await self.gateway.get_all_positions(category="linear", settleCoin="USDT")
+        if positions_info['retCode'] != 0:
+            raise RuntimeError(f"포지션 조회 실패: {positions_info['retMsg']}")
+        self.apply_positions(positions_info['result']['list'])
+        print(f"✅ 레버리지 {len(self.leverage)}개 종목을 캐시에 불러왔습니다.")
+
+    async def _fetch(self, symbol):
+        positions_info = await self.gateway.get_positions(category="linear", symbol=symbol)
+        if positions_info['retCode'] == 0:
+            self.apply_positions(positions_info['result']['list'])
+        return self.leverage.get(symbol)
+
+    async def current(self, symbol):
+        """
+        종목의 현재 레버리지를 반환합니다. 캐시에 없을 때만 조회하며 (포지션을 연 적이 없는 종목 등),
+        같은 종목의 동시 조회는 진행 중인 하나의 호출 결과를 함께 기다립니다.
+        """
+        current_leverage = self.leverage.get(symbol)
+        if current_leverage is not None:
+            return current_leverage
+
+        inflight = self._inflight.get(symbol)
+        if inflight is None:
+            inflight = self._inflight[symbol] = asyncio.ensure_future(self._fetch(symbol))
+            inflight.add_done_callback(lambda _: self._inflight.pop(symbol, None))
+        return await asyncio.shield(inflight)
+
+    async def clamp(self, symbol, leverage):
+        """
+        요청 레버리지를 종목 정보(캐시)의 최대 레버리지로 제한한 값을 반환합니다. (API 호출 없음)
+        주문 수량은 실제 적용될 레버리지로 계산해야 하므로 수량 계산 전에 사용합니다.
+        """
+        instrument = await self.instruments.fetch(symbol)
+        max_leverage = float(instrument['leverageFilter']['maxLeverage'])
+        if float(leverage) > max_leverage:
+            print(MESSAGES['leverage_exceeded_warning'].format(
+                requested_leverage=int(float(leverage)),
+                max_leverage=instrument['leverageFilter']['maxLeverage']
+            ))
+            return max_leverage
+        return leverage
+
+    async def ensure(self, symbol, leverage):
+        """
+        종목의 레버리지를 leverage로 맞추고 실제 적용된 레버리지를 반환합니다.
+        최대 레버리지를 넘으면 최대값으로 제한하며, 현재 값과 같으면 API를 호출하지 않습니다.
+        """
+        leverage = await self.clamp(symbol, leverage)
+
+        # 포지션을 연 적이 없는 종목은 시작 시 목록에 없으므로 한 번만 조회합니다. (신호 선조회가 시작했으면 그 결과 사용)
+        current_leverage = await self.current(symbol)
+        if current_leverage == float(leverage):
+            print("ℹ️ 레버리지가 이미 설정된 값과 동일합니다. 변경을 건너뜁니다.")
+            return leverage
+
+        try:
+            await self.gateway.set_leverage(
+                category="linear",
+                symbol=symbol,
+                buyLeverage=str(leverage),
+                sellLeverage=str(leverage)
+            )
+        except InvalidRequestError as e:
+            # 캐시가 오래되어 이미 같은 값이었던 경우
+            if e.status_code != LEVERAGE_NOT_MODIFIED:
+                self.leverage.pop(symbol, None)
+                raise
+        self.leverage[symbol] = float(leverage)
+        return leverage
+
+
+# 프로세스 전체에서 공유하는 레버리지 캐시
+leverage_cache = LeverageCache(bybit_gateway, instrument_cache, private_stream)
+
+__all__ = ['LeverageCache', 'leverage_cache']
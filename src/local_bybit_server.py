@@ -0,0 +1,437 @@
+"""
+로컬 Bybit V5 대역 서버.
+네트워크 없이 REST API(주문 / 포지션 / 시세 / 잔고)와 비공개 WebSocket 스트림(position / execution 등)을
+흉내 내어 trade_executor, position_tracker 등의 동작을 시험하고 주문 경로를 부하 측정할 때 사용합니다.
+REST 요청은 SimulatedExchange가 처리하며, 지연 시간 / 호출 한도(10006) / 오류 코드를 주입할 수 있습니다.
+
+실행 예:
+    python local_bybit_server.py --port 8765 --symbols BTCUSDT,ETHUSDT --prices BTCUSDT=65000
+    python local_bybit_server.py --latency 0.05 --jitter 0.02 --rate-limit 10 --error /v5/order/create=110007:0.1
+    BYBIT_BASE_URL=http://127.0.0.1:8765 BYBIT_WS_PRIVATE_URL=ws://127.0.0.1:8765/v5/private python main.py
+
+지원하는 REST 경로:
+    GET  /v5/market/tickers, /v5/market/instruments-info, /v5/account/wallet-balance,
+         /v5/position/list, /v5/position/closed-pnl, /v5/order/realtime
+    POST /v5/order/create, /v5/order/cancel, /v5/order/cancel-all, /v5/order/create-batch,
+         /v5/order/cancel-batch, /v5/position/set-leverage, /v5/position/trading-stop
+    POST /sim/price {"symbol": "BTCUSDT", "price": 66000}  (시뮬레이션 가격 변경, TP / SL 체결)
+    GET  /sim/state                                        (가상 거래소 상태 조회)
+
+재생 파일은 한 줄에 하나의 JSON 객체이며, 클라이언트가 해당 토픽을 구독한 뒤 순서대로 전송됩니다.
+    {"delay": 0.5, "topic": "position", "data": [{"symbol": "BTCUSDT", "size": "0.01", ...}]}
+"""
+import argparse
+import asyncio
+import base64
+import collections
+import hashlib
+import json
+import random
+import struct
+import time
+import uuid
+from urllib.parse import parse_qs, urlsplit
+from pybit.exceptions import InvalidRequestError
+from simulated_exchange import SimulatedExchange
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+# (HTTP 메서드, 경로) -> SimulatedExchange 메서드
+REST_ROUTES = {
+    ('GET', '/v5/market/tickers'): 'get_tickers',
+    ('GET', '/v5/market/instruments-info'): 'get_instruments_info',
+    ('GET', '/v5/account/wallet-balance'): 'get_wallet_balance',
+    ('GET', '/v5/position/list'): 'get_positions',
+    ('GET', '/v5/position/closed-pnl'): 'get_closed_pnl',
+    ('GET', '/v5/order/realtime'): 'get_open_orders',
+    ('POST', '/v5/order/create'): 'place_order',
+    ('POST', '/v5/order/cancel'): 'cancel_order',
+    ('POST', '/v5/order/cancel-all'): 'cancel_all_orders',
+    ('POST', '/v5/order/create-batch'): 'place_batch_order',
+    ('POST', '/v5/order/cancel-batch'): 'cancel_batch_order',
+    ('POST', '/v5/position/set-leverage'): 'set_leverage',
+    ('POST', '/v5/position/trading-stop'): 'set_trading_stop',
+}
+
+# 쿼리 문자열에서 정수로 변환할 파라미터
+INT_PARAMS = ('limit', 'startTime', 'endTime')
+
+# 주입할 수 있는 오류 코드의 기본 메시지
+ERROR_MESSAGES = {
+    10001: "params error",
+    10002: "invalid request, please check your server timestamp or recv_window param",
+    10006: "Too many visits!",
+    10016: "Internal server error",
+    110001: "order not exists or too late to cancel",
+    110007: "ab not enough for new order",
+    110043: "leverage not modified",
+}
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found'}
+
+
+async def read_frame(reader):
+    """클라이언트가 보낸 WebSocket 프레임 하나를 읽어 (opcode, payload)를 반환합니다."""
+    header = await reader.readexactly(2)
+    opcode = header[0] & 0x0F
+    masked = header[1] & 0x80
+    length = header[1] & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', await reader.readexactly(8))[0]
+    mask = await reader.readexactly(4) if masked else b''
+    payload = await reader.readexactly(length)
+    if masked:
+        payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    return opcode, payload
+
+
+def encode_frame(opcode, payload):
+    """서버에서 보내는 (마스킹 없는) WebSocket 프레임을 만듭니다."""
+    header = bytes([0x80 | opcode])
+    length = len(payload)
+    if length < 126:
+        header += bytes([length])
+    elif length < 1 << 16:
+        header += bytes([126]) + struct.pack('!H', length)
+    else:
+        header += bytes([127]) + struct.pack('!Q', length)
+    return header + payload
+
+
+def load_replay(path):
+    """재생 파일(JSONL)을 읽어 프레임 목록을 반환합니다."""
+    if not path:
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def parse_request_head(head):
+    """HTTP 요청 헤더 블록을 (메서드, 대상 경로, 헤더 dict)로 나눕니다."""
+    lines = head.decode('latin-1').split('\r\n')
+    method, target = lines[0].split(' ')[:2]
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            key, value = line.split(':', 1)
+            headers[key.strip().lower()] = value.strip()
+    return method, target, headers
+
+
+def encode_http_response(status, body, headers=None):
+    payload = json.dumps(body).encode('utf-8')
+    lines = [
+        f"HTTP/1.1 {status} {HTTP_REASONS.get(status, 'OK')}",
+        'Content-Type: application/json',
+        f"Content-Length: {len(payload)}",
+        'Connection: keep-alive',
+    ]
+    lines += [f"{key}: {value}" for key, value in (headers or {}).items()]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload
+
+
+def parse_error_spec(spec):
+    """'--error 경로=코드[:확률]' 값을 (경로, 코드, 확률)로 바꿉니다."""
+    path, _, rule = spec.partition('=')
+    code, _, rate = rule.partition(':')
+    return path, int(code), float(rate or 1.0)
+
+
+class FaultInjector:
+    """
+    REST 응답에 지연 시간, 호출 한도 초과(10006), 지정한 오류 코드를 주입합니다.
+    - latency / jitter: 모든 요청에 latency + [0, jitter) 초의 지연
+    - rate_limit: 경로별 1초당 허용 요청 수 (0이면 제한 없음)
+    - errors: 경로 -> [(오류 코드, 발생 확률)]
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, rate_limit=0, errors=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.errors = errors or {}
+        self._random = random.Random(seed)
+        # 경로 -> 최근 1초간 요청 시각
+        self._request_times = collections.defaultdict(collections.deque)
+
+    def delay(self):
+        return self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def limit_status(self, path):
+        """
+        경로의 호출 한도 상태를 (남은 횟수, 초기화 시각 ms)로 반환하고 이번 요청을 기록합니다.
+        한도를 넘었으면 남은 횟수가 -1입니다.
+        """
+        if not self.rate_limit:
+            return None, None
+        now = time.monotonic()
+        times = self._request_times[path]
+        while times and now - times[0] >= 1.0:
+            times.popleft()
+        reset_at = int((time.time() + (1.0 - (now - times[0]) if times else 1.0)) * 1000)
+        if len(times) >= self.rate_limit:
+            return -1, reset_at
+        times.append(now)
+        return self.rate_limit - len(times), reset_at
+
+    def pick_error(self, path):
+        for code, rate in self.errors.get(path, []):
+            if self._random.random() < rate:
+                return code
+        return None
+
+
+class WebSocketSession:
+    """접속한 클라이언트 하나에 대한 WebSocket 세션"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.topics = set()
+        self.closed = False
+
+    async def send_json(self, message):
+        if self.closed:
+            return
+        self.writer.write(encode_frame(OPCODE_TEXT, json.dumps(message).encode('utf-8')))
+        await self.writer.drain()
+
+    async def send_topic(self, topic, data):
+        """구독 중인 토픽이면 Bybit 형식의 푸시 메시지를 전송합니다."""
+        if topic not in self.topics:
+            return
+        await self.send_json({
+            'id': uuid.uuid4().hex,
+            'topic': topic,
+            'creationTime': int(time.time() * 1000),
+            'data': data
+        })
+
+
+class LocalBybitServer:
+    """
+    Bybit V5 REST API 일부와 비공개 WebSocket의 auth / subscribe / ping 규약을 흉내 내는 로컬 서버.
+    REST 요청은 가상 거래소가 처리하고, 포지션이 바뀌면 구독 중인 세션에 position 토픽으로 알립니다.
+    구독이 들어오면 재생 파일의 프레임을 지연 시간에 맞춰 전송합니다.
+    """
+
+    def __init__(self, replay_frames=None, exchange=None, faults=None):
+        self.replay_frames = replay_frames or []
+        self.exchange = exchange or SimulatedExchange([])
+        self.faults = faults or FaultInjector()
+        self.sessions = set()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            # 한 연결에서 여러 요청을 처리합니다. (keep-alive)
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                method, target, headers = parse_request_head(head)
+                if headers.get('upgrade', '').lower() == 'websocket':
+                    await self.handle_websocket(headers, reader, writer)
+                    return
+                body = await reader.readexactly(int(headers.get('content-length') or 0))
+                status, response_headers, response = await self.handle_http(method, target, body)
+                writer.write(encode_http_response(status, response, response_headers))
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_http(self, method, target, body):
+        """REST 요청 하나를 처리하여 (HTTP 상태 코드, 응답 헤더, 응답 본문)을 반환합니다."""
+        url = urlsplit(target)
+        path = url.path
+        if method == 'GET':
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            for key in INT_PARAMS:
+                if key in params:
+                    params[key] = int(params[key])
+        else:
+            try:
+                params = json.loads(body or b'{}')
+            except json.JSONDecodeError:
+                return 400, {}, self.error_body(10001, "params error: invalid JSON")
+
+        if path.startswith('/sim/'):
+            return await self.handle_control(method, path, params)
+
+        method_name = REST_ROUTES.get((method, path))
+        if method_name is None:
+            return 404, {}, {'retCode': 404, 'retMsg': f"unknown path {path}"}
+
+        delay = self.faults.delay()
+        if delay:
+            await asyncio.sleep(delay)
+
+        remaining, reset_at = self.faults.limit_status(path)
+        headers = {}
+        if remaining is not None:
+            headers = {
+                'X-Bapi-Limit': self.faults.rate_limit,
+                'X-Bapi-Limit-Status': max(remaining, 0),
+                'X-Bapi-Limit-Reset-Timestamp': reset_at,
+            }
+            if remaining < 0:
+                return 200, headers, self.error_body(10006)
+
+        error_code = self.faults.pick_error(path)
+        if error_code is not None:
+            return 200, headers, self.error_body(error_code)
+
+        try:
+            response = getattr(self.exchange, method_name)(**params)
+        except InvalidRequestError as e:
+            return 200, headers, self.error_body(e.status_code, e.message)
+        except TypeError as e:
+            # 필수 파라미터 누락 등
+            return 200, headers, self.error_body(10001, f"params error: {e}")
+
+        if method == 'POST':
+            await self.broadcast_positions(self.touched_symbols(params))
+        return 200, headers, response
+
+    async def handle_control(self, method, path, params):
+        """시뮬레이션 제어용 경로 (/sim/price, /sim/state)"""
+        if method == 'POST' and path == '/sim/price':
+            self.exchange.set_price(params['symbol'], float(params['price']))
+            await self.broadcast_positions({params['symbol']})
+            return 200, {}, {'retCode': 0, 'retMsg': 'OK', 'result': {}}
+        if method == 'GET' and path == '/sim/state':
+            return 200, {}, {'retCode': 0, 'retMsg': 'OK', 'result': self.exchange.state()}
+        return 404, {}, {'retCode': 404, 'retMsg': f"unknown path {path}"}
+
+    @staticmethod
+    def error_body(code, message=None):
+        return {
+            'retCode': code, 'retMsg': message or ERROR_MESSAGES.get(code, 'error'),
+            'result': {}, 'retExtInfo': {}, 'time': int(time.time() * 1000)
+        }
+
+    @staticmethod
+    def touched_symbols(params):
+        symbols = {params['symbol']} if params.get('symbol') else set()
+        symbols.update(item['symbol'] for item in params.get('request', []) if item.get('symbol'))
+        return symbols
+
+    async def broadcast_positions(self, symbols):
+        """포지션이 바뀌었을 수 있는 종목을 position 토픽으로, 잔고를 wallet 토픽으로 전송합니다."""
+        if not self.sessions:
+            return
+        data = [self.exchange.position_view(symbol) for symbol in symbols if symbol in self.exchange.instruments]
+        if data:
+            await self.broadcast('position', data)
+            await self.broadcast('wallet', [self.exchange.wallet_view()])
+
+    async def handle_websocket(self, headers, reader, writer):
+        accept = base64.b64encode(
+            hashlib.sha1((headers.get('sec-websocket-key', '') + WEBSOCKET_GUID).encode()).digest()
+        ).decode()
+        writer.write(
+            b'HTTP/1.1 101 Switching Protocols\r\n'
+            b'Upgrade: websocket\r\n'
+            b'Connection: Upgrade\r\n'
+            b'Sec-WebSocket-Accept: ' + accept.encode() + b'\r\n\r\n'
+        )
+        await writer.drain()
+
+        session = WebSocketSession(reader, writer)
+        self.sessions.add(session)
+        replay_task = None
+        try:
+            while True:
+                opcode, payload = await read_frame(reader)
+                if opcode == OPCODE_CLOSE:
+                    writer.write(encode_frame(OPCODE_CLOSE, payload[:2]))
+                    break
+                if opcode == OPCODE_PING:
+                    writer.write(encode_frame(OPCODE_PONG, payload))
+                    continue
+                if opcode != OPCODE_TEXT:
+                    continue
+
+                message = json.loads(payload)
+                op = message.get('op')
+                if op == 'auth':
+                    await session.send_json({'success': True, 'ret_msg': '', 'op': 'auth', 'conn_id': uuid.uuid4().hex})
+                elif op == 'subscribe':
+                    session.topics.update(message.get('args', []))
+                    await session.send_json({
+                        'success': True, 'ret_msg': '', 'op': 'subscribe',
+                        'req_id': message.get('req_id'), 'conn_id': uuid.uuid4().hex
+                    })
+                    if replay_task is None and self.replay_frames:
+                        replay_task = asyncio.create_task(self.replay(session))
+                elif op == 'ping':
+                    await session.send_json({'success': True, 'ret_msg': 'pong', 'op': 'pong', 'conn_id': uuid.uuid4().hex})
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            session.closed = True
+            self.sessions.discard(session)
+            if replay_task:
+                replay_task.cancel()
+            writer.close()
+
+    async def replay(self, session):
+        """재생 파일의 프레임을 순서대로 전송합니다."""
+        # 클라이언트가 나머지 토픽을 구독할 시간을 줍니다.
+        await asyncio.sleep(0.2)
+        for frame in self.replay_frames:
+            await asyncio.sleep(frame.get('delay', 0))
+            await session.send_topic(frame['topic'], frame['data'])
+
+    async def broadcast(self, topic, data):
+        """접속 중인 모든 세션에 토픽 메시지를 전송합니다."""
+        for session in list(self.sessions):
+            await session.send_topic(topic, data)
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"✅ 로컬 Bybit 대역 서버 시작: http://{host}:{port} (WebSocket: ws://{host}:{port}/v5/private)")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 Bybit V5 대역 서버")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--replay', help="재생할 스트림 프레임 파일 (JSONL)")
+    parser.add_argument('--symbols', type=lambda value: value.split(','), default=['BTCUSDT', 'ETHUSDT'], help="거래 가능 종목 (쉼표 구분)")
+    parser.add_argument('--prices', type=lambda value: value.split(','), default=[], help="시작 가격 (예: BTCUSDT=65000,ETHUSDT=3000)")
+    parser.add_argument('--balance', type=float, default=10000.0, help="가상 계좌 USDT 잔고")
+    parser.add_argument('--latency', type=float, default=0.0, help="REST 응답 지연 시간 (초)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="지연 시간에 더할 최대 무작위 값 (초)")
+    parser.add_argument('--rate-limit', type=int, default=0, help="경로별 1초당 허용 요청 수, 초과 시 10006 응답 (0이면 제한 없음)")
+    parser.add_argument('--error', action='append', default=[], help="오류 주입 (예: /v5/order/create=110007:0.1, 여러 번 지정 가능)")
+    parser.add_argument('--seed', type=int, help="오류 / 지연 무작위 값의 시드")
+    args = parser.parse_args()
+
+    prices = {symbol: float(price) for symbol, price in (item.split('=') for item in args.prices)}
+    errors = collections.defaultdict(list)
+    for spec in args.error:
+        path, code, rate = parse_error_spec(spec)
+        errors[path].append((code, rate))
+
+    exchange = SimulatedExchange(set(args.symbols) | set(prices), prices=prices, balance=args.balance)
+    faults = FaultInjector(args.latency, args.jitter, args.rate_limit, errors, args.seed)
+    server = LocalBybitServer(load_replay(args.replay), exchange, faults)
+    asyncio.run(server.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,81 +1,170 @@
 import asyncio
+import time
 from datetime import datetime
 from telethon import events
 import telegram
 import os
 
-from api_clients import client, bybit_client, bybit_bot, TARGET_CHANNEL_ID, TEST_CHANNEL_ID, TELE_BYBIT_LOG_CHAT_ID
-from message_parser import parse_telegram_message, parse_cancel_message, parse_dca_message, parse_close_all_positions 
+from api_clients import client, bybit_bot, TARGET_CHANNEL_ID, TEST_CHANNEL_ID, TELE_BYBIT_LOG_CHAT_ID
+from bybit_gateway import bybit_gateway
+from instrument_cache import instrument_cache
+from symbol_resolver import symbol_resolver
+from position_tracker import position_tracker
+from account_state import account_state
+from leverage_cache import leverage_cache
+from ticker_cache import ticker_cache
+from message_parser import parse_telegram_message, classify_message
 from portfolio_manager import generate_report
-from trade_executor import close_all_positions, execute_bybit_order, monitored_trade_ids, bybit_client, cancel_bybit_order, update_stop_loss_to_value, place_dca_order
+from trade_executor import close_all_positions, execute_bybit_order, monitored_trade_ids, cancel_bybit_order, update_stop_loss_to_value, place_dca_order, record_trade_result_on_close, spawn_background_task
 from utils import MESSAGES, log_error_and_send_message
-from database_manager import setup_database, get_active_orders, get_db_connection
+from order_store import order_store
+from notifier import notifier
+from latency_tracker import latency_tracker
+from execution_lanes import execution_lanes
+from prefetch import signal_prefetcher
+from database_manager import setup_database, get_db_connection, start_snapshots, close_database
+from bot import start_control_bot, stop_control_bot
 
-# 메시지 ID와 주문 정보를 매핑할 전역 딕셔너리
-active_orders = {}
+# 제어 봇(bot.py)을 이 프로세스의 이벤트 루프에서 함께 실행할지 여부 (false면 bot.py를 따로 실행)
+CONTROL_BOT_ENABLED = os.getenv('CONTROL_BOT_ENABLED', 'true').lower() == 'true'
 
 # -----------------
 # 텔레그램 메시지 이벤트 핸들러 (Telethon 클라이언트)
 # -----------------
+def record_delivery_delay(event):
+    """채널에 게시된 시각(서버 타임스탬프)부터 이 프로세스가 이벤트를 받기까지의 지연을 기록합니다."""
+    if event.message.date:
+        latency_tracker.record('telegram.delivery', max(0.0, time.time() - event.message.date.timestamp()))
+
+def lane_key(symbol):
+    """채널 종목명을 Bybit 종목명으로 바꿔 실행 레인을 정합니다. (PEPEUSDT 신호와 1000PEPEUSDT 주문이 같은 레인을 쓰도록)"""
+    resolved = symbol_resolver.cached(symbol)
+    return resolved[0] if resolved else symbol
+
+async def run_in_order_lane(original_msg_id, func, *args):
+    """원본 신호로 접수된 주문의 종목 레인에서 func를 실행합니다. 주문을 모르면 레인 없이 바로 실행합니다."""
+    order_info = order_store.get(original_msg_id)
+    if order_info is None:
+        return await func(*args)
+    return await execution_lanes.run(lane_key(order_info['symbol']), func, *args)
+
+async def open_signal_order(db_conn, order_info, message_id):
+    """
+    신규 신호의 주문을 실행합니다. 종목 레인 안에서 실행되므로
+    같은 종목의 신호가 연달아 와도 중복 확인과 주문 접수가 겹치지 않습니다.
+    """
+    # 같은 종목 / 방향의 미청산 주문 확인 (메모리 인덱스 조회)
+    with latency_tracker.span('order.duplicate_check'):
+        existing_order = order_store.find_open(order_info['symbol'], order_info['side'])
+
+    if existing_order:
+        print(MESSAGES['duplicate_order_warning'].format(symbol=order_info['symbol']))
+        log_error_and_send_message(
+            MESSAGES['duplicate_order_reason'],
+            chat_id=TELE_BYBIT_LOG_CHAT_ID
+        )
+        return
+
+    await execute_bybit_order(db_conn, order_info, message_id)
+
+async def apply_dca_update(db_conn, original_msg_id, dca_price, new_sl):
+    """DCA 메시지의 새 SL을 반영하고 추가 진입 주문을 넣습니다."""
+    if original_msg_id in order_store:
+        order_info = order_store.get(original_msg_id)
+        print(MESSAGES['dca_sl_message_detected'].format(symbol=order_info['symbol']))
+        await update_stop_loss_to_value(
+            order_info['symbol'],
+            order_info['side'],
+            order_info['positionIdx'],
+            new_sl
+        )
+        await place_dca_order(db_conn, order_info, dca_price)
+    else:
+        log_error_and_send_message(
+            MESSAGES['order_not_found_message'].format(original_msg_id=original_msg_id),
+            chat_id=TELE_BYBIT_LOG_CHAT_ID
+        )
+
 async def my_event_handler(event, db_conn):
-    
+    """대상 채널의 새 메시지 (일반 / 답장 모두) 하나당 한 번 호출되는 디스패처"""
+    await dispatch_channel_message(event, db_conn, TARGET_CHANNEL_ID)
+
+
+async def dispatch_channel_message(event, db_conn, channel_id):
+    """
+    메시지를 한 번만 분류하여 (전체 청산 / 취소 / DCA / SL 이동 / 신규 신호 / 리포트 / 무시)
+    정확히 하나의 작업으로 보냅니다.
+    """
+    received_at = time.perf_counter()
     message_text = event.message.message
+    # 신호처럼 보이면 파싱 / 중복 확인과 동시에 주문에 필요한 시세 / 종목 정보 / 레버리지 / 잔고를 미리 불러옵니다.
+    prefetch = None if event.is_reply else signal_prefetcher.start(message_text)
+    record_delivery_delay(event)
     print(f"\n{MESSAGES['new_message_detected']}\n{message_text}")
 
-    # ✅ 추가: 'Close all positions' 메시지 감지
-    if parse_close_all_positions(message_text):
-        await close_all_positions(db_conn)
+    with latency_tracker.span('parse.classify'):
+        kind, payload = classify_message(message_text, event.is_reply)
+    if prefetch is not None and kind != 'signal':
+        prefetch.cancel()
+
+    if kind == 'close_all':
+        # 앞서 접수된 종목별 작업이 끝난 뒤 단독으로 실행
+        await execution_lanes.run_exclusive(close_all_positions, db_conn)
         return # 모든 포지션 청산 후 종료
 
     if event.is_reply:
-        print(MESSAGES['reply_message_warning'])
-        return
-    
-    symbol_to_cancel = parse_cancel_message(message_text)
-    if symbol_to_cancel:
-        await cancel_bybit_order(db_conn, symbol_to_cancel)
+        original_msg_id = event.reply_to_msg_id
+        if kind == 'dca':
+            dca_price, new_sl = payload
+            await run_in_order_lane(original_msg_id, apply_dca_update, db_conn, original_msg_id, dca_price, new_sl)
+        elif kind == 'movesl':
+            await run_in_order_lane(original_msg_id, handle_movesl_command, db_conn, original_msg_id, payload)
+        elif kind == 'cancel':
+            await handle_cancel_reply(db_conn, channel_id, original_msg_id)
+        else:
+            print(MESSAGES['reply_message_warning'])
         return
-    
-    order_info = parse_telegram_message(message_text)
-    
-    if order_info:
-        # DB에서 최신 활성 주문 정보 불러오기
-        current_active_orders = get_active_orders(db_conn)
-        existing_order = next((v for v in current_active_orders.values() if v['symbol'] == order_info['symbol'] and v['side'] == order_info['side'] and not v['filled']), None)
 
-        if existing_order:
-            print(MESSAGES['duplicate_order_warning'].format(symbol=order_info['symbol']))
-            log_error_and_send_message(
-                MESSAGES['duplicate_order_reason'],
-                chat_id=TELE_BYBIT_LOG_CHAT_ID
-            )
-            return
-
-        execute_bybit_order(db_conn, order_info, event.id)
+    if kind == 'cancel':
+        await execution_lanes.run(lane_key(payload), cancel_bybit_order, db_conn, payload)
+    elif kind == 'signal':
+        await execution_lanes.run(lane_key(payload['symbol']), open_signal_order, db_conn, payload, event.id)
+        # 이벤트 수신부터 주문 처리 완료까지 (텔레그램 지연 제외)
+        latency_tracker.record('signal.receipt_to_done', time.perf_counter() - received_at)
+    elif kind == 'report' and channel_id == TEST_CHANNEL_ID:
+        # ✅ 'PF' 메시지: 포트폴리오 리포트 전송 (테스트 채널 전용)
+        report = generate_report(db_conn, period=payload)
+        notifier.send(
+            chat_id=TEST_CHANNEL_ID,
+            text=report,
+            parse_mode='Markdown'
+        )
+        return
 
     now = datetime.now()
     print("Target spoke", "time:", now.date(), now.time())
 
 
 async def handle_edited_message(event, db_conn):
+    # 수정 전 주문의 종목 레인에서 실행하여 같은 종목의 취소 / DCA 등과 순서를 지킵니다.
+    await run_in_order_lane(event.id, apply_edited_message, event, db_conn)
+
+async def apply_edited_message(event, db_conn):
     message_id = event.id
     message_text = event.message.message
     print(f"\n{MESSAGES['edited_message_detected']}\n{message_text}")
 
-    # DB에서 최신 활성 주문 정보 불러오기
-    current_active_orders = get_active_orders(db_conn)
-
-    if message_id not in current_active_orders:
+    if message_id not in order_store:
         return
     
-    if current_active_orders[message_id]['original_message'] == message_text:
+    if order_store.get(message_id)['original_message'] == message_text:
         print("⚠️ 메시지 내용이 변경되지 않았으므로 주문 수정 작업을 건너뛰겠습니다.")
         return
 
     print(MESSAGES['edited_message_alert'].format(message_id=message_id))
     
     try:
-        existing_order_info = current_active_orders.pop(message_id, None)
+        existing_order_info = order_store.get(message_id)
         
         if not existing_order_info:
             print(MESSAGES['order_info_not_found_error'].format(message_id=message_id))
@@ -84,7 +173,7 @@ async def handle_edited_message(event, db_conn):
         bybit_order_id = existing_order_info['orderId']
         symbol_to_cancel = existing_order_info['symbol']
 
-        cancel_result = bybit_client.cancel_order(
+        cancel_result = await bybit_gateway.cancel_order(
             category="linear",
             symbol=symbol_to_cancel,
             orderId=bybit_order_id
@@ -96,7 +185,7 @@ async def handle_edited_message(event, db_conn):
             updated_order_info = parse_telegram_message(event.message.message)
             if updated_order_info:
                 print(MESSAGES['new_order_from_edit'])
-                execute_bybit_order(db_conn, updated_order_info, message_id)
+                await execute_bybit_order(db_conn, updated_order_info, message_id)
             else:
                 print(MESSAGES['edit_parsing_fail'])
                 log_error_and_send_message(
@@ -116,56 +205,23 @@ async def handle_edited_message(event, db_conn):
             exc=e
         )
 
-async def handle_dca_and_sl_update(event, db_conn):
-    message_text = event.message.message.lower().replace(" ", "")
-    original_msg_id = event.reply_to_msg_id
-    
-    # DB에서 최신 활성 주문 정보 불러오기
-    current_active_orders = get_active_orders(db_conn)
-
-    dca_price, new_sl = parse_dca_message(event.message.message)
-    if dca_price and new_sl:
-        if original_msg_id in current_active_orders:
-            order_info = current_active_orders[original_msg_id]
-            print(MESSAGES['dca_sl_message_detected'].format(symbol=order_info['symbol']))
-            await update_stop_loss_to_value(
-                order_info['symbol'],
-                order_info['side'],
-                order_info['positionIdx'],
-                new_sl
-            )
-            place_dca_order(db_conn, order_info, dca_price)
-        else:
-            log_error_and_send_message(
-                MESSAGES['order_not_found_message'].format(original_msg_id=original_msg_id),
-                chat_id=TELE_BYBIT_LOG_CHAT_ID
-            )
-        return
-
-    # ✅ 수정된 로직: 'movesl' 키워드를 정확히 파싱합니다.
-    if 'movesl=entry' in message_text:
-        await handle_movesl_command(db_conn, original_msg_id, 'entry')
-
 
 async def handle_movesl_command(db_conn, original_msg_id, target_sl):
     """
     movesl=entry, movesl=tp1, movesl=tp2 메시지를 처리하는 헬퍼 함수
     """
-    # DB에서 최신 활성 주문 정보 불러오기
-    current_active_orders = get_active_orders(db_conn)
-
-    if original_msg_id not in current_active_orders:
+    if original_msg_id not in order_store:
         log_error_and_send_message(
             MESSAGES['order_not_found_message'].format(original_msg_id=original_msg_id),
             chat_id=TELE_BYBIT_LOG_CHAT_ID
         )
         return
         
-    order_info = current_active_orders[original_msg_id]
+    order_info = order_store.get(original_msg_id)
     
     # 포지션이 열려있는지 확인
     try:
-        positions_info = bybit_client.get_positions(category="linear", symbol=order_info['symbol'])
+        positions_info = await bybit_gateway.get_positions(category="linear", symbol=order_info['symbol'])
         if positions_info['retCode'] == 0 and positions_info['result']['list']:
             position_size = float(positions_info['result']['list'][0]['size'])
             
@@ -173,6 +229,16 @@ async def handle_movesl_command(db_conn, original_msg_id, target_sl):
                 # 포지션이 있으면 SL 업데이트
                 if target_sl == 'entry':
                     await update_stop_loss_to_value(order_info['symbol'], order_info['side'], order_info['positionIdx'], order_info['entry_price'])
+                elif target_sl == 'tp1':
+                    if len(order_info['targets']) >= 1:
+                        await update_stop_loss_to_value(order_info['symbol'], order_info['side'], order_info['positionIdx'], order_info['targets'][0])
+                    else:
+                        log_error_and_send_message(MESSAGES['tp1_not_found'], chat_id=TELE_BYBIT_LOG_CHAT_ID)
+                elif target_sl == 'tp2':
+                    if len(order_info['targets']) >= 2:
+                        await update_stop_loss_to_value(order_info['symbol'], order_info['side'], order_info['positionIdx'], order_info['targets'][1])
+                    else:
+                        log_error_and_send_message(MESSAGES['tp2_not_found'], chat_id=TELE_BYBIT_LOG_CHAT_ID)
                 return
             
     except Exception as e:
@@ -184,28 +250,24 @@ async def handle_movesl_command(db_conn, original_msg_id, target_sl):
     await cancel_bybit_order(db_conn, order_info['symbol'])
 
 
-async def handle_cancel_reply(event, db_conn):
-    original_msg_id = event.reply_to_msg_id
+async def handle_cancel_reply(db_conn, channel_id, original_msg_id):
     print(MESSAGES['cancel_message_detected'].format(original_msg_id=original_msg_id))
-    
-    # DB에서 최신 활성 주문 정보 불러오기
-    current_active_orders = get_active_orders(db_conn)
 
-    if original_msg_id in current_active_orders:
-        order_info = current_active_orders[original_msg_id]
+    if original_msg_id in order_store:
+        order_info = order_store.get(original_msg_id)
         symbol = order_info['symbol']
         print(MESSAGES['cancel_message_info'].format(symbol=symbol))
-        await cancel_bybit_order(db_conn, symbol)
+        await execution_lanes.run(lane_key(symbol), cancel_bybit_order, db_conn, symbol)
         return
 
     try:
-        original_message = await client.get_messages(TARGET_CHANNEL_ID, ids=original_msg_id)
+        original_message = await client.get_messages(channel_id, ids=original_msg_id)
         if original_message:
             parsed_order_info = parse_telegram_message(original_message.text)
             if parsed_order_info and 'symbol' in parsed_order_info:
                 symbol_to_cancel = parsed_order_info['symbol']
                 print(f"✅ active_orders에 없지만, 원본 메시지에서 심볼({symbol_to_cancel})을 파싱했습니다. Bybit 주문 취소를 시도합니다.")
-                await cancel_bybit_order(db_conn, symbol_to_cancel)
+                await execution_lanes.run(lane_key(symbol_to_cancel), cancel_bybit_order, db_conn, symbol_to_cancel)
                 return
     except Exception as e:
         log_error_and_send_message(f"원본 메시지 파싱 중 오류 발생: {e}", exc=e)
@@ -217,287 +279,126 @@ async def handle_cancel_reply(event, db_conn):
 
 #=======================================================================================================================================#
 ##### 테스트용
+# 테스트 채널에서 봇 자신이 보낸 메시지를 거르기 위한 봇 사용자 ID (처음 한 번만 조회)
+_bot_user_id = None
+
 async def my_event_handler_test(event, db_conn):
+    global _bot_user_id
     # ✅ 봇 자신이 보낸 메시지 무시
-    bot_info = await bybit_bot.get_me()
-    if event.sender_id == bot_info.id:
+    if _bot_user_id is None:
+        _bot_user_id = (await bybit_bot.get_me()).id
+    if event.sender_id == _bot_user_id:
         return
 
-    message_text = event.message.message
-    print(f"\n새로운 메시지 감지:\n{message_text}")
-
-    # ✅ 추가: 'Close all positions' 메시지 감지
-    if parse_close_all_positions(message_text):
-        await close_all_positions(db_conn)
-        return # 모든 포지션 청산 후 종료
-
-    # ✅ 'PF' 메시지 감지 및 포트폴리오 리포트 전송
-    message_parts = message_text.strip().lower().split()
-    if message_parts[0] == 'pf':
-        period = 'all'
-        if len(message_parts) > 1:
-            if message_parts[1] == 'monty':
-                period = 'month'
-            elif message_parts[1] == 'week':
-                period = 'week'
-            elif message_parts[1] == 'day':
-                period = 'day'
-        
-        report = generate_report(db_conn, period=period)
-        await bybit_bot.send_message(
-            chat_id=TEST_CHANNEL_ID,
-            text=report,
-            parse_mode='Markdown'
-        )
-        return
-    
-    # ✅ 답장 메시지인 경우 바로 종료
-    if event.is_reply:
-        print(MESSAGES['reply_message_warning'])
-        return
-    
-    order_info = parse_telegram_message(message_text)
-    
-    if order_info:
-        # DB에서 최신 활성 주문 정보 불러오기
-        current_active_orders = get_active_orders(db_conn)
-        existing_order = next((v for v in current_active_orders.values() if v['symbol'] == order_info['symbol'] and v['side'] == order_info['side'] and not v['filled']), None)
-        print(existing_order)
-
-        if existing_order:
-            print(MESSAGES['duplicate_order_warning'].format(symbol=order_info['symbol']))
-            log_error_and_send_message(
-                MESSAGES['duplicate_order_reason'],
-                chat_id=TELE_BYBIT_LOG_CHAT_ID
-            )
-            return
-
-        execute_bybit_order(db_conn, order_info, event.id)
-    
+    await dispatch_channel_message(event, db_conn, TEST_CHANNEL_ID)
     if event.sender_id == TEST_CHANNEL_ID:
-        now = datetime.now()
         print(MESSAGES['test_channel_info'])
-        print("Target spoke", "time:", now.date(), now.time())
-    await asyncio.sleep(0) 
-
-async def handle_edited_message_test(event, db_conn):
-    message_id = event.id
-    message_text = event.message.message
-    print(f"\n{MESSAGES['edited_message_detected']}\n{message_text}")
-
-    # DB에서 최신 활성 주문 정보 불러오기
-    current_active_orders = get_active_orders(db_conn)
-
-    if message_id not in current_active_orders:
-        return
-
-    if current_active_orders[message_id]['original_message'] == message_text:
-        print("⚠️ 메시지 내용이 변경되지 않았으므로 주문 수정 작업을 건너뛰겠습니다.")
-        return
-
-    print(MESSAGES['edited_message_alert'].format(message_id=message_id))
-    
-    try:
-        existing_order_info = current_active_orders.pop(message_id, None)
-        
-        if not existing_order_info:
-            print(MESSAGES['order_info_not_found_error'].format(message_id=message_id))
-            return
-            
-        bybit_order_id = existing_order_info['orderId']
-        symbol_to_cancel = existing_order_info['symbol']
-
-        cancel_result = bybit_client.cancel_order(
-            category="linear",
-            symbol=symbol_to_cancel,
-            orderId=bybit_order_id
-        )
-
-        if cancel_result['retCode'] == 0:
-            print(MESSAGES['order_cancel_success'].format(order_id=bybit_order_id))
-            
-            updated_order_info = parse_telegram_message(event.message.message)
-            if updated_order_info:
-                print(MESSAGES['new_order_from_edit'])
-                execute_bybit_order(db_conn, updated_order_info, message_id)
-            else:
-                print(MESSAGES['edit_parsing_fail'])
-                log_error_and_send_message(
-                    MESSAGES['edit_parsing_fail_alert'],
-                    chat_id=TELE_BYBIT_LOG_CHAT_ID
-                )
-
-        else:
-            print(MESSAGES['order_cancel_fail'].format(error_msg=cancel_result['retMsg']))
-            
-            log_error_and_send_message(
-                MESSAGES['order_cancel_fail'].format(error_msg=cancel_result['retMsg']),
-                chat_id=TELE_BYBIT_LOG_CHAT_ID
-            )
-            
-    except Exception as e:
-        log_error_and_send_message(
-            MESSAGES['order_edit_system_error'].format(error_msg=e),
-            exc=e
-        )
-
-async def handle_dca_and_sl_update_test(event, db_conn):
-    message_text = event.message.message.lower().replace(" ", "")
-    original_msg_id = event.reply_to_msg_id
-    
-    # DB에서 최신 활성 주문 정보 불러오기
-    current_active_orders = get_active_orders(db_conn)
-
-    # ✅ 수정된 로직: 'movesl' 키워드를 정확히 파싱합니다.
-    if 'movesltoentry' in message_text:
-        await handle_movesl_command_test(db_conn, original_msg_id, 'entry')
-    elif 'movesltotp1' in message_text:
-        await handle_movesl_command_test(db_conn, original_msg_id, 'tp1')
-    elif 'movesltotp2' in message_text:
-        await handle_movesl_command_test(db_conn, original_msg_id, 'tp2')
-
-    dca_price, new_sl = parse_dca_message(event.message.message)
-    if dca_price and new_sl:
-        if original_msg_id in current_active_orders:
-            order_info = current_active_orders[original_msg_id]
-            print(MESSAGES['dca_sl_message_detected'].format(symbol=order_info['symbol']))
-            await update_stop_loss_to_value(
-                order_info['symbol'],
-                order_info['side'],
-                order_info['positionIdx'],
-                new_sl
-            )
-            place_dca_order(db_conn, order_info, dca_price)
-        else:
-            log_error_and_send_message(
-                MESSAGES['order_not_found_message'].format(original_msg_id=original_msg_id),
-                chat_id=TELE_BYBIT_LOG_CHAT_ID
-            )
-        return
 
+#=======================================================================================================================================#
 
-async def handle_movesl_command_test(db_conn, original_msg_id, target_sl):
+async def run_startup_step(name, step, failure_message=None):
     """
-    movesl=entry, movesl=tp1, movesl=tp2 메시지를 처리하는 헬퍼 함수
+    시작 단계 하나를 실행하고 소요 시간을 startup.<name> 구간으로 기록합니다.
+    failure_message가 있으면 실패해도 경고만 출력하고 계속 진행합니다. (첫 사용 시 개별 조회로 대체되는 캐시 등)
     """
-    # DB에서 최신 활성 주문 정보 불러오기
-    current_active_orders = get_active_orders(db_conn)
-    
-    if original_msg_id not in current_active_orders:
-        log_error_and_send_message(
-            MESSAGES['order_not_found_message'].format(original_msg_id=original_msg_id),
-            chat_id=TELE_BYBIT_LOG_CHAT_ID
-        )
-        return
-        
-    order_info = current_active_orders[original_msg_id]
-    
-    # 포지션이 열려있는지 확인
+    started_at = time.perf_counter()
     try:
-        positions_info = bybit_client.get_positions(category="linear", symbol=order_info['symbol'])
-        print(positions_info)
-        if positions_info['retCode'] == 0 and positions_info['result']['list']:
-            print(positions_info['result']['list'])
-            position_size = float(positions_info['result']['list'][0]['size'])
-            
-            if position_size > 0:
-                # 포지션이 있으면 SL 업데이트
-                if target_sl == 'entry':
-                    print("entry로 이동")
-                    await update_stop_loss_to_value(order_info['symbol'], order_info['side'], order_info['positionIdx'], order_info['entry_price'])
-                elif target_sl == 'tp1':
-                    if len(order_info['targets']) >= 1:
-                        await update_stop_loss_to_value(order_info['symbol'], order_info['side'], order_info['positionIdx'], order_info['targets'][0])
-                    else:
-                        log_error_and_send_message(MESSAGES['tp1_not_found'], chat_id=TELE_BYBIT_LOG_CHAT_ID)
-                elif target_sl == 'tp2':
-                    if len(order_info['targets']) >= 2:
-                        await update_stop_loss_to_value(order_info['symbol'], order_info['side'], order_info['positionIdx'], order_info['targets'][1])
-                    else:
-                        log_error_and_send_message(MESSAGES['tp2_not_found'], chat_id=TELE_BYBIT_LOG_CHAT_ID)
-                return
-            
+        return await step
     except Exception as e:
-        log_error_and_send_message(f"포지션 정보 확인 중 오류 발생: {e}", exc=e)
-        return
+        if failure_message is None:
+            raise
+        print(failure_message.format(error_msg=e))
+    finally:
+        latency_tracker.record(f'startup.{name}', time.perf_counter() - started_at)
 
-    # 포지션이 없으면 미체결 주문 취소
-    print(f"포지션이 열리지 않았습니다. {order_info['symbol']}의 미체결 주문을 취소합니다.")
-    await cancel_bybit_order(db_conn, order_info['symbol'])
 
+async def open_database(db_conn):
+    """테이블 생성 / 마이그레이션 후 활성 주문을 메모리 저장소로 불러옵니다. (디스크 작업은 스레드에서 실행)"""
+    await asyncio.to_thread(setup_database, db_conn)
+    print("✅ 데이터베이스 설정 완료.")
+    start_snapshots() # ✅ 로컬 주 DB를 사용하는 경우 동기화 폴더로 주기적인 스냅샷 저장
 
-async def handle_cancel_reply_test(event, db_conn):
-    original_msg_id = event.reply_to_msg_id
-    print(MESSAGES['cancel_message_detected'].format(original_msg_id=original_msg_id))
-    
-    # DB에서 최신 활성 주문 정보 불러오기
-    current_active_orders = get_active_orders(db_conn)
+    # ✅ DB의 활성 주문을 메모리 저장소로 한 번만 불러오고, 이후 DB 기록은 백그라운드에서 처리
+    await asyncio.to_thread(order_store.load, db_conn)
+    order_store.start()
+    print("✅ 이전에 저장된 활성 주문 정보를 성공적으로 불러왔습니다.")
 
-    if original_msg_id in current_active_orders:
-        order_info = current_active_orders[original_msg_id]
-        symbol = order_info['symbol']
-        print(MESSAGES['cancel_message_info'].format(symbol=symbol))
-        await cancel_bybit_order(db_conn, symbol)
-        return
+
+async def connect_telegram():
+    await client.start()
+    print("Telethon client started...")
+    print(MESSAGES['application_run_message'])
 
     try:
-        original_message = await client.get_messages(TEST_CHANNEL_ID, ids=original_msg_id)
-        if original_message:
-            parsed_order_info = parse_telegram_message(original_message.text)
-            if parsed_order_info and 'symbol' in parsed_order_info:
-                symbol_to_cancel = parsed_order_info['symbol']
-                print(f"✅ active_orders에 없지만, 원본 메시지에서 심볼({symbol_to_cancel})을 파싱했습니다. Bybit 주문 취소를 시도합니다.")
-                await cancel_bybit_order(db_conn, symbol_to_cancel)
-                return
+        channel, test_channel = await asyncio.gather(
+            client.get_entity(TARGET_CHANNEL_ID),
+            client.get_entity(TEST_CHANNEL_ID)
+        )
+        print(MESSAGES['telegram_channel_access_success'].format(channel_name=channel.title))
+        print(MESSAGES['telegram_channel_access_success'].format(channel_name=test_channel.title))
     except Exception as e:
-        log_error_and_send_message(f"원본 메시지 파싱 중 오류 발생: {e}", exc=e)
-    
-    log_error_and_send_message(
-        MESSAGES['no_open_order_to_cancel'],
-        chat_id=TELE_BYBIT_LOG_CHAT_ID
-    )
+        print(MESSAGES['telegram_channel_access_failure'].format(error_msg=e))
 
-#=======================================================================================================================================#
 
 async def main():
+    started_at = time.perf_counter()
     db_conn = get_db_connection() # ✅ DB 연결을 한 번만 생성
+    control_bot = None
     try:
-        # ✅ 추가: DB 설정 함수 호출
-        setup_database(db_conn) # ✅ 연결 객체 전달
-        print("✅ 데이터베이스 설정 완료.")
-        
-        # ✅ 수정: 파일에서 불러오는 대신 DB에서 불러오기
-        global active_orders
-        loaded_orders = get_active_orders(db_conn) # ✅ 연결 객체 전달
-        active_orders.update(loaded_orders)
-        for message_id in active_orders.keys():
-            monitored_trade_ids.add(message_id)
-        print("✅ 이전에 저장된 활성 주문 정보를 성공적으로 불러왔습니다.")
-
-        await client.start()
-        print("Telethon client started...")
-        print(MESSAGES['application_run_message'])
-        
-        try:
-            channel = await client.get_entity(TARGET_CHANNEL_ID)
-            test_channel = await client.get_entity(TEST_CHANNEL_ID)
-            print(MESSAGES['telegram_channel_access_success'].format(channel_name=channel.title))
-            print(MESSAGES['telegram_channel_access_success'].format(channel_name=test_channel.title))
-        except Exception as e:
-            print(MESSAGES['telegram_channel_access_failure'].format(error_msg=e))
-        
-        print(MESSAGES['listening_message'])
-        now = datetime.now()
-        print(MESSAGES['program_start'], "time:", now.date(), now.time())
+        # ✅ 저장된 심볼 매핑을 먼저 불러와 종목 정보 캐시가 채워지기 전에도 종목명을 변환할 수 있게 합니다.
+        symbol_resolver.load()
+
+        # ✅ DB, 텔레그램 접속, 거래소 캐시(종목 정보 / 시세 / 포지션 / 잔고 / 레버리지)와 keep-alive 연결을
+        #    동시에 준비하여 재시작 직후의 첫 신호도 조회 왕복과 연결 수립 비용 없이 처리합니다.
+        results = await asyncio.gather(
+            run_startup_step('database', open_database(db_conn)),
+            run_startup_step('telegram', connect_telegram()),
+            run_startup_step('positions', position_tracker.start()), # ✅ 공유 포지션 추적기(비공개 스트림)
+            run_startup_step('balance', account_state.start()), # ✅ 주문 수량 계산용 잔고 캐시 (wallet 토픽 + REST 대체 조회)
+            run_startup_step('leverage', leverage_cache.load(), "⚠️ 레버리지 캐시 초기화 실패 (주문 시 종목별 조회로 대체): {error_msg}"),
+            run_startup_step('instruments', instrument_cache.warm_up(), "⚠️ 종목 정보 캐시 초기화 실패 (주문 시 개별 조회로 대체): {error_msg}"),
+            run_startup_step('tickers', ticker_cache.refresh(), "⚠️ 시세 캐시 초기화 실패 (주문 시 개별 조회로 대체): {error_msg}"),
+            run_startup_step('bybit_connections', bybit_gateway.warm_up(), "⚠️ Bybit 연결 준비 실패: {error_msg}"),
+            run_startup_step('bot_connection', bybit_bot.initialize(), "⚠️ 텔레그램 봇 연결 준비 실패: {error_msg}"),
+            return_exceptions=True
+        )
+        # DB 설정이나 텔레그램 접속에 실패하면 다른 준비 작업이 끝난 뒤 시작을 중단합니다.
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        # ✅ 활성 주문과 포지션 추적기가 모두 준비된 뒤 미청산 주문의 청산 모니터링을 재개합니다.
+        for message_id, order_info in list(order_store.orders.items()):
+            if not order_info['filled'] and message_id not in monitored_trade_ids:
+                spawn_background_task(record_trade_result_on_close(db_conn, order_info['symbol'], message_id))
+
+        instrument_cache.start_background_refresh()
+        latency_tracker.start_periodic_dump()
+
+        ready_seconds = time.perf_counter() - started_at
+        latency_tracker.record('startup.ready', ready_seconds)
+        print(MESSAGES['startup_ready'].format(ready_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'), seconds=ready_seconds))
+
         # ✅ 이벤트 핸들러에 DB 연결 객체를 주입
+        # 채널마다 새 메시지(일반 / 답장)는 디스패처 하나, 수정 메시지는 핸들러 하나로 처리합니다.
         client.add_event_handler(lambda e: my_event_handler(e, db_conn), events.NewMessage(chats=TARGET_CHANNEL_ID))
         client.add_event_handler(lambda e: handle_edited_message(e, db_conn), events.MessageEdited(chats=TARGET_CHANNEL_ID))
-        client.add_event_handler(lambda e: handle_dca_and_sl_update(e, db_conn), events.NewMessage(chats=TARGET_CHANNEL_ID, func=lambda e: e.is_reply))
-        client.add_event_handler(lambda e: handle_cancel_reply(e, db_conn), events.NewMessage(chats=TARGET_CHANNEL_ID, func=lambda e: e.is_reply and 'cancel' in e.message.message.lower()))
         client.add_event_handler(lambda e: my_event_handler_test(e, db_conn), events.NewMessage(chats=TEST_CHANNEL_ID))
-        client.add_event_handler(lambda e: handle_edited_message_test(e, db_conn), events.MessageEdited(chats=TEST_CHANNEL_ID))
-        client.add_event_handler(lambda e: handle_dca_and_sl_update_test(e, db_conn), events.NewMessage(chats=TEST_CHANNEL_ID, func=lambda e: e.is_reply))
-        client.add_event_handler(lambda e: handle_cancel_reply_test(e, db_conn), events.NewMessage(chats=TEST_CHANNEL_ID, func=lambda e: e.is_reply and 'cancel' in e.message.message.lower()))
+        client.add_event_handler(lambda e: handle_edited_message(e, db_conn), events.MessageEdited(chats=TEST_CHANNEL_ID))
+
+        print(MESSAGES['listening_message'])
+        now = datetime.now()
+        print(MESSAGES['program_start'], "time:", now.date(), now.time())
+
+        # ✅ 제어 봇을 같은 이벤트 루프에서 실행하여 위의 캐시와 DB 연결을 그대로 사용합니다.
+        if CONTROL_BOT_ENABLED:
+            try:
+                control_bot = await start_control_bot()
+            except Exception as e:
+                log_error_and_send_message(f"제어 봇 시작 실패 (리스너는 계속 실행): {e}", exc=e)
+        else:
+            # 제어 봇을 따로 실행하면 그쪽의 /pnl 처리가 활성 주문을 바꾸므로 주기적으로 확인합니다.
+            order_store.start_sync()
 
         await client.run_until_disconnected()
 
@@ -507,8 +408,20 @@ async def main():
             exc=e
         )
     finally:
-        db_conn.close() # ✅ 프로그램 종료 시 DB 연결 닫기
+        await order_store.flush() # ✅ 남은 활성 주문 기록을 DB에 반영
+        await notifier.flush() # ✅ 대기 중인 텔레그램 알림 전송
+        await symbol_resolver.flush() # ✅ 진행 중인 심볼 매핑 파일 저장 완료
+        if control_bot is not None:
+            await stop_control_bot(control_bot) # ✅ 알림 전송 후에 봇 연결을 닫습니다.
+        else:
+            await bybit_bot.shutdown() # ✅ 시작 단계에서 미리 연 봇 연결을 닫습니다.
+        try:
+            latency_tracker.dump() # ✅ 구간별 지연 시간 요약 저장
+        except OSError as e:
+            print(f"⚠️ 지연 시간 요약 저장 실패: {e}")
+        close_database() # ✅ 프로그램 종료 시 남은 쓰기 커밋, 마지막 스냅샷 저장 후 DB 연결 닫기
+        await client.disconnect()
 
 if __name__ == "__main__":
-    with client:
-        client.loop.run_until_complete(main())
\ No newline at end of file
+    # Telethon 접속(client.start)은 main()의 시작 단계에서 다른 준비 작업과 동시에 진행합니다.
+    client.loop.run_until_complete(main())
\ No newline at end of file
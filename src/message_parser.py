@@ -148,4 +148,72 @@ def parse_close_all_positions(message_text):
     # 'close all positions', 'take all profit now', 'close all' 등 다양한 변형을 고려
     if "close all" in normalized_text or "take all profit" in normalized_text:
         return True
-    return False
\ No newline at end of file
+    return False
+
+# 신호처럼 보이는 메시지의 종목 ('$BTC' 또는 'BTC/USDT')과 손절가 표기 (선조회용 빠른 검사)
+SIGNAL_SYMBOL_PATTERN = re.compile(r'\$([A-Za-z0-9]+)|([A-Z0-9]+)/([A-Z]+)')
+SIGNAL_STOP_LOSS_PATTERN = re.compile(r'Stop\s*Loss?', re.IGNORECASE)
+
+
+def guess_signal_symbol(message_text):
+    """
+    전체 파싱 전에 신호처럼 보이는 메시지인지 빠르게 확인하고 채널 종목명을 반환합니다. (아니면 None)
+    예: "$BTC Long ... Stop Loss: 64000" -> "BTCUSDT"
+    """
+    if not message_text or not SIGNAL_STOP_LOSS_PATTERN.search(message_text):
+        return None
+    symbol_match = SIGNAL_SYMBOL_PATTERN.search(message_text)
+    if not symbol_match:
+        return None
+    if symbol_match.group(1):
+        return symbol_match.group(1).upper() + "USDT"
+    return symbol_match.group(2) + symbol_match.group(3)
+
+
+# 'movesl=entry', 'Move SL to TP1' 등 SL 이동 명령 (소문자, 공백 제거 후 검사)
+MOVESL_PATTERN = re.compile(r'movesl(?:=|to)(entry|tp1|tp2)')
+
+REPORT_PERIODS = {'month': 'month', 'monty': 'month', 'week': 'week', 'day': 'day'}
+
+
+def classify_message(message_text, is_reply=False):
+    """
+    채널 메시지를 한 번만 검사하여 (종류, 내용)으로 분류합니다.
+    - 공통: 'close_all' (None)
+    - 답장: 'dca' ((DCA 가격, 새 SL)) -> 'movesl' ('entry' / 'tp1' / 'tp2') -> 'cancel' (None: 원본 주문 취소)
+    - 일반: 'report' (기간) -> 'cancel' (종목) -> 'signal' (주문 정보)
+    어디에도 해당하지 않으면 ('noise', None)을 반환합니다.
+    """
+    message_text = message_text or ''
+    lowered = message_text.lower()
+
+    if parse_close_all_positions(message_text):
+        return 'close_all', None
+
+    if is_reply:
+        compact = lowered.replace(" ", "")
+        if 'dca' in compact:
+            dca_price, new_sl = parse_dca_message(message_text)
+            if dca_price and new_sl:
+                return 'dca', (dca_price, new_sl)
+        movesl_match = MOVESL_PATTERN.search(compact)
+        if movesl_match:
+            return 'movesl', movesl_match.group(1)
+        if 'cancel' in lowered:
+            return 'cancel', None
+        return 'noise', None
+
+    message_parts = lowered.split()
+    if message_parts and message_parts[0] == 'pf':
+        period = REPORT_PERIODS.get(message_parts[1], 'all') if len(message_parts) > 1 else 'all'
+        return 'report', period
+
+    if 'cancel' in lowered:
+        symbol_to_cancel = parse_cancel_message(message_text)
+        if symbol_to_cancel:
+            return 'cancel', symbol_to_cancel
+
+    order_info = parse_telegram_message(message_text)
+    if order_info:
+        return 'signal', order_info
+    return 'noise', None
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+from telegram.error import BadRequest, NetworkError, RetryAfter, TimedOut
+from api_clients import bybit_bot
+from latency_tracker import latency_tracker
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+# 전송 대기열의 최대 길이 (가득 차면 새 알림은 버립니다)
+NOTIFY_QUEUE_SIZE = int(os.getenv('NOTIFY_QUEUE_SIZE', '500'))
+# 같은 채팅으로 가는 알림을 하나로 합치기 위해 모으는 시간 (초)
+NOTIFY_MERGE_WINDOW = float(os.getenv('NOTIFY_MERGE_WINDOW', '0.5'))
+# 같은 채팅으로 연속 전송할 때의 최소 간격 (초)
+NOTIFY_CHAT_INTERVAL = float(os.getenv('NOTIFY_CHAT_INTERVAL', '1.0'))
+# 전송 실패 시 최대 재시도 횟수
+NOTIFY_MAX_RETRIES = int(os.getenv('NOTIFY_MAX_RETRIES', '5'))
+
+# 텔레그램 메시지 최대 길이
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+class NotificationOutbox:
+    """
+    텔레그램 알림 전송 대기열.
+    send()는 큐에 넣기만 하고 바로 반환하므로 주문 처리 흐름이 Bot API 응답을 기다리지 않습니다.
+    백그라운드 워커가 같은 채팅의 알림을 짧은 시간 동안 모아 한 메시지로 합치고,
+    채팅별 전송 간격과 429(RetryAfter) 응답을 지키면서 재시도합니다.
+    """
+
+    def __init__(self, bot, maxsize=NOTIFY_QUEUE_SIZE, merge_window=NOTIFY_MERGE_WINDOW,
+                 chat_interval=NOTIFY_CHAT_INTERVAL, max_retries=NOTIFY_MAX_RETRIES):
+        self.bot = bot
+        self.merge_window = merge_window
+        self.chat_interval = chat_interval
+        self.max_retries = max_retries
+        self._queue = asyncio.Queue(maxsize=maxsize)
+        self._worker_task = None
+        # chat_id -> 다음 전송 가능 시각 (monotonic)
+        self._next_send_at = {}
+        self.dropped = 0
+
+    def send(self, chat_id, text, parse_mode=None):
+        """
+        알림을 대기열에 넣습니다. (대기하지 않음)
+        실행 중인 이벤트 루프가 없으면 False를 반환하므로 호출한 쪽에서 직접 전송해야 합니다.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((chat_id, parse_mode, text, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            print(f"⚠️ 알림 대기열이 가득 차서 메시지를 버렸습니다. (누적 {self.dropped}건)")
+        return True
+
+    async def flush(self, timeout=10):
+        """대기 중인 알림이 모두 전송될 때까지 기다립니다. (종료 시)"""
+        if self._worker_task is None or self._worker_task.done():
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ 전송하지 못한 알림 {self._queue.qsize()}건이 남아 있습니다.")
+
+    def _ensure_worker(self):
+        if self._worker_task is None or self._worker_task.done():
+            self._worker_task = asyncio.create_task(self._worker())
+
+    async def _worker(self):
+        while True:
+            batch = [await self._queue.get()]
+            # 합칠 수 있도록 잠시 더 모읍니다.
+            await asyncio.sleep(self.merge_window)
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # (chat_id, parse_mode)별로 순서를 유지하며 묶습니다.
+            groups = {}
+            now = time.perf_counter()
+            for chat_id, parse_mode, text, queued_at in batch:
+                latency_tracker.record('notify.queue_wait', now - queued_at)
+                groups.setdefault((chat_id, parse_mode), []).append(text)
+
+            try:
+                await asyncio.gather(*(
+                    self._deliver(chat_id, parse_mode, texts)
+                    for (chat_id, parse_mode), texts in groups.items()
+                ))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _deliver(self, chat_id, parse_mode, texts):
+        for text in self._merge(texts):
+            await self._wait_for_slot(chat_id)
+            await self._send_with_retry(chat_id, parse_mode, text)
+
+    @staticmethod
+    def _merge(texts):
+        """여러 알림을 텔레그램 최대 길이 안에서 최대한 적은 수의 메시지로 합칩니다."""
+        merged = []
+        current = ''
+        for text in texts:
+            text = text[:TELEGRAM_MESSAGE_LIMIT]
+            if current and len(current) + 2 + len(text) > TELEGRAM_MESSAGE_LIMIT:
+                merged.append(current)
+                current = ''
+            current = f"{current}\n\n{text}" if current else text
+        if current:
+            merged.append(current)
+        return merged
+
+    async def _wait_for_slot(self, chat_id):
+        delay = self._next_send_at.get(chat_id, 0) - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._next_send_at[chat_id] = time.monotonic() + self.chat_interval
+
+    async def _send_with_retry(self, chat_id, parse_mode, text):
+        backoff = 1.0
+        for attempt in range(self.max_retries + 1):
+            try:
+                with latency_tracker.span('notify.send'):
+                    await self.bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
+                return
+            except RetryAfter as e:
+                # 텔레그램이 알려준 시간만큼 해당 채팅 전송을 미룹니다.
+                retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, 'total_seconds') else e.retry_after
+                self._next_send_at[chat_id] = time.monotonic() + retry_after
+                print(f"⚠️ 텔레그램 전송 제한(429). {retry_after}초 후 다시 시도합니다.")
+                await self._wait_for_slot(chat_id)
+            except BadRequest as e:
+                # 마크다운 파싱 오류 등은 서식 없이 한 번만 다시 보냅니다.
+                if parse_mode is None:
+                    print(f"⚠️ 텔레그램 메시지 전송 실패: {e}")
+                    return
+                parse_mode = None
+            except (TimedOut, NetworkError) as e:
+                if attempt == self.max_retries:
+                    break
+                print(f"⚠️ 텔레그램 메시지 전송 실패, {backoff:.0f}초 후 재시도: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            except Exception as e:
+                print(f"⚠️ 텔레그램 메시지 전송 실패: {e}")
+                return
+        print(f"⚠️ 텔레그램 메시지 전송을 {self.max_retries}회 재시도했지만 실패했습니다.")
+
+
+# 프로세스 전체에서 공유하는 알림 대기열
+notifier = NotificationOutbox(bybit_bot)
+
+__all__ = ['NotificationOutbox', 'notifier']
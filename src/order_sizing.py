@@ -0,0 +1,101 @@
+from decimal import Decimal, ROUND_HALF_UP
+from instrument_cache import instrument_cache
+from utils import MESSAGES
+
+
+class OrderSizingError(Exception):
+    """거래소 규격에 맞는 주문 수량을 만들 수 없을 때 발생합니다. (최소 주문 수량 미만 등)"""
+
+
+def _decimals(value):
+    """'0.001' -> 3, '10' -> 0 처럼 소수점 아래 자릿수를 반환합니다."""
+    exponent = Decimal(str(value)).normalize().as_tuple().exponent
+    return max(0, -exponent)
+
+
+def _to_units(value, scale):
+    """값을 10^-scale 단위의 정수로 변환합니다. (가장 가까운 정수로 반올림)"""
+    return int(Decimal(str(value)).scaleb(scale).to_integral_value(ROUND_HALF_UP))
+
+
+def _format_units(units, scale):
+    """10^-scale 단위의 정수를 주문 파라미터용 문자열로 바꿉니다."""
+    if scale == 0:
+        return str(units)
+    sign = '-' if units < 0 else ''
+    digits = str(abs(units)).rjust(scale + 1, '0')
+    return f"{sign}{digits[:-scale]}.{digits[-scale:]}"
+
+
+def _round_to_step(units, step):
+    """정수 units를 step의 가장 가까운 배수로 맞춥니다."""
+    return (units + step // 2) // step * step
+
+
+class InstrumentSpec:
+    """
+    종목 하나의 수량 단위(qtyStep) / 가격 단위(tickSize)를 정수로 미리 계산한 규격.
+    수량과 가격을 10^-scale 단위의 정수로 바꿔 배수 맞춤을 정수 연산으로 처리하므로
+    부동소수점 오차로 인한 단위 위반 없이 첫 주문부터 유효한 값을 만듭니다.
+    """
+
+    __slots__ = ('symbol', 'qty_scale', 'qty_step', 'min_qty', 'max_qty', 'max_market_qty', 'price_scale', 'tick')
+
+    def __init__(self, instrument):
+        lot_size_filter = instrument['lotSizeFilter']
+        price_filter = instrument['priceFilter']
+        max_market_qty = lot_size_filter.get('maxMktOrderQty') or lot_size_filter['maxOrderQty']
+
+        self.symbol = instrument['symbol']
+        self.qty_scale = max(_decimals(lot_size_filter['qtyStep']), _decimals(lot_size_filter['minOrderQty']))
+        self.qty_step = _to_units(lot_size_filter['qtyStep'], self.qty_scale)
+        self.min_qty = _to_units(lot_size_filter['minOrderQty'], self.qty_scale)
+        self.max_qty = _to_units(lot_size_filter['maxOrderQty'], self.qty_scale) // self.qty_step * self.qty_step
+        self.max_market_qty = _to_units(max_market_qty, self.qty_scale) // self.qty_step * self.qty_step
+        self.price_scale = _decimals(price_filter['tickSize'])
+        self.tick = _to_units(price_filter['tickSize'], self.price_scale)
+
+    def quantity(self, order_qty, market=False):
+        """
+        계산된 수량을 qtyStep의 배수로 맞춘 주문용 문자열을 반환합니다.
+        최대 주문 수량을 넘으면 최대값으로 줄이고, 최소 주문 수량보다 작으면 OrderSizingError를 발생시킵니다.
+        """
+        units = _round_to_step(_to_units(order_qty, self.qty_scale), self.qty_step)
+        max_units = self.max_market_qty if market else self.max_qty
+        if units > max_units:
+            print(MESSAGES['qty_exceeded_warning'].format(
+                calculated_qty=order_qty, max_qty=_format_units(max_units, self.qty_scale)
+            ))
+            units = max_units
+        if units < self.min_qty:
+            raise OrderSizingError(MESSAGES['qty_below_minimum'].format(
+                calculated_qty=order_qty, min_qty=_format_units(self.min_qty, self.qty_scale)
+            ))
+        return _format_units(units, self.qty_scale)
+
+    def price(self, price):
+        """가격을 tickSize의 가장 가까운 배수로 맞춘 주문용 문자열을 반환합니다."""
+        return _format_units(_round_to_step(_to_units(price, self.price_scale), self.tick), self.price_scale)
+
+
+class OrderSizer:
+    """종목별 InstrumentSpec을 종목 정보 캐시와 함께 보관합니다."""
+
+    def __init__(self, instruments):
+        self.instruments = instruments
+        # symbol -> (규격을 만든 종목 정보, InstrumentSpec)
+        self._specs = {}
+
+    async def spec(self, symbol):
+        """종목의 주문 규격을 반환합니다. 종목 정보가 새로 불러와졌으면 규격도 다시 계산합니다."""
+        instrument = await self.instruments.fetch(symbol)
+        cached = self._specs.get(symbol)
+        if cached is None or cached[0] is not instrument:
+            cached = self._specs[symbol] = (instrument, InstrumentSpec(instrument))
+        return cached[1]
+
+
+# 프로세스 전체에서 공유하는 주문 규격 계산기
+order_sizer = OrderSizer(instrument_cache)
+
+__all__ = ['InstrumentSpec', 'OrderSizer', 'OrderSizingError', 'order_sizer']
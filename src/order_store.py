@@ -0,0 +1,210 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from latency_tracker import latency_tracker
+from database_manager import (
+    get_db_connection, get_active_orders, save_active_order,
+    update_filled_status, delete_active_order, get_data_version
+)
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+# 다른 프로세스(따로 실행한 bot.py)가 바꾼 활성 주문을 확인하는 주기 (초)
+ACTIVE_ORDER_SYNC_INTERVAL = float(os.getenv('ACTIVE_ORDER_SYNC_INTERVAL', '1'))
+
+
+class ActiveOrderStore:
+    """
+    활성 주문을 메모리에 보관하고 SQLite에는 백그라운드에서 기록하는 저장소 (write-through).
+    message_id 외에 (symbol, side, filled) / orderId / symbol 인덱스를 유지하므로
+    신호 처리 중의 중복 확인과 답장 조회가 디스크를 거치지 않고 O(1)로 끝납니다.
+    """
+
+    def __init__(self):
+        # message_id -> 주문 정보
+        self.orders = {}
+        # (symbol, side, filled) -> {message_id}
+        self._by_key = {}
+        # orderId -> message_id
+        self._by_order_id = {}
+        # symbol -> {message_id}
+        self._by_symbol = {}
+
+        # DB 기록은 전용 스레드 하나에서 순서대로 요청하므로 이벤트 루프가 커밋을 기다리지 않습니다.
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='order-store')
+        self._writer_task = None
+        # 아직 커밋되지 않은 이 프로세스의 기록 수와 지금까지의 변경 횟수
+        self._pending_writes = 0
+        self._changes = 0
+
+        # 다른 프로세스의 변경을 확인하기 위한 연결과 마지막으로 불러온 시점의 data_version
+        self._conn = None
+        self._data_version = None
+        self._sync_task = None
+
+    # --- 불러오기 / 시작 ---
+    def load(self, conn):
+        """DB에 저장된 활성 주문을 메모리로 불러옵니다. (프로그램 시작 시)"""
+        self._conn = conn
+        # 읽기 전에 버전을 기록하여, 읽는 도중의 변경은 다음 refresh()에서 다시 반영되게 합니다.
+        self._data_version = get_data_version()
+        self._replace(get_active_orders(conn).values())
+        return self.orders
+
+    def _replace(self, orders):
+        self.orders.clear()
+        self._by_key.clear()
+        self._by_order_id.clear()
+        self._by_symbol.clear()
+        for order_info in orders:
+            self._index(order_info)
+
+    async def refresh(self):
+        """
+        다른 프로세스(따로 실행한 bot.py의 /pnl 처리 등)가 DB를 바꿨으면 활성 주문을 다시 불러옵니다.
+        data_version은 기록 스레드의 연결에서 읽으므로 이 프로세스 자신의 커밋으로는 바뀌지 않으며,
+        버전 확인과 다시 읽기는 워커 스레드에서 실행되어 이벤트 루프를 막지 않습니다.
+        이 프로세스의 변경이 아직 기록 중이거나 읽는 도중 생겼으면 메모리가 DB보다 최신이므로 다음 확인으로 미룹니다.
+        다시 불러왔으면 True를 반환합니다.
+        """
+        if self._conn is None or self._pending_writes:
+            return False
+        changes = self._changes
+        data_version = await asyncio.to_thread(get_data_version)
+        if data_version == self._data_version:
+            return False
+        with latency_tracker.span('db.active_order_reload'):
+            orders = await asyncio.to_thread(get_active_orders, self._conn)
+        if self._pending_writes or self._changes != changes:
+            return False
+        self._data_version = data_version
+        self._replace(orders.values())
+        return True
+
+    def start_sync(self, interval=ACTIVE_ORDER_SYNC_INTERVAL):
+        """
+        다른 프로세스의 변경을 주기적으로 확인하는 백그라운드 태스크를 시작합니다.
+        제어 봇(bot.py)을 따로 실행하여 활성 주문을 바꾸는 프로세스가 둘일 때만 필요합니다.
+        """
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.create_task(self._sync_loop(interval))
+        return self._sync_task
+
+    async def _sync_loop(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"⚠️ 활성 주문 동기화 실패: {e}")
+
+    def start(self):
+        """DB 기록 태스크를 시작합니다."""
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.create_task(self._writer_loop())
+
+    async def flush(self):
+        """대기 중인 DB 기록이 모두 끝날 때까지 기다립니다."""
+        if self._writer_task is not None and not self._writer_task.done():
+            await self._queue.join()
+
+    # --- 조회 (네트워크 / 디스크 접근 없음) ---
+    def get(self, message_id):
+        return self.orders.get(message_id)
+
+    def __contains__(self, message_id):
+        return message_id in self.orders
+
+    def find_open(self, symbol, side):
+        """같은 종목 / 방향의 미청산 주문이 있으면 하나를 반환합니다."""
+        message_ids = self._by_key.get((symbol, side, False))
+        if not message_ids:
+            return None
+        return self.orders[next(iter(message_ids))]
+
+    def get_by_order_id(self, order_id):
+        message_id = self._by_order_id.get(order_id)
+        return self.orders.get(message_id) if message_id is not None else None
+
+    def for_symbol(self, symbol):
+        """종목의 모든 활성 주문 목록을 반환합니다."""
+        return [self.orders[message_id] for message_id in self._by_symbol.get(symbol, ())]
+
+    # --- 변경 (메모리에 바로 반영하고 DB 기록은 큐에 넣음) ---
+    def put(self, order_info):
+        """주문을 저장합니다. 같은 message_id가 있으면 교체합니다."""
+        self._unindex(order_info['message_id'])
+        self._index(dict(order_info))
+        self._enqueue(save_active_order, dict(order_info))
+
+    def set_filled(self, message_id, status):
+        order_info = self.orders.get(message_id)
+        if order_info is not None:
+            self._unindex(message_id)
+            order_info['filled'] = bool(status)
+            self._index(order_info)
+        self._enqueue(update_filled_status, message_id, status)
+
+    def remove(self, message_id):
+        self._unindex(message_id)
+        self._enqueue(delete_active_order, message_id)
+
+    # --- 내부 ---
+    def _enqueue(self, operation, *args):
+        self._pending_writes += 1
+        self._changes += 1
+        self._queue.put_nowait((operation, *args))
+
+    def _index(self, order_info):
+        message_id = order_info['message_id']
+        order_info['filled'] = bool(order_info['filled'])
+        self.orders[message_id] = order_info
+        self._by_key.setdefault((order_info['symbol'], order_info['side'], order_info['filled']), set()).add(message_id)
+        self._by_symbol.setdefault(order_info['symbol'], set()).add(message_id)
+        if order_info.get('orderId'):
+            self._by_order_id[order_info['orderId']] = message_id
+
+    def _unindex(self, message_id):
+        order_info = self.orders.pop(message_id, None)
+        if order_info is None:
+            return
+        key = (order_info['symbol'], order_info['side'], order_info['filled'])
+        self._discard(self._by_key, key, message_id)
+        self._discard(self._by_symbol, order_info['symbol'], message_id)
+        if self._by_order_id.get(order_info.get('orderId')) == message_id:
+            del self._by_order_id[order_info['orderId']]
+
+    @staticmethod
+    def _discard(index, key, message_id):
+        message_ids = index.get(key)
+        if message_ids is None:
+            return
+        message_ids.discard(message_id)
+        if not message_ids:
+            del index[key]
+
+    def _write(self, operation, *args):
+        # database_manager의 기록기가 커밋을 마칠 때까지 이 스레드에서 기다립니다.
+        operation(get_db_connection(), *args)
+
+    async def _writer_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            operation, *args = await self._queue.get()
+            try:
+                with latency_tracker.span('db.active_order_write'):
+                    await loop.run_in_executor(self._executor, self._write, operation, *args)
+            except Exception as e:
+                print(f"⚠️ 활성 주문 DB 기록 실패 ({operation.__name__}): {e}")
+            finally:
+                self._pending_writes -= 1
+                self._queue.task_done()
+
+
+# 프로세스 전체에서 공유하는 활성 주문 저장소
+order_store = ActiveOrderStore()
+
+__all__ = ['ActiveOrderStore', 'order_store', 'ACTIVE_ORDER_SYNC_INTERVAL']
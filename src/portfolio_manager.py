@@ -2,14 +2,16 @@ import json
 import os
 from datetime import datetime, timedelta
 from utils import MESSAGES
-from database_manager import record_trade_result_db, get_db_connection
+from database_manager import record_trade_result_db, get_db_connection, get_trade_summary
 
 def record_trade_result(conn, trade_data): # ✅ conn 인자 추가
     """
     거래 결과를 데이터베이스에 기록합니다.
     """
     try:
-        record_trade_result_db(conn, trade_data) # ✅ conn 인자 전달
+        if not record_trade_result_db(conn, trade_data): # ✅ conn 인자 전달
+            print(f"ℹ️ 이미 저장된 거래 기록입니다. 건너뜁니다. ({trade_data['symbol']})")
+            return
 
         # 콘솔에 이번 거래 로그 출력
         print("\n" + "="*30)
@@ -23,33 +25,29 @@ def record_trade_result(conn, trade_data): # ✅ conn 인자 추가
         print(f"⚠️ 거래 기록을 데이터베이스에 저장하는 중 오류 발생: {e}")
 
 
+# 기간별 리포트가 포함하는 범위 (현재 시각 기준)
+REPORT_PERIODS = {
+    'day': timedelta(days=1),
+    'week': timedelta(days=7),
+    'month': timedelta(days=30),
+}
+
 def generate_report(conn, period='all'): # ✅ conn 인자 추가
     """
     거래 기록을 기반으로 통계 리포트를 생성합니다.
-    period: 'all' (전체), 'daily', 'weekly' 등
+    period: 'all' (전체), 'day', 'week', 'month'
+    시간 / 종목 / 방향별 집계 테이블(trade_rollup)과 created_ts 인덱스 범위 조회만 사용합니다.
     """
-    cursor = conn.cursor()
-    
-    query = "SELECT * FROM trade_log"
-    
-    if period == 'day':
-        # SQLite에서 현재 시점으로부터 1일 전까지의 데이터 조회
-        query += " WHERE created_at >= strftime('%Y-%m-%d %H:%M:%S', 'now', '-1 day')"
-    elif period == 'week':
-        # SQLite에서 현재 시점으로부터 7일 전까지의 데이터 조회
-        query += " WHERE created_at >= strftime('%Y-%m-%d %H:%M:%S', 'now', '-7 day')"
+    since_ts = None
+    if period in REPORT_PERIODS:
+        since_ts = round((datetime.now() - REPORT_PERIODS[period]).timestamp() * 1000)
 
-    cursor.execute(query)
-    logs = cursor.fetchall()
+    total_trades, win_trades, total_pnl = get_trade_summary(conn, since_ts)
 
-    if not logs:
+    if not total_trades:
         return MESSAGES['no_trades_in_period']
 
-    total_pnl = sum(log['pnl'] for log in logs)
-    win_trades = sum(1 for log in logs if log['pnl'] > 0)
-    total_trades = len(logs)
     win_rate = (win_trades / total_trades) * 100 if total_trades > 0 else 0
-    print("running")
     
     report_message = (
         f"{MESSAGES['report_title'].format(period=period.capitalize())}\n\n"
@@ -0,0 +1,234 @@
+import asyncio
+import math
+import os
+import time
+from dotenv import load_dotenv
+from bybit_gateway import bybit_gateway, POSITION_PAGE_LIMIT
+from private_stream import private_stream
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+# 스트림 누락(재접속 등)에 대비해 전체 포지션을 REST로 다시 맞추는 주기 (초)
+POSITION_RESYNC_INTERVAL = float(os.getenv('POSITION_RESYNC_INTERVAL', '60'))
+
+# 스트림이 끊겼을 때 REST 폴링 주기의 최소 / 최대값 (초)
+POSITION_POLL_MIN_INTERVAL = float(os.getenv('POSITION_POLL_MIN_INTERVAL', '1'))
+POSITION_POLL_MAX_INTERVAL = float(os.getenv('POSITION_POLL_MAX_INTERVAL', '10'))
+
+# 요청 여유가 이 비율 아래로 떨어지면 폴링 주기를 늘립니다.
+POSITION_POLL_HEADROOM_FLOOR = 0.1
+
+
+class PositionTracker:
+    """
+    모든 종목의 포지션 크기를 한 곳에서 추적하고, 포지션이 열렸다가 닫히면
+    해당 종목을 구독 중인 거래(message_id)들에게 청산 이벤트를 전달합니다.
+    비공개 WebSocket의 position / execution 토픽으로 갱신되며,
+    하나의 폴링 태스크가 틱마다 전체 포지션 목록(모든 페이지)을 받아 다시 맞춥니다.
+    스트림이 끊기면 폴링 주기를 열린 거래 수와 남은 요청 여유에 맞춰 줄입니다.
+    """
+
+    def __init__(self, gateway, stream, resync_interval=POSITION_RESYNC_INTERVAL,
+                 min_interval=POSITION_POLL_MIN_INTERVAL, max_interval=POSITION_POLL_MAX_INTERVAL):
+        self.gateway = gateway
+        self.stream = stream
+        self.resync_interval = resync_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        # (symbol, positionIdx) -> 포지션 데이터
+        self.positions = {}
+        # symbol -> 마지막 체결 시각 (ms)
+        self.last_execution_ms = {}
+        # symbol -> 포지션이 열린 것을 처음 확인한 시각 (ms). 청산 후에도 다음 진입 전까지 유지합니다.
+        self.opened_ms = {}
+        self._open_symbols = set()
+        # symbol -> {message_id: {'was_open': bool, 'future': Future}}
+        self._subscribers = {}
+        self._poll_task = None
+        self._last_poll = 0.0
+        # 마지막 재동기화에 필요했던 포지션 목록 페이지 수 (폴링 한 번에 드는 REST 호출 수)
+        self._snapshot_pages = 1
+
+        stream.add_handler('position', self._on_position_message)
+        stream.add_handler('execution', self._on_execution_message)
+
+    @property
+    def stream_connected(self):
+        return self.stream.connected
+
+    async def start(self):
+        """스트림에 접속하고, 현재 포지션을 한 번 불러온 뒤 폴링 태스크를 시작합니다."""
+        try:
+            await self.stream.start()
+        except Exception as e:
+            print(f"⚠️ 비공개 스트림 연결 실패. REST 재동기화로만 포지션을 추적합니다: {e}")
+
+        try:
+            await self.resync()
+        except Exception as e:
+            print(f"⚠️ 포지션 초기 동기화 실패: {e}")
+
+        if self._poll_task is None or self._poll_task.done():
+            self._poll_task = asyncio.create_task(self._poll_loop())
+
+    def is_fresh(self):
+        """스트림이 연결되어 있거나 마지막 REST 재동기화가 재동기화 주기 이내이면 True"""
+        if self.stream_connected:
+            return True
+        return self._last_poll > 0 and time.monotonic() - self._last_poll <= self.resync_interval
+
+    async def open_positions(self):
+        """열린 포지션 목록을 반환합니다. 캐시가 최신이 아니면 (추적기가 시작되지 않은 프로세스 등) REST로 한 번 맞춘 뒤 반환합니다."""
+        if not self.is_fresh():
+            await self.resync()
+        return [position for position in self.positions.values() if float(position.get('size') or 0) > 0]
+
+    def size(self, symbol):
+        """종목의 현재 포지션 크기 합계를 반환합니다. (네트워크 호출 없음)"""
+        return sum(
+            float(position.get('size') or 0)
+            for (position_symbol, _), position in self.positions.items()
+            if position_symbol == symbol
+        )
+
+    def open_symbols(self):
+        """현재 포지션이 열려 있는 종목 목록을 반환합니다."""
+        return {symbol for (symbol, _), position in self.positions.items() if float(position.get('size') or 0) > 0}
+
+    def subscribe(self, symbol, message_id):
+        """
+        종목의 청산 이벤트를 기다릴 Future를 등록하고 반환합니다.
+        이미 포지션이 열려 있으면 '열림' 상태에서 시작합니다.
+        """
+        loop = asyncio.get_running_loop()
+        subscription = {'was_open': self.size(symbol) > 0, 'future': loop.create_future()}
+        self._subscribers.setdefault(symbol, {})[message_id] = subscription
+        return subscription['future']
+
+    def unsubscribe(self, symbol, message_id):
+        subscribers = self._subscribers.get(symbol)
+        if not subscribers:
+            return
+        subscription = subscribers.pop(message_id, None)
+        if subscription and not subscription['future'].done():
+            subscription['future'].cancel()
+        if not subscribers:
+            self._subscribers.pop(symbol, None)
+
+    async def wait_for_close(self, symbol, message_id):
+        """포지션이 열렸다가 닫힐 때까지 기다린 뒤 마지막 포지션 데이터를 반환합니다."""
+        future = self.subscribe(symbol, message_id)
+        try:
+            return await future
+        finally:
+            self.unsubscribe(symbol, message_id)
+
+    def apply_positions(self, positions, snapshot_symbols=None):
+        """
+        포지션 목록을 반영하고 청산된 종목을 구독자에게 알립니다.
+        snapshot_symbols가 주어지면 해당 목록에 없는 기존 포지션은 크기 0으로 간주합니다. (전체 스냅샷일 때)
+        """
+        touched = set()
+        if snapshot_symbols is not None:
+            for key in list(self.positions):
+                if key[0] not in snapshot_symbols:
+                    self.positions[key] = dict(self.positions[key], size='0')
+                    touched.add(key[0])
+
+        for position in positions:
+            key = (position['symbol'], int(position.get('positionIdx') or 0))
+            self.positions[key] = position
+            touched.add(position['symbol'])
+
+        for symbol in touched:
+            self._track_open(symbol)
+            self._notify(symbol)
+
+    def _track_open(self, symbol):
+        if self.size(symbol) > 0:
+            if symbol not in self._open_symbols:
+                self._open_symbols.add(symbol)
+                self.opened_ms[symbol] = int(time.time() * 1000)
+        else:
+            self._open_symbols.discard(symbol)
+
+    def _notify(self, symbol):
+        subscribers = self._subscribers.get(symbol)
+        if not subscribers:
+            return
+
+        size = self.size(symbol)
+        for subscription in subscribers.values():
+            if subscription['future'].done():
+                continue
+            if size > 0:
+                subscription['was_open'] = True
+            elif subscription['was_open']:
+                closed = [position for (position_symbol, _), position in self.positions.items() if position_symbol == symbol]
+                subscription['future'].set_result(closed[0] if closed else {'symbol': symbol, 'size': '0'})
+
+    def _on_position_message(self, message):
+        positions = [position for position in message.get('data', []) if position.get('category', 'linear') == 'linear']
+        self.apply_positions(positions)
+
+    def _on_execution_message(self, message):
+        for execution in message.get('data', []):
+            exec_time = int(execution.get('execTime') or 0)
+            symbol = execution.get('symbol')
+            if symbol and exec_time > self.last_execution_ms.get(symbol, 0):
+                self.last_execution_ms[symbol] = exec_time
+
+    async def resync(self):
+        """
+        USDT 무기한 포지션 전체를 (모든 페이지를 받아) 다시 맞춥니다.
+        전체 목록을 받은 경우에만 스냅샷으로 적용하므로, 목록에 없는 포지션을 청산으로 잘못 판단하지 않습니다.
+        """
+        positions_info = await self.gateway.get_all_positions(category="linear", settleCoin="USDT")
+        if positions_info['retCode'] != 0:
+            raise RuntimeError(f"포지션 조회 실패: {positions_info['retMsg']}")
+        positions = positions_info['result']['list']
+        self._last_poll = time.monotonic()
+        self._snapshot_pages = max(1, math.ceil(len(positions) / POSITION_PAGE_LIMIT))
+        self.apply_positions(positions, snapshot_symbols={position['symbol'] for position in positions})
+
+    def poll_interval(self):
+        """
+        다음 REST 폴링까지의 간격(초)을 계산합니다.
+        - 스트림 연결 중: 누락 대비 재동기화 주기
+        - 스트림 끊김: 감시 중인 종목이 많을수록 짧게, 요청 여유가 적을수록 길게
+          (포지션 목록이 여러 페이지이면 폴링 한 번에 그만큼 호출하므로 간격도 페이지 수만큼 늘립니다)
+        """
+        if self.stream_connected:
+            return self.resync_interval
+
+        watched_symbols = len(self._subscribers)
+        if not watched_symbols:
+            return self.max_interval
+
+        interval = max(self.min_interval, self.max_interval / watched_symbols) * self._snapshot_pages
+        headroom = max(self.gateway.headroom(), POSITION_POLL_HEADROOM_FLOOR)
+        return min(interval / headroom, self.resync_interval)
+
+    async def _poll_loop(self):
+        # 스트림 상태 / 감시 종목 변화에 빨리 반응하도록 짧게 깨어나서 간격을 다시 계산합니다.
+        while True:
+            await asyncio.sleep(self.min_interval)
+            if time.monotonic() - self._last_poll < self.poll_interval():
+                continue
+            try:
+                await self.resync()
+            except Exception as e:
+                self._last_poll = time.monotonic()
+                print(f"⚠️ 포지션 재동기화 실패: {e}")
+
+    def closed_time_window(self, symbol, lookback_ms=5 * 60 * 1000):
+        """청산 손익 조회에 사용할 (시작, 끝) 시각(ms)을 반환합니다."""
+        closed_timestamp = max(int(time.time() * 1000), self.last_execution_ms.get(symbol, 0))
+        return closed_timestamp - lookback_ms, closed_timestamp + 5000
+
+
+# 프로세스 전체에서 공유하는 포지션 추적기
+position_tracker = PositionTracker(bybit_gateway, private_stream)
+
+__all__ = ['PositionTracker', 'position_tracker']
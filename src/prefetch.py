@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+from account_state import account_state
+from instrument_cache import instrument_cache
+from latency_tracker import latency_tracker
+from leverage_cache import leverage_cache
+from message_parser import guess_signal_symbol
+from symbol_resolver import symbol_resolver
+from ticker_cache import ticker_cache
+
+
+class SignalPrefetcher:
+    """
+    신호처럼 보이는 메시지가 도착하면 전체 파싱과 중복 확인이 끝나기 전에
+    주문에 필요한 종목 정보 / 시세 / 레버리지 / 잔고를 동시에 불러오기 시작합니다.
+    각 캐시는 진행 중인 조회를 공유하므로, 주문 실행 쪽은 같은 캐시를 호출하기만 하면
+    이미 시작된 (또는 끝난) 조회 결과를 그대로 사용합니다.
+    """
+
+    def __init__(self):
+        # 진행 중인 선조회 태스크 (가비지 컬렉션으로 사라지지 않도록 참조 유지)
+        self._tasks = set()
+
+    def start(self, message_text):
+        """
+        신호처럼 보이면 선조회 태스크를 시작하여 반환합니다. (아니면 None)
+        신호가 아닌 것으로 판명되면 반환된 태스크를 cancel()하면 됩니다.
+        진행 중인 캐시 조회는 shield로 보호되므로 취소해도 다른 호출자에게 영향이 없습니다.
+        """
+        channel_symbol = guess_signal_symbol(message_text)
+        if channel_symbol is None:
+            return None
+        task = asyncio.create_task(self._prefetch(channel_symbol))
+        self._tasks.add(task)
+        task.add_done_callback(self._on_done)
+        return task
+
+    def _on_done(self, task):
+        # 아무도 await하지 않는 태스크이므로 여기서 결과를 확인합니다.
+        # (취소 / 실패가 "Task exception was never retrieved"로 남지 않게 함)
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            print(f"⚠️ 신호 선조회 실패 (주문 실행 시 다시 조회): {error}")
+
+    async def _prefetch(self, channel_symbol):
+        started_at = time.perf_counter()
+        # 새로 상장된 종목처럼 매핑에 없는 경우 전체 목록을 다시 불러오는 일은 주문 실행 쪽에 맡깁니다.
+        resolved = symbol_resolver.cached(channel_symbol)
+        lookups = [account_state.get_coin('USDT')]
+        if resolved:
+            symbol = resolved[0]
+            lookups += [
+                instrument_cache.fetch(symbol),
+                ticker_cache.get(symbol),
+                leverage_cache.current(symbol),
+            ]
+        # 실패한 조회는 주문 실행 시 다시 시도되므로 여기서는 무시합니다.
+        await asyncio.gather(*lookups, return_exceptions=True)
+        latency_tracker.record('prefetch.fetch', time.perf_counter() - started_at)
+
+
+# 프로세스 전체에서 공유하는 신호 선조회기
+signal_prefetcher = SignalPrefetcher()
+
+__all__ = ['SignalPrefetcher', 'signal_prefetcher']
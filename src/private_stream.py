@@ -0,0 +1,80 @@
+import asyncio
+import os
+from dotenv import load_dotenv
+from pybit.unified_trading import WebSocket
+from api_clients import BYBIT_API_KEY, BYBIT_SECRET_KEY, BYBIT_TESTNET
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+# 비공개 WebSocket 주소 (로컬 테스트 서버를 사용할 때만 지정, 예: ws://127.0.0.1:8765/v5/private)
+BYBIT_WS_PRIVATE_URL = os.getenv('BYBIT_WS_PRIVATE_URL')
+
+
+class _PrivateWebSocket(WebSocket):
+    """접속 주소를 직접 지정할 수 있는 pybit 비공개 WebSocket"""
+
+    def __init__(self, url_override=None, **kwargs):
+        self._url_override = url_override
+        super().__init__(channel_type="private", **kwargs)
+
+    def _connect(self, url):
+        super()._connect(self._url_override or url)
+
+
+class PrivateStream:
+    """
+    Bybit 비공개 WebSocket 연결 하나를 여러 모듈이 함께 사용하도록 관리합니다.
+    토픽별 핸들러는 WebSocket 스레드가 아닌 이벤트 루프에서 호출됩니다.
+    """
+
+    def __init__(self, api_key=BYBIT_API_KEY, api_secret=BYBIT_SECRET_KEY, url=BYBIT_WS_PRIVATE_URL):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.url = url
+        self.ws = None
+        self._handlers = {}
+        self._loop = None
+
+    def add_handler(self, topic, handler):
+        """토픽('position', 'execution', 'wallet' 등)의 메시지를 받을 핸들러를 등록합니다. start() 전에 호출해야 합니다."""
+        self._handlers.setdefault(topic, []).append(handler)
+
+    @property
+    def connected(self):
+        return self.ws is not None and self.ws.is_connected()
+
+    async def start(self):
+        """WebSocket에 접속하고 등록된 토픽을 구독합니다. (접속 대기는 별도 스레드에서 처리)"""
+        if self.ws is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        await asyncio.to_thread(self._connect_and_subscribe)
+        print(f"✅ Bybit 비공개 스트림 연결 완료 (토픽: {', '.join(self._handlers)})")
+
+    def _connect_and_subscribe(self):
+        ws = _PrivateWebSocket(
+            url_override=self.url,
+            testnet=BYBIT_TESTNET,
+            api_key=self.api_key,
+            api_secret=self.api_secret
+        )
+        for topic in self._handlers:
+            ws.subscribe(topic, callback=lambda message, topic=topic: self._dispatch(topic, message))
+        self.ws = ws
+
+    def _dispatch(self, topic, message):
+        # WebSocket 스레드에서 호출되므로 이벤트 루프로 넘겨서 처리합니다.
+        for handler in self._handlers.get(topic, []):
+            self._loop.call_soon_threadsafe(handler, message)
+
+    def stop(self):
+        if self.ws is not None:
+            self.ws.exit()
+            self.ws = None
+
+
+# 프로세스 전체에서 공유하는 비공개 스트림
+private_stream = PrivateStream()
+
+__all__ = ['PrivateStream', 'private_stream', 'BYBIT_WS_PRIVATE_URL']
@@ -0,0 +1,300 @@
+"""
+녹화된 채널 메시지(JSONL)를 실제 main.py 핸들러로 재생하는 오프라인 벤치마크 도구.
+가상 거래소(SimulatedExchange), 임시 SQLite DB, 전송하지 않는 알림 봇을 사용하므로 네트워크 없이 실행됩니다.
+
+사용법 (src 폴더에서):
+    python replay.py events.jsonl              # 기록된 시간 간격 그대로 재생
+    python replay.py events.jsonl --speed 10   # 10배속
+    python replay.py events.jsonl --fast       # 대기 없이 최대한 빠르게
+    python replay.py events.jsonl --fast --latency 0.05 --json report.json
+
+입력 파일 형식 (한 줄에 이벤트 하나):
+    {"t": 0.0, "type": "new", "id": 101, "text": "$BTC Long ..."}
+    {"t": 1.5, "type": "reply", "id": 102, "reply_to": 101, "text": "Cancel"}
+    {"t": 2.0, "type": "edit", "id": 101, "text": "$BTC Long ... (수정본)"}
+    {"t": 3.0, "type": "price", "symbol": "BTCUSDT", "price": 66000}
+    - t: 첫 이벤트 기준 경과 시간 (초)
+    - type: new / reply / edit / price (cancel, close_all은 new와 같이 처리)
+    - date: (선택) 채널에 게시된 시각 (epoch 초). 없으면 재생 시각을 사용합니다.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# 핸들러 재생 시 실제 텔레그램 / Bybit 설정이 없어도 모듈을 불러올 수 있도록 기본값을 채웁니다.
+REPLAY_ENV_DEFAULTS = {
+    'TELEGRAM_API_ID': '1',
+    'TELEGRAM_API_HASH': 'replay',
+    'BYBIT_API_KEY': 'replay',
+    'BYBIT_SECRET_KEY': 'replay',
+    'TELE_BYBIT_BOT_TOKEN': '0:replay',
+    'TARGET_CHANNEL_ID': '-1',
+    'TEST_CHANNEL_ID': '-2',
+    'TELE_BYBIT_LOG_CHAT_ID': '1',
+    'LANG_CODE': 'ko',
+}
+
+NEW_MESSAGE_TYPES = ('new', 'reply', 'cancel', 'close_all')
+
+
+def configure_environment(workdir):
+    """
+    DB, 심볼 매핑, 지연 시간 요약이 모두 임시 폴더에 저장되도록 환경 변수를 설정합니다.
+    모듈이 불러올 때 경로를 읽으므로 main을 import하기 전에 호출해야 합니다.
+    """
+    for key, value in REPLAY_ENV_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+    os.environ['GDRIVE_PATH'] = workdir
+    os.environ['DB_LOCAL_PATH'] = ''
+    os.environ['SYMBOL_MAP_PATH'] = os.path.join(workdir, 'symbol_map.json')
+    os.environ['LATENCY_DUMP_PATH'] = os.path.join(workdir, 'latency.json')
+
+
+def load_events(path):
+    events = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_no} JSON 형식 오류: {e}") from e
+    events.sort(key=lambda event: event.get('t', 0))
+    return events
+
+
+class ReplayMessage:
+    """Telethon Message 중 핸들러가 사용하는 속성만 갖춘 메시지."""
+
+    def __init__(self, text, date=None):
+        self.message = text
+        self.text = text
+        self.date = datetime.fromtimestamp(date, timezone.utc) if date else datetime.now(timezone.utc)
+
+
+class ReplayEvent:
+    """Telethon NewMessage / MessageEdited 이벤트 대용."""
+
+    def __init__(self, record):
+        self.id = record.get('id')
+        self.reply_to_msg_id = record.get('reply_to')
+        self.is_reply = self.reply_to_msg_id is not None
+        self.message = ReplayMessage(record.get('text', ''), record.get('date'))
+
+
+class ReplayTelegramClient:
+    """재생한 메시지를 기억해 두었다가 get_messages()로 돌려주는 Telethon 클라이언트 대용."""
+
+    def __init__(self):
+        self.messages = {}
+
+    def remember(self, event):
+        self.messages[event.id] = event.message
+
+    async def get_messages(self, chat, ids=None):
+        return self.messages.get(ids)
+
+
+class RecordingBot:
+    """텔레그램으로 보내지 않고 알림을 기록만 하는 봇."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, parse_mode=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+def collect_symbols(events, extra_symbols=()):
+    """가상 거래소에 등록할 종목을 이벤트 내용에서 모읍니다."""
+    from message_parser import parse_telegram_message, parse_cancel_message
+
+    symbols = set(extra_symbols)
+    for record in events:
+        if record.get('symbol'):
+            symbols.add(record['symbol'])
+        text = record.get('text')
+        if not text:
+            continue
+        order_info = parse_telegram_message(text)
+        if order_info:
+            symbols.add(order_info['symbol'])
+        cancel_symbol = parse_cancel_message(text)
+        if cancel_symbol:
+            symbols.add(cancel_symbol)
+    return symbols
+
+
+def initial_prices(events):
+    """각 종목의 첫 가격 이벤트, 없으면 첫 신호의 진입가를 시작 가격으로 사용합니다."""
+    from message_parser import parse_telegram_message
+
+    prices = {}
+    for record in events:
+        if record.get('type') == 'price':
+            prices.setdefault(record['symbol'], float(record['price']))
+        elif record.get('text'):
+            order_info = parse_telegram_message(record['text'])
+            if order_info and order_info.get('entry_price'):
+                prices.setdefault(order_info['symbol'], float(order_info['entry_price']))
+    return prices
+
+
+async def run_replay(events, args):
+    import main
+    from bybit_gateway import bybit_gateway
+    from database_manager import get_db_connection, setup_database, close_database
+    from instrument_cache import instrument_cache
+    from latency_tracker import LatencyTracker, latency_tracker
+    from notifier import notifier
+    from order_store import order_store
+    from position_tracker import position_tracker
+    from simulated_exchange import SimulatedExchange
+    from execution_lanes import execution_lanes
+    from trade_executor import background_tasks
+
+    exchange = SimulatedExchange(
+        collect_symbols(events, args.symbols), prices=initial_prices(events),
+        balance=args.balance, latency=args.latency
+    )
+    bybit_gateway.client = exchange
+    telegram_client = main.client = ReplayTelegramClient()
+    bot = notifier.bot = RecordingBot()
+    handler_latency = LatencyTracker(dump_path=os.path.join(args.workdir, 'handler_latency.json'))
+
+    db_conn = get_db_connection()
+    setup_database(db_conn)
+    order_store.load(db_conn)
+    order_store.start()
+    await instrument_cache.warm_up()
+
+    async def run_handler(name, handler, event):
+        with handler_latency.span(name):
+            await handler(event, db_conn)
+
+    async def dispatch(record):
+        event_type = record.get('type', 'new')
+        if event_type == 'price':
+            exchange.set_price(record['symbol'], float(record['price']))
+        else:
+            event = ReplayEvent(record)
+            telegram_client.remember(event)
+            if event_type == 'edit':
+                await run_handler('handle_edited_message', main.handle_edited_message, event)
+            elif event_type in NEW_MESSAGE_TYPES:
+                # 일반 메시지와 답장 모두 디스패처 하나가 분류하여 처리합니다.
+                await run_handler('my_event_handler', main.my_event_handler, event)
+            else:
+                print(f"⚠️ 알 수 없는 이벤트 종류를 건너뜁니다: {event_type}")
+                return
+        # 비공개 스트림 대신 매 이벤트 후 포지션을 다시 조회하여 청산 모니터에 알립니다.
+        await position_tracker.resync()
+
+    started_at = time.perf_counter()
+    if args.fast:
+        for record in events:
+            await dispatch(record)
+    else:
+        # Telethon처럼 이벤트마다 별도 태스크로 실행하여 처리 중에도 다음 이벤트를 받습니다.
+        tasks = []
+        first_t = events[0].get('t', 0) if events else 0
+        for record in events:
+            delay = started_at + (record.get('t', 0) - first_t) / args.speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(dispatch(record)))
+        await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started_at
+
+    await execution_lanes.join()
+    # 남은 청산 모니터 등 백그라운드 작업 정리
+    if background_tasks:
+        await asyncio.wait(set(background_tasks), timeout=args.drain_timeout)
+        for task in set(background_tasks):
+            task.cancel()
+    await order_store.flush()
+    await notifier.flush()
+
+    trade_count = db_conn.execute("SELECT COUNT(*) FROM trade_log").fetchone()[0]
+    report = {
+        'events': len(events),
+        'elapsed_seconds': round(elapsed, 3),
+        'events_per_second': round(len(events) / elapsed, 2) if elapsed > 0 else None,
+        'handlers': handler_latency.summary(),
+        'stages': latency_tracker.summary(),
+        'gauges': latency_tracker.gauges(),
+        'active_orders': [
+            {'message_id': message_id, 'symbol': order['symbol'], 'side': order['side'], 'filled': order['filled']}
+            for message_id, order in order_store.orders.items()
+        ],
+        'exchange': exchange.state(),
+        'trade_log_rows': trade_count,
+        'notifications': len(bot.sent),
+    }
+    close_database()
+    return report
+
+
+def print_report(report):
+    from latency_tracker import format_summary, format_gauges
+
+    print("\n===== 재생 결과 =====")
+    print(f"이벤트: {report['events']}건 / {report['elapsed_seconds']}초 ({report['events_per_second']} events/sec)")
+    print("\n[핸들러별 지연 시간]")
+    print(format_summary(report['handlers']))
+    print("\n[구간별 지연 시간]")
+    print(format_summary(report['stages']))
+    if report['gauges']:
+        print("\n[실행 레인]")
+        print(format_gauges(report['gauges']))
+    exchange = report['exchange']
+    print("\n[최종 상태]")
+    print(f"활성 주문: {len(report['active_orders'])}건")
+    for order in report['active_orders']:
+        print(f"  #{order['message_id']} {order['symbol']} {order['side']} filled={order['filled']}")
+    print(f"포지션: {len(exchange['positions'])}건")
+    for position in exchange['positions']:
+        print(f"  {position['symbol']} {position['side']} size={position['size']} avg={position['avgPrice']}")
+    print(f"대기 주문: {len(exchange['open_orders'])}건, 청산 기록: {exchange['closed_trades']}건, 잔고: {exchange['balance']}")
+    print(f"trade_log: {report['trade_log_rows']}건, 알림: {report['notifications']}건, 거래소 호출: {exchange['requests']}회")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="녹화된 채널 메시지를 가상 거래소로 재생합니다.")
+    parser.add_argument('events', help="이벤트 JSONL 파일 경로")
+    parser.add_argument('--speed', type=float, default=1.0, help="재생 배속 (기본 1.0 = 기록된 속도)")
+    parser.add_argument('--fast', action='store_true', help="대기 없이 이벤트를 차례로 최대한 빠르게 처리")
+    parser.add_argument('--latency', type=float, default=0.0, help="가상 거래소 호출당 지연 시간 (초)")
+    parser.add_argument('--balance', type=float, default=10000.0, help="가상 계좌 USDT 잔고")
+    parser.add_argument('--symbols', type=lambda value: value.split(','), default=[], help="추가로 등록할 종목 (쉼표 구분)")
+    parser.add_argument('--drain-timeout', type=float, default=5.0, help="재생 후 백그라운드 작업을 기다리는 최대 시간 (초)")
+    parser.add_argument('--json', help="결과를 JSON 파일로도 저장")
+    args = parser.parse_args(argv)
+    if args.speed <= 0:
+        parser.error("--speed는 0보다 커야 합니다.")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    events = load_events(args.events)
+    with tempfile.TemporaryDirectory(prefix='replay-') as workdir:
+        args.workdir = workdir
+        configure_environment(workdir)
+        report = asyncio.run(run_replay(events, args))
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
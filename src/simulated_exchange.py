@@ -0,0 +1,362 @@
+import itertools
+import threading
+import time
+from pybit.exceptions import InvalidRequestError
+
+# 시뮬레이션에서 사용하는 기본 가격 / 종목 규격
+DEFAULT_PRICE = 100.0
+DEFAULT_LEVERAGE = 10
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+class SimulatedExchange:
+    """
+    pybit HTTP 클라이언트와 같은 메서드 / 응답 형식을 가진 오프라인 가상 거래소.
+    bybit_gateway.client 자리에 넣어 네트워크 없이 주문 흐름을 재생할 때 사용합니다.
+    - 시장가 주문과 가격을 넘어선 지정가 주문은 즉시 체결됩니다.
+    - set_price()로 가격을 바꾸면 대기 중인 지정가 주문 체결, TP / SL 청산이 일어납니다.
+    - 오류는 pybit과 같이 InvalidRequestError로 발생합니다.
+    """
+
+    def __init__(self, symbols, prices=None, balance=10000.0, latency=0.0):
+        self.latency = latency
+        self.balance = float(balance)
+        self.prices = {symbol: DEFAULT_PRICE for symbol in symbols}
+        self.prices.update(prices or {})
+        self.instruments = {symbol: self._make_instrument(symbol) for symbol in self.prices}
+        self.leverage = {}
+        # symbol -> 포지션 (size가 0이면 삭제)
+        self.positions = {}
+        # orderId -> 대기 중인 지정가 주문
+        self.orders = {}
+        self.closed_pnl = []
+        self.request_count = 0
+        self._order_ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _make_instrument(symbol):
+        return {
+            'symbol': symbol,
+            'baseCoin': symbol[:-len('USDT')],
+            'quoteCoin': 'USDT',
+            'settleCoin': 'USDT',
+            'status': 'Trading',
+            'lotSizeFilter': {'qtyStep': '0.001', 'minOrderQty': '0.001', 'maxOrderQty': '1000000'},
+            'priceFilter': {'tickSize': '0.0001', 'minPrice': '0.0001', 'maxPrice': '1000000'},
+            'leverageFilter': {'minLeverage': '1', 'maxLeverage': '100', 'leverageStep': '0.01'},
+        }
+
+    # --- 내부 도우미 ---
+    def _request(self):
+        self.request_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _ok(result):
+        return {'retCode': 0, 'retMsg': 'OK', 'result': result, 'retExtInfo': {}, 'time': _now_ms()}
+
+    @staticmethod
+    def _error(code, message, request=None):
+        raise InvalidRequestError(request=request, message=message, status_code=code, time=_now_ms(), resp_headers=None)
+
+    def _check_symbol(self, symbol):
+        if symbol not in self.instruments:
+            self._error(10001, f"params error: symbol invalid {symbol}")
+
+    def position_view(self, symbol):
+        """종목의 포지션을 Bybit position/list 항목 형식으로 반환합니다. (포지션이 없으면 size '0')"""
+        position = self.positions.get(symbol)
+        if not position:
+            return {
+                'symbol': symbol, 'side': '', 'size': '0', 'avgPrice': '0', 'positionIdx': 0,
+                'leverage': str(self.leverage.get(symbol, DEFAULT_LEVERAGE)),
+                'takeProfit': '', 'stopLoss': '', 'unrealisedPnl': '0', 'markPrice': str(self.prices[symbol])
+            }
+        return {
+            'symbol': symbol,
+            'side': position['side'],
+            'size': str(round(position['size'], 8)),
+            'avgPrice': str(position['avgPrice']),
+            'positionIdx': 0,
+            'leverage': str(self.leverage.get(symbol, DEFAULT_LEVERAGE)),
+            'takeProfit': str(position['takeProfit'] or ''),
+            'stopLoss': str(position['stopLoss'] or ''),
+            'unrealisedPnl': str(self._unrealised_pnl(symbol)),
+            'markPrice': str(self.prices[symbol]),
+        }
+
+    def _unrealised_pnl(self, symbol):
+        position = self.positions.get(symbol)
+        if not position:
+            return 0.0
+        direction = 1 if position['side'] == 'Buy' else -1
+        return (self.prices[symbol] - position['avgPrice']) * position['size'] * direction
+
+    def _fill(self, order, fill_price):
+        """주문을 fill_price에 체결하여 포지션을 열거나 줄입니다."""
+        symbol, side, qty = order['symbol'], order['side'], order['qty']
+        position = self.positions.get(symbol)
+
+        if position and position['side'] != side:
+            # 반대 방향 체결: 포지션 축소 / 청산
+            closed_qty = min(qty, position['size'])
+            self._record_close(position, closed_qty, fill_price, order['orderId'])
+            position['size'] -= closed_qty
+            if position['size'] <= 1e-12:
+                del self.positions[symbol]
+            return
+
+        if order.get('reduceOnly'):
+            return
+
+        if position:
+            total = position['size'] + qty
+            position['avgPrice'] = (position['avgPrice'] * position['size'] + fill_price * qty) / total
+            position['size'] = total
+        else:
+            position = self.positions[symbol] = {
+                'symbol': symbol, 'side': side, 'size': qty, 'avgPrice': fill_price,
+                'takeProfit': None, 'stopLoss': None
+            }
+        if order.get('takeProfit'):
+            position['takeProfit'] = float(order['takeProfit'])
+        if order.get('stopLoss'):
+            position['stopLoss'] = float(order['stopLoss'])
+
+    def _record_close(self, position, qty, exit_price, order_id):
+        direction = 1 if position['side'] == 'Buy' else -1
+        pnl = (exit_price - position['avgPrice']) * qty * direction
+        self.balance += pnl
+        now = _now_ms()
+        self.closed_pnl.append({
+            'symbol': position['symbol'],
+            'orderId': order_id,
+            'side': 'Sell' if position['side'] == 'Buy' else 'Buy',
+            'qty': str(qty),
+            'closedSize': str(qty),
+            'avgEntryPrice': str(position['avgPrice']),
+            'avgExitPrice': str(exit_price),
+            'cumEntryValue': str(position['avgPrice'] * qty),
+            'cumExitValue': str(exit_price * qty),
+            'closedPnl': str(pnl),
+            'openFee': '0',
+            'closeFee': '0',
+            'leverage': str(self.leverage.get(position['symbol'], DEFAULT_LEVERAGE)),
+            'createdTime': str(now),
+            'updatedTime': str(now),
+        })
+
+    @staticmethod
+    def _crosses(side, limit_price, market_price):
+        return market_price <= limit_price if side == 'Buy' else market_price >= limit_price
+
+    # --- 시뮬레이션 제어 ---
+    def set_price(self, symbol, price):
+        """가격을 바꾸고 지정가 체결 / TP / SL 청산을 처리합니다."""
+        with self._lock:
+            self.prices[symbol] = float(price)
+            for order_id, order in list(self.orders.items()):
+                if order['symbol'] == symbol and self._crosses(order['side'], order['price'], price):
+                    del self.orders[order_id]
+                    self._fill(order, order['price'])
+
+            position = self.positions.get(symbol)
+            if not position:
+                return
+            is_long = position['side'] == 'Buy'
+            take_profit, stop_loss = position['takeProfit'], position['stopLoss']
+            hit_tp = take_profit and (price >= take_profit if is_long else price <= take_profit)
+            hit_sl = stop_loss and (price <= stop_loss if is_long else price >= stop_loss)
+            if hit_tp or hit_sl:
+                close_order = {
+                    'orderId': f"sim-{next(self._order_ids)}", 'symbol': symbol,
+                    'side': 'Sell' if is_long else 'Buy', 'qty': position['size'], 'reduceOnly': True
+                }
+                self._fill(close_order, float(price))
+
+    # --- 계좌 ---
+    def wallet_view(self):
+        """계좌 잔고를 Bybit wallet-balance 항목 형식으로 반환합니다."""
+        with self._lock:
+            equity = self.balance + sum(self._unrealised_pnl(symbol) for symbol in self.positions)
+            return {'accountType': 'UNIFIED', 'coin': [
+                {'coin': 'USDT', 'equity': str(equity), 'walletBalance': str(self.balance),
+                 'availableToWithdraw': str(self.balance)}
+            ]}
+
+    def get_wallet_balance(self, **kwargs):
+        self._request()
+        return self._ok({'list': [self.wallet_view()]})
+
+    # --- 시세 / 종목 정보 ---
+    def get_tickers(self, category='linear', symbol=None, **kwargs):
+        self._request()
+        symbols = [symbol] if symbol else list(self.prices)
+        for name in symbols:
+            self._check_symbol(name)
+        return self._ok({'category': category, 'list': [
+            {'symbol': name, 'lastPrice': str(self.prices[name]), 'markPrice': str(self.prices[name]), 'price24hPcnt': '0'}
+            for name in symbols
+        ]})
+
+    def get_instruments_info(self, category='linear', symbol=None, **kwargs):
+        self._request()
+        if symbol:
+            instruments = [self.instruments[symbol]] if symbol in self.instruments else []
+        else:
+            instruments = list(self.instruments.values())
+        return self._ok({'category': category, 'list': instruments, 'nextPageCursor': ''})
+
+    # --- 포지션 ---
+    def get_positions(self, category='linear', symbol=None, settleCoin=None, limit=20, cursor=None, **kwargs):
+        self._request()
+        with self._lock:
+            if symbol:
+                self._check_symbol(symbol)
+                return self._ok({'category': category, 'list': [self.position_view(symbol)]})
+            # Bybit처럼 limit개(기본 20, 최대 200)씩 나눠 주고 다음 페이지 위치를 nextPageCursor로 알려줍니다.
+            symbols = list(self.positions)
+            start = int(cursor or 0)
+            end = start + min(int(limit or 20), 200)
+            return self._ok({
+                'category': category,
+                'list': [self.position_view(name) for name in symbols[start:end]],
+                'nextPageCursor': str(end) if end < len(symbols) else ''
+            })
+
+    def set_leverage(self, symbol, buyLeverage, sellLeverage=None, **kwargs):
+        self._request()
+        self._check_symbol(symbol)
+        leverage = float(buyLeverage)
+        if leverage > float(self.instruments[symbol]['leverageFilter']['maxLeverage']):
+            self._error(10001, "leverage invalid")
+        if self.leverage.get(symbol, DEFAULT_LEVERAGE) == leverage:
+            self._error(110043, "leverage not modified")
+        self.leverage[symbol] = leverage
+        return self._ok({})
+
+    def set_trading_stop(self, symbol, takeProfit=None, stopLoss=None, **kwargs):
+        self._request()
+        with self._lock:
+            position = self.positions.get(symbol)
+            if not position:
+                self._error(10001, "can not set tp/sl/ts for zero position")
+            if takeProfit:
+                position['takeProfit'] = float(takeProfit)
+            if stopLoss:
+                position['stopLoss'] = float(stopLoss)
+        return self._ok({})
+
+    def get_closed_pnl(self, symbol=None, startTime=None, endTime=None, limit=50, **kwargs):
+        self._request()
+        with self._lock:
+            records = [
+                record for record in reversed(self.closed_pnl)
+                if (symbol is None or record['symbol'] == symbol)
+                and (startTime is None or int(record['createdTime']) >= startTime)
+                and (endTime is None or int(record['createdTime']) <= endTime)
+            ]
+        return self._ok({'category': 'linear', 'list': records[:limit], 'nextPageCursor': ''})
+
+    # --- 주문 ---
+    def place_order(self, **kwargs):
+        self._request()
+        return self._place_order(**kwargs)
+
+    def _place_order(self, symbol, side, orderType, qty, price=None, takeProfit=None, stopLoss=None,
+                     reduceOnly=False, **kwargs):
+        self._check_symbol(symbol)
+        with self._lock:
+            order = {
+                'orderId': f"sim-{next(self._order_ids)}", 'symbol': symbol, 'side': side,
+                'orderType': orderType, 'qty': float(qty), 'price': float(price) if price else None,
+                'takeProfit': takeProfit, 'stopLoss': stopLoss, 'reduceOnly': reduceOnly,
+                'createdTime': str(_now_ms())
+            }
+            if order['qty'] <= 0:
+                self._error(10001, "Qty invalid")
+            if reduceOnly and symbol not in self.positions:
+                self._error(110017, "reduce-only order has same side with current position")
+
+            market_price = self.prices[symbol]
+            if orderType == 'Market':
+                self._fill(order, market_price)
+            elif self._crosses(side, order['price'], market_price):
+                self._fill(order, order['price'])
+            else:
+                self.orders[order['orderId']] = order
+            return self._ok({'orderId': order['orderId'], 'orderLinkId': ''})
+
+    def cancel_order(self, **kwargs):
+        self._request()
+        return self._cancel_order(**kwargs)
+
+    def _cancel_order(self, symbol, orderId, **kwargs):
+        with self._lock:
+            order = self.orders.get(orderId)
+            if not order or order['symbol'] != symbol:
+                self._error(110001, "order not exists or too late to cancel")
+            del self.orders[orderId]
+            return self._ok({'orderId': orderId, 'orderLinkId': ''})
+
+    def cancel_all_orders(self, symbol=None, settleCoin=None, **kwargs):
+        self._request()
+        with self._lock:
+            cancelled = [order_id for order_id, order in self.orders.items() if symbol is None or order['symbol'] == symbol]
+            for order_id in cancelled:
+                del self.orders[order_id]
+            return self._ok({'list': [{'orderId': order_id, 'orderLinkId': ''} for order_id in cancelled], 'success': '1'})
+
+    def get_open_orders(self, symbol=None, settleCoin=None, **kwargs):
+        self._request()
+        with self._lock:
+            return self._ok({'category': 'linear', 'nextPageCursor': '', 'list': [
+                {
+                    'orderId': order['orderId'], 'symbol': order['symbol'], 'side': order['side'],
+                    'orderType': order['orderType'], 'price': str(order['price']), 'qty': str(order['qty']),
+                    'orderStatus': 'New', 'createdTime': order['createdTime']
+                }
+                for order in self.orders.values() if symbol is None or order['symbol'] == symbol
+            ]})
+
+    def _run_batch(self, method, requests):
+        """배치 요청은 한 번의 호출로 처리하고 항목별 결과를 retExtInfo.list에 담습니다."""
+        self._request()
+        results, ext_info = [], []
+        for request in requests:
+            try:
+                response = method(**request)
+                results.append({'orderId': response['result'].get('orderId'), 'symbol': request['symbol']})
+                ext_info.append({'code': 0, 'msg': 'OK'})
+            except InvalidRequestError as e:
+                results.append({'orderId': '', 'symbol': request['symbol']})
+                ext_info.append({'code': e.status_code, 'msg': e.message})
+        response = self._ok({'list': results})
+        response['retExtInfo'] = {'list': ext_info}
+        return response
+
+    def place_batch_order(self, category='linear', request=None, **kwargs):
+        return self._run_batch(self._place_order, request or [])
+
+    def cancel_batch_order(self, category='linear', request=None, **kwargs):
+        return self._run_batch(self._cancel_order, request or [])
+
+    # --- 결과 요약 ---
+    def state(self):
+        """현재 포지션 / 대기 주문 / 잔고를 반환합니다."""
+        with self._lock:
+            return {
+                'balance': round(self.balance, 4),
+                'positions': [self.position_view(symbol) for symbol in self.positions],
+                'open_orders': [dict(order) for order in self.orders.values()],
+                'closed_trades': len(self.closed_pnl),
+                'requests': self.request_count,
+            }
+
+
+__all__ = ['SimulatedExchange']
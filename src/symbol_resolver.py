@@ -0,0 +1,188 @@
+import asyncio
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from instrument_cache import instrument_cache
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+# 심볼 매핑 파일 경로 (기본값: DB와 같은 폴더)
+SYMBOL_MAP_PATH = os.getenv('SYMBOL_MAP_PATH') or os.path.join(os.getenv('GDRIVE_PATH', '.'), 'symbol_map.json')
+
+# 매핑에 없던 종목을 '없음'으로 기억하는 시간 (초). 그동안은 같은 종목으로 목록을 다시 불러오지 않습니다.
+SYMBOL_MISS_TTL = float(os.getenv('SYMBOL_MISS_TTL', '60'))
+# 매핑에 없는 종목 때문에 전체 종목 목록을 다시 불러오는 최소 간격 (초)
+SYMBOL_REFRESH_COOLDOWN = float(os.getenv('SYMBOL_REFRESH_COOLDOWN', '30'))
+
+# '1000PEPE', '10000SATS' 처럼 10의 거듭제곱이 앞에 붙은 baseCoin을 분리하는 정규식
+SCALED_BASE_COIN_PATTERN = re.compile(r'^(10+)([A-Z].*)$')
+# 'SHIB1000' 처럼 10의 거듭제곱이 뒤에 붙은 baseCoin을 분리하는 정규식
+SCALED_BASE_COIN_SUFFIX_PATTERN = re.compile(r'^([A-Z][A-Z]*)(10+)$')
+
+
+def build_symbol_map(instruments):
+    """
+    linear 종목 목록으로부터 '채널 심볼 -> (Bybit 심볼, 가격 배수)' 매핑을 만듭니다.
+    예: 'PEPEUSDT' -> {'symbol': '1000PEPEUSDT', 'multiplier': 1000}
+    """
+    symbol_map = {}
+    scaled_entries = []
+
+    for symbol, instrument in instruments.items():
+        if instrument.get('settleCoin', 'USDT') != 'USDT' or instrument.get('quoteCoin', 'USDT') != 'USDT':
+            continue
+
+        base_coin = instrument.get('baseCoin') or symbol[:-len('USDT')]
+        # 원래 종목명은 그대로 매핑 (배수 1)
+        symbol_map[symbol] = {'symbol': symbol, 'multiplier': 1}
+
+        scaled_match = SCALED_BASE_COIN_PATTERN.match(base_coin)
+        if scaled_match:
+            multiplier = int(scaled_match.group(1))
+            scaled_entries.append((scaled_match.group(2) + 'USDT', symbol, multiplier))
+            continue
+
+        suffix_match = SCALED_BASE_COIN_SUFFIX_PATTERN.match(base_coin)
+        if suffix_match:
+            multiplier = int(suffix_match.group(2))
+            scaled_entries.append((suffix_match.group(1) + 'USDT', symbol, multiplier))
+
+    # 같은 이름의 일반 종목이 있으면 일반 종목을 우선하고, 여러 배수가 있으면 작은 배수를 사용합니다.
+    for channel_symbol, symbol, multiplier in sorted(scaled_entries, key=lambda entry: entry[2]):
+        if channel_symbol not in symbol_map:
+            symbol_map[channel_symbol] = {'symbol': symbol, 'multiplier': multiplier}
+
+    return symbol_map
+
+
+class SymbolResolver:
+    """
+    채널 메시지의 종목명을 실제 Bybit 종목명과 가격 배수로 변환합니다.
+    매핑은 파일에 저장되어 재시작 직후에도 바로 사용할 수 있습니다.
+    """
+
+    def __init__(self, cache, map_path=SYMBOL_MAP_PATH, miss_ttl=SYMBOL_MISS_TTL,
+                 refresh_cooldown=SYMBOL_REFRESH_COOLDOWN):
+        self.cache = cache
+        self.map_path = map_path
+        self.miss_ttl = miss_ttl
+        self.refresh_cooldown = refresh_cooldown
+        self.symbol_map = {}
+        # channel_symbol -> 매핑에서 찾지 못한 시각 (time.monotonic)
+        self._misses = {}
+        # 마지막으로 전체 종목 목록을 불러온 시각과 진행 중인 재조회 (동시에 들어온 조회는 함께 기다림)
+        self._last_refresh = float('-inf')
+        self._refresh = None
+        # 매핑 파일 저장은 전용 스레드 하나에서 순서대로 실행하여 이벤트 루프를 막지 않습니다.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='symbol-map')
+        self._save_future = None
+        cache.add_listener(self._on_instruments_loaded)
+
+    def load(self):
+        """저장된 매핑 파일을 불러옵니다."""
+        try:
+            with open(self.map_path, 'r', encoding='utf-8') as f:
+                self.symbol_map = json.load(f)
+            print(f"✅ 심볼 매핑 {len(self.symbol_map)}개를 불러왔습니다.")
+        except FileNotFoundError:
+            self.symbol_map = {}
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"⚠️ 심볼 매핑 파일을 읽지 못했습니다: {e}")
+            self.symbol_map = {}
+
+    def save(self, symbol_map=None):
+        """매핑(생략하면 현재 매핑)을 파일에 저장합니다."""
+        symbol_map = self.symbol_map if symbol_map is None else symbol_map
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.map_path)), exist_ok=True)
+            tmp_path = self.map_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(symbol_map, f)
+            os.replace(tmp_path, self.map_path)
+        except OSError as e:
+            print(f"⚠️ 심볼 매핑 파일 저장 실패: {e}")
+
+    def rebuild(self, instruments):
+        """
+        종목 목록으로 매핑을 다시 만들고 저장합니다.
+        메모리의 매핑은 바로 바뀌고, 파일 저장은 이벤트 루프가 실행 중이면 전용 스레드에서 진행됩니다.
+        """
+        self.symbol_map = build_symbol_map(instruments)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()
+            return
+        self._save_future = loop.run_in_executor(self._executor, self.save, self.symbol_map)
+
+    async def flush(self):
+        """진행 중인 매핑 파일 저장이 끝날 때까지 기다립니다."""
+        if self._save_future is not None:
+            await self._save_future
+
+    def _on_instruments_loaded(self, instruments, new_symbols):
+        self._last_refresh = time.monotonic()
+        if new_symbols:
+            # 새 상장 종목이 '없음'으로 기억된 종목일 수 있으므로 다시 찾아보게 합니다.
+            self._misses.clear()
+        # 새 상장 종목이 생겼거나 매핑이 비어 있을 때만 다시 만듭니다.
+        if new_symbols or not self.symbol_map:
+            self.rebuild(instruments)
+            if new_symbols and len(new_symbols) < len(instruments):
+                print(f"ℹ️ 새 종목 {len(new_symbols)}개를 심볼 매핑에 반영했습니다: {', '.join(sorted(new_symbols))}")
+
+    def cached(self, channel_symbol):
+        """현재 매핑에서만 (Bybit 심볼, 가격 배수)를 찾습니다. (네트워크 호출 없음, 없으면 None)"""
+        entry = self.symbol_map.get(channel_symbol)
+        if entry:
+            return entry['symbol'], entry['multiplier']
+        return None
+
+    async def resolve(self, channel_symbol):
+        """
+        채널 심볼을 (Bybit 심볼, 가격 배수)로 변환합니다.
+        매핑에 없으면 종목 목록을 새로 불러온 뒤 다시 찾고, 그래도 없으면 None을 반환합니다.
+        매핑은 새로 불러온 목록에 새 종목이 있을 때만 (_on_instruments_loaded에서) 다시 만듭니다.
+        없는 종목은 SYMBOL_MISS_TTL 동안 기억하고, 전체 목록 재조회는 SYMBOL_REFRESH_COOLDOWN에 한 번으로 제한하여
+        잘못된 심볼이 반복되어도 실행 레인에서 페이지 단위 재조회가 되풀이되지 않게 합니다.
+        """
+        resolved = self.cached(channel_symbol)
+        if resolved:
+            return resolved
+
+        missed_at = self._misses.get(channel_symbol)
+        if missed_at is not None and time.monotonic() - missed_at < self.miss_ttl:
+            return None
+
+        # 방금 상장된 종목일 수 있으므로 전체 목록을 새로 불러옵니다.
+        await self._refresh_instruments()
+
+        resolved = self.cached(channel_symbol)
+        if resolved:
+            self._misses.pop(channel_symbol, None)
+            return resolved
+        self._misses[channel_symbol] = time.monotonic()
+        return None
+
+    async def _refresh_instruments(self):
+        """전체 종목 목록을 다시 불러옵니다. 최근에 불러왔으면 건너뛰고, 진행 중인 재조회가 있으면 함께 기다립니다."""
+        if self._refresh is None:
+            if time.monotonic() - self._last_refresh < self.refresh_cooldown:
+                return
+            # 실패한 재조회도 간격 제한에 포함하여 거래소 오류 중에 재시도가 몰리지 않게 합니다.
+            self._last_refresh = time.monotonic()
+            self._refresh = asyncio.ensure_future(self.cache.warm_up())
+            self._refresh.add_done_callback(self._clear_refresh)
+        await asyncio.shield(self._refresh)
+
+    def _clear_refresh(self, _):
+        self._refresh = None
+
+# 프로세스 전체에서 공유하는 심볼 변환기
+symbol_resolver = SymbolResolver(instrument_cache)
+
+__all__ = ['build_symbol_map', 'SymbolResolver', 'symbol_resolver', 'SYMBOL_MISS_TTL', 'SYMBOL_REFRESH_COOLDOWN']
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+from bybit_gateway import bybit_gateway
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+# 시세를 새로 조회하지 않고 그대로 사용할 수 있는 최대 경과 시간 (초)
+TICKER_CACHE_TTL = float(os.getenv('TICKER_CACHE_TTL', '2'))
+
+
+class TickerCache:
+    """
+    linear 종목 시세 스냅샷.
+    여러 종목의 시세가 필요할 때는 get_tickers(category="linear") 한 번으로 전체를 불러오고,
+    동시에 들어온 조회 요청은 진행 중인 하나의 호출 결과를 함께 기다립니다.
+    """
+
+    def __init__(self, gateway, ttl=TICKER_CACHE_TTL):
+        self.gateway = gateway
+        self.ttl = ttl
+        # symbol -> (시세 데이터, 조회 시각)
+        self._tickers = {}
+        self._snapshot_at = 0.0
+        self._inflight = None
+        self._symbol_inflight = {}
+
+    async def snapshot(self, max_age=None):
+        """전체 linear 시세를 반환합니다. 마지막 전체 조회가 max_age(초)보다 오래되었으면 새로 불러옵니다."""
+        max_age = self.ttl if max_age is None else max_age
+        if time.monotonic() - self._snapshot_at > max_age:
+            await self.refresh()
+        return {symbol: ticker for symbol, (ticker, _) in self._tickers.items()}
+
+    async def refresh(self):
+        """전체 시세를 한 번의 호출로 다시 불러옵니다. (진행 중인 호출이 있으면 그 결과를 기다림)"""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetch_all())
+            self._inflight.add_done_callback(self._clear_inflight)
+        await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, future):
+        if self._inflight is future:
+            self._inflight = None
+
+    async def _fetch_all(self):
+        result = await self.gateway.get_tickers(category="linear")
+        if result['retCode'] != 0:
+            raise RuntimeError(f"시세 조회 실패: {result['retMsg']}")
+        now = time.monotonic()
+        self._tickers = {ticker['symbol']: (ticker, now) for ticker in result['result']['list']}
+        self._snapshot_at = now
+
+    async def get(self, symbol, max_age=None):
+        """
+        종목 하나의 시세를 반환합니다. (없는 종목이면 None)
+        캐시가 max_age(초)보다 오래되었으면 전체 목록 대신 해당 종목만 조회합니다.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        cached = self._tickers.get(symbol)
+        if cached and time.monotonic() - cached[1] <= max_age:
+            return cached[0]
+
+        # 전체 조회가 진행 중이면 그 결과를 함께 사용합니다.
+        if self._inflight is not None:
+            await self.refresh()
+            cached = self._tickers.get(symbol)
+            if cached and time.monotonic() - cached[1] <= max_age:
+                return cached[0]
+
+        inflight = self._symbol_inflight.get(symbol)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._fetch_symbol(symbol))
+            self._symbol_inflight[symbol] = inflight
+            inflight.add_done_callback(lambda _: self._symbol_inflight.pop(symbol, None))
+        return await asyncio.shield(inflight)
+
+    async def _fetch_symbol(self, symbol):
+        result = await self.gateway.get_tickers(category="linear", symbol=symbol)
+        if result['retCode'] != 0 or not result['result']['list']:
+            return None
+        ticker = result['result']['list'][0]
+        self._tickers[symbol] = (ticker, time.monotonic())
+        return ticker
+
+    async def last_price(self, symbol, max_age=None):
+        """종목의 최근 체결가(lastPrice)를 float로 반환합니다. (없는 종목이면 None)"""
+        ticker = await self.get(symbol, max_age=max_age)
+        return float(ticker['lastPrice']) if ticker else None
+
+
+# 프로세스 전체에서 공유하는 시세 캐시
+ticker_cache = TickerCache(bybit_gateway)
+
+__all__ = ['TickerCache', 'ticker_cache']
@@ -0,0 +1,318 @@
+import math
+import os
+import threading
+import time
+from datetime import datetime
+import numpy as np
+from dotenv import load_dotenv
+from database_manager import db_lock, get_trade_log_rewrites
+from portfolio_manager import REPORT_PERIODS
+from utils import MESSAGES
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+# 기간별 분석 결과를 다시 계산하지 않고 재사용하는 시간 (초). 거래 기록이 바뀌면 즉시 다시 계산합니다.
+ANALYTICS_CACHE_TTL = float(os.getenv('ANALYTICS_CACHE_TTL', '60'))
+
+# 분석에 사용할 수 있는 기간 ('all' + 리포트 기간)
+ANALYTICS_PERIODS = ('all',) + tuple(REPORT_PERIODS)
+
+TRADE_COLUMNS_SQL = 'id, symbol, side, entry_price, qty, pnl, fee, created_ts, opened_ts'
+
+# trade_log를 읽을 때 db_lock을 한 번에 잡고 있는 최대 행 수 (그 사이에 다른 조회가 공유 연결을 쓸 수 있음)
+SYNC_CHUNK_ROWS = 5000
+
+
+class TradeColumns:
+    """
+    trade_log를 열(column)별 NumPy 배열로 보관합니다.
+    배열은 여유 공간을 두고 늘려서 추가가 평균 O(1)이며, 청산 시각(created_ts) 순 정렬을 유지합니다.
+    """
+
+    # 열 이름 -> dtype (opened_ts가 없으면 -1, 종목 / 방향은 labels의 정수 코드)
+    FIELDS = {
+        'id': np.int64,
+        'created_ts': np.int64,
+        'opened_ts': np.int64,
+        'symbol': np.int32,
+        'side': np.int8,
+        'notional': np.float64,
+        'pnl': np.float64,
+        'fee': np.float64,
+    }
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.data = {name: np.empty(capacity, dtype) for name, dtype in self.FIELDS.items()}
+        # 문자열 열(종목 / 방향)의 코드 -> 값 목록과 값 -> 코드 사전
+        self.labels = {'symbol': [], 'side': []}
+        self._codes = {'symbol': {}, 'side': {}}
+        self.sorted = True
+
+    def __getitem__(self, name):
+        return self.data[name][:self.size]
+
+    def _encode(self, name, values):
+        codes = self._codes[name]
+        labels = self.labels[name]
+        encoded = []
+        for value in values:
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(labels)
+                labels.append(value)
+            encoded.append(code)
+        return encoded
+
+    def _reserve(self, count):
+        capacity = len(self.data['id'])
+        if self.size + count <= capacity:
+            return
+        while capacity < self.size + count:
+            capacity *= 2
+        for name, array in self.data.items():
+            grown = np.empty(capacity, array.dtype)
+            grown[:self.size] = array[:self.size]
+            self.data[name] = grown
+
+    def append(self, rows):
+        """trade_log 행(TRADE_COLUMNS_SQL 순서)을 배열 끝에 추가합니다."""
+        if not rows:
+            return
+        count = len(rows)
+        self._reserve(count)
+        start, end = self.size, self.size + count
+        ids, symbols, sides, entry_prices, qtys, pnls, fees, created, opened = zip(*rows)
+
+        self.data['id'][start:end] = ids
+        self.data['symbol'][start:end] = self._encode('symbol', symbols)
+        self.data['side'][start:end] = self._encode('side', sides)
+        self.data['notional'][start:end] = np.array(entry_prices, dtype=float) * np.array(qtys, dtype=float)
+        self.data['pnl'][start:end] = np.array(pnls, dtype=float)
+        self.data['fee'][start:end] = np.array(fees, dtype=float)
+        self.data['created_ts'][start:end] = created
+        self.data['opened_ts'][start:end] = [-1 if value is None else value for value in opened]
+        # NULL 값(None)은 float 변환 시 nan이 되므로 0으로 간주합니다.
+        for name in ('notional', 'pnl', 'fee'):
+            np.nan_to_num(self.data[name][start:end], copy=False)
+
+        chunk = self.data['created_ts'][start:end]
+        if (start and chunk[0] < self.data['created_ts'][start - 1]) or np.any(chunk[1:] < chunk[:-1]):
+            self.sorted = False
+        self.size = end
+
+    def ensure_sorted(self):
+        """수동으로 추가된 과거 거래 등으로 순서가 어긋났으면 청산 시각 순으로 다시 정렬합니다."""
+        if self.sorted:
+            return
+        order = np.argsort(self['created_ts'], kind='stable')
+        for name in self.data:
+            self.data[name][:self.size] = self.data[name][:self.size][order]
+        self.sorted = True
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator > 0 else None
+
+
+def _breakdown(codes, labels, pnl, wins):
+    """정수 코드별 (거래 수, 손익, 승률)을 손익 내림차순으로 반환합니다."""
+    if not len(codes):
+        return []
+    unique, inverse = np.unique(codes, return_inverse=True)
+    trades = np.bincount(inverse)
+    pnl_sum = np.bincount(inverse, weights=pnl)
+    win_count = np.bincount(inverse, weights=wins)
+    rows = [
+        {'name': labels[code], 'trades': int(trades[i]), 'pnl': float(pnl_sum[i]),
+         'win_rate': float(win_count[i] / trades[i] * 100)}
+        for i, code in enumerate(unique)
+    ]
+    return sorted(rows, key=lambda row: row['pnl'], reverse=True)
+
+
+def compute_metrics(columns, start=0):
+    """
+    columns의 start번째 이후 거래(청산 시각 순)로 성과 지표를 계산합니다. 거래가 없으면 None.
+    Sharpe / Sortino는 거래당 수익률(손익 / 진입 명목가치)로 계산하며 연환산하지 않습니다.
+    """
+    pnl = columns['pnl'][start:]
+    if not len(pnl):
+        return None
+    fee = columns['fee'][start:]
+    notional = columns['notional'][start:]
+    created = columns['created_ts'][start:]
+    opened = columns['opened_ts'][start:]
+
+    wins = pnl > 0
+    losses = pnl < 0
+    gross_profit = float(pnl[wins].sum())
+    gross_loss = float(-pnl[losses].sum())
+    win_count = int(wins.sum())
+    loss_count = int(losses.sum())
+
+    # 누적 손익 곡선과 최대 낙폭 (시작점 0 포함)
+    equity = np.cumsum(pnl)
+    peak = np.maximum.accumulate(np.maximum(equity, 0.0))
+    drawdown = peak - equity
+
+    has_notional = notional > 0
+    returns = pnl[has_notional] / notional[has_notional]
+    sharpe = sortino = None
+    if len(returns) > 1:
+        mean_return = float(returns.mean())
+        sharpe = _ratio(mean_return, float(returns.std(ddof=1)))
+        sortino = _ratio(mean_return, math.sqrt(float(np.mean(np.minimum(returns, 0.0) ** 2))))
+
+    has_hold = (opened >= 0) & (created >= opened)
+    avg_hold_ms = float((created[has_hold] - opened[has_hold]).mean()) if has_hold.any() else None
+
+    return {
+        'trades': len(pnl),
+        'wins': win_count,
+        'losses': loss_count,
+        'win_rate': win_count / len(pnl) * 100,
+        'net_pnl': float(equity[-1]),
+        'fees': float(fee.sum()),
+        'gross_profit': gross_profit,
+        'gross_loss': gross_loss,
+        'profit_factor': gross_profit / gross_loss if gross_loss > 0 else (math.inf if gross_profit > 0 else None),
+        'expectancy': float(pnl.mean()),
+        'avg_win': gross_profit / win_count if win_count else 0.0,
+        'avg_loss': -gross_loss / loss_count if loss_count else 0.0,
+        'max_drawdown': float(drawdown.max()),
+        'equity_curve': equity,
+        'sharpe': sharpe,
+        'sortino': sortino,
+        'avg_hold_ms': avg_hold_ms,
+        'by_side': _breakdown(columns['side'][start:], columns.labels['side'], pnl, wins),
+        'by_symbol': _breakdown(columns['symbol'][start:], columns.labels['symbol'], pnl, wins),
+    }
+
+
+class TradeAnalytics:
+    """
+    trade_log 성과 분석기.
+    처음 한 번 전체 기록을 열 배열로 불러오고, 이후에는 마지막으로 읽은 id 이후의 행만 추가로 읽습니다.
+    (기존 행이 삭제 / 수정되었을 때만 다시 전체를 불러옵니다.) 기간별 결과는 기록이 바뀌거나 TTL이 지날 때까지 캐시합니다.
+    """
+
+    def __init__(self, cache_ttl=ANALYTICS_CACHE_TTL):
+        self.cache_ttl = cache_ttl
+        self.columns = TradeColumns()
+        self.max_id = 0
+        self.rewrites = None
+        # period -> (계산 시각, 결과)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def sync(self, conn):
+        """
+        DB에 새로 추가된 거래(마지막으로 읽은 id 이후)를 배열에 반영합니다. 바뀐 내용이 있으면 True를 반환합니다.
+        기존 행이 삭제 / 수정되었으면 (trade_log_changes.rewrites 변경) 전체를 새 배열로 다시 불러옵니다.
+        db_lock은 SYNC_CHUNK_ROWS개씩 읽는 동안만 잡으며, 읽는 도중 생긴 삭제 / 수정은 다음 sync에서 반영됩니다.
+        """
+        with db_lock:
+            rewrites = get_trade_log_rewrites(conn)
+        reload = rewrites != self.rewrites
+        columns = TradeColumns() if reload else self.columns
+        last_id = 0 if reload else self.max_id
+        changed = reload
+        while True:
+            with db_lock:
+                rows = conn.execute(
+                    f'SELECT {TRADE_COLUMNS_SQL} FROM trade_log WHERE id > ? ORDER BY id LIMIT ?',
+                    (last_id, SYNC_CHUNK_ROWS)
+                ).fetchall()
+            if not rows:
+                break
+            columns.append([tuple(row) for row in rows])
+            last_id = rows[-1][0]
+            changed = True
+            if len(rows) < SYNC_CHUNK_ROWS:
+                break
+
+        if not changed:
+            return False
+        self.columns = columns
+        self.max_id = last_id
+        self.rewrites = rewrites
+        self._cache.clear()
+        return True
+
+    def report(self, conn, period='all'):
+        """기간('all', 'day', 'week', 'month')의 성과 지표를 반환합니다. 해당 기간에 거래가 없으면 None."""
+        with self._lock:
+            self.sync(conn)
+            cached = self._cache.get(period)
+            if cached and time.monotonic() - cached[0] < self.cache_ttl:
+                return cached[1]
+
+            self.columns.ensure_sorted()
+            start = 0
+            if period in REPORT_PERIODS:
+                since_ts = round((datetime.now() - REPORT_PERIODS[period]).timestamp() * 1000)
+                start = int(np.searchsorted(self.columns['created_ts'], since_ts, side='left'))
+            result = compute_metrics(self.columns, start)
+            self._cache[period] = (time.monotonic(), result)
+            return result
+
+
+def _format_number(value, digits=2):
+    if value is None:
+        return MESSAGES['stats_not_available']
+    if math.isinf(value):
+        return '∞'
+    return f"{value:.{digits}f}"
+
+
+def _format_hold(milliseconds):
+    if milliseconds is None:
+        return MESSAGES['stats_not_available']
+    minutes = int(milliseconds // 60000)
+    return MESSAGES['stats_hold_format'].format(hours=minutes // 60, minutes=minutes % 60)
+
+
+def _format_breakdown_line(row):
+    return MESSAGES['stats_breakdown_line'].format(**row)
+
+
+def format_stats(stats, period):
+    """성과 지표를 /stats 메시지로 만듭니다."""
+    if not stats:
+        return MESSAGES['no_trades_in_period']
+    lines = [
+        MESSAGES['stats_title'].format(period=period.capitalize()),
+        "",
+        MESSAGES['stats_summary'].format(
+            trades=stats['trades'], wins=stats['wins'], losses=stats['losses'], win_rate=stats['win_rate'],
+            net_pnl=stats['net_pnl'], fees=stats['fees'], max_drawdown=stats['max_drawdown'],
+            profit_factor=_format_number(stats['profit_factor']), expectancy=stats['expectancy'],
+            avg_win=stats['avg_win'], avg_loss=stats['avg_loss'],
+            sharpe=_format_number(stats['sharpe'], 3), sortino=_format_number(stats['sortino'], 3),
+            avg_hold=_format_hold(stats['avg_hold_ms'])
+        ),
+        "",
+        MESSAGES['stats_side_title'],
+    ]
+    lines.extend(_format_breakdown_line(row) for row in stats['by_side'])
+    return "\n".join(lines)
+
+
+def format_symbol_stats(stats, period, limit=20):
+    """종목별 성과를 /stats_symbols 메시지로 만듭니다. (손익 순 상위 limit개)"""
+    if not stats:
+        return MESSAGES['no_trades_in_period']
+    rows = stats['by_symbol']
+    lines = [MESSAGES['stats_symbol_title'].format(period=period.capitalize()), ""]
+    lines.extend(_format_breakdown_line(row) for row in rows[:limit])
+    if len(rows) > limit:
+        lines.append(MESSAGES['stats_breakdown_more'].format(count=len(rows) - limit))
+    return "\n".join(lines)
+
+
+# 프로세스 전체에서 공유하는 성과 분석기
+trade_analytics = TradeAnalytics()
+
+__all__ = ['ANALYTICS_PERIODS', 'TradeAnalytics', 'compute_metrics', 'format_stats', 'format_symbol_stats', 'trade_analytics']
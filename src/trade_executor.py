@@ -1,25 +1,42 @@
 import asyncio
 from datetime import datetime
-import decimal
 import time
-from api_clients import bybit_client, bybit_bot, TELE_BYBIT_LOG_CHAT_ID
+from api_clients import TELE_BYBIT_LOG_CHAT_ID
+from bybit_gateway import bybit_gateway
+from instrument_cache import instrument_cache
+from symbol_resolver import symbol_resolver
+from position_tracker import position_tracker
+from ticker_cache import ticker_cache
+from account_state import account_state
+from leverage_cache import leverage_cache
+from order_sizing import order_sizer
+from latency_tracker import latency_tracker
 from data_processor import aggregate_closed_positions
 from message_parser import parse_telegram_message, parse_cancel_message
 from portfolio_manager import record_trade_result
+from notifier import notifier
 from utils import MESSAGES, log_error_and_send_message
-from database_manager import get_active_orders, save_active_order, delete_active_order, record_trade_result_db, update_filled_status
+from order_store import order_store
+from database_manager import record_trade_result_db
 
-# 메시지 ID와 주문 정보를 매핑할 전역 딕셔너리 (이제 DB에서 불러와서 사용)
-# active_orders = {} # 이 전역 변수는 이제 사용하지 않습니다.
+# 주문 접수 후 포지션 반영을 확인하기까지 기다리는 시간 (초)
+POSITION_CONFIRM_DELAY = 1
 
 # 이미 청산 모니터링이 시작된 메시지 ID를 추적하는 set
 monitored_trade_ids = set()
 
-# 종목명 스케일링 인자 리스트
-SCALING_FACTORS = [1000, 10000, 100000]
+# 실행 중인 백그라운드 태스크 (가비지 컬렉션으로 태스크가 사라지지 않도록 참조를 유지)
+background_tasks = set()
 
-async def send_bybit_summary_msg(order_info, adjusted_qty, order_result):
-    """Bybit 주문 결과를 텔레그램 봇으로 전송"""
+def spawn_background_task(coro):
+    """코루틴을 현재 이벤트 루프에서 백그라운드 태스크로 실행합니다."""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+def send_bybit_summary_msg(order_info, adjusted_qty, order_result):
+    """Bybit 주문 결과를 알림 대기열에 넣어 텔레그램 봇으로 전송"""
     message_summary = (
         MESSAGES['order_summary_title'] + "\n\n"
         f"🚀 **Symbol:** ${order_info['symbol']}\n"
@@ -31,20 +48,20 @@ async def send_bybit_summary_msg(order_info, adjusted_qty, order_result):
         f"🛑 **SL:** {order_info['stop_loss']}"
     )
 
-    await bybit_bot.send_message(
+    notifier.send(
         chat_id=TELE_BYBIT_LOG_CHAT_ID,
         text=message_summary,
         parse_mode='Markdown'
     )
 
-async def send_bybit_cancel_msg(symbol):
-    """Bybit 주문 취소 완료 메시지를 텔레그램 봇으로 전송"""
+def send_bybit_cancel_msg(symbol):
+    """Bybit 주문 취소 완료 메시지를 알림 대기열에 넣어 텔레그램 봇으로 전송"""
     message_summary = (
         MESSAGES['order_cancel_complete'] + "\n"
         f"🚀 **Symbol:** ${symbol}\n"
     )
 
-    await bybit_bot.send_message(
+    notifier.send(
         chat_id=TELE_BYBIT_LOG_CHAT_ID,
         text=message_summary,
         parse_mode='Markdown'
@@ -53,343 +70,183 @@ async def send_bybit_cancel_msg(symbol):
 async def record_trade_result_on_close(conn, symbol, message_id):
     """
     포지션이 청산되면 Bybit에서 모든 청산 주문을 가져와 합산하여 기록합니다.
+    청산 감지는 공유 포지션 추적기(position_tracker)가 알려주므로 거래별 폴링이 없습니다.
     """
     print(MESSAGES['monitor_position_close'].format(symbol=symbol))
-
-    is_position_open = False
+    monitored_trade_ids.add(message_id)
     
     try:
-        while True:
-            positions_info = bybit_client.get_positions(category="linear", symbol=symbol)
+        # 포지션이 열렸다가 닫힐 때까지 대기
+        await position_tracker.wait_for_close(symbol, message_id)
+        print(MESSAGES['position_closed_success'].format(symbol=symbol))
+
+        # 마지막 체결 시각 기준 5분 전까지의 기록을 조회
+        start_time, end_time = position_tracker.closed_time_window(symbol)
+        
+        closed_pnl_records = []
+        
+        # API에서 해당 시간대의 모든 기록을 가져옵니다.
+        closed_pnl_info = await bybit_gateway.get_closed_pnl(
+            category="linear",
+            symbol=symbol,
+            limit=50, # 더 많은 기록을 가져와서 합산할 가능성 높임
+            startTime=start_time,
+            endTime=end_time
+        )
+        
+        if closed_pnl_info['retCode'] == 0 and closed_pnl_info['result']['list']:
+            closed_pnl_records = closed_pnl_info['result']['list']
+        
+        if closed_pnl_records:
+            # ✅ bot.py의 합산 함수를 호출하여 하나의 포지션으로 만듭니다.
+            aggregated_position = aggregate_closed_positions(closed_pnl_records)[0]
+            
+            trade_result = {
+                'symbol': aggregated_position['symbol'],
+                'side': aggregated_position['side'],
+                'entry_price': aggregated_position['avg_entry_price'],
+                'exit_price': aggregated_position['avg_exit_price'],
+                'qty': aggregated_position['total_qty'],
+                'pnl': aggregated_position['total_pnl'],
+                'fee': aggregated_position['total_fee'],
+                'created_at': datetime.fromtimestamp(aggregated_position['created_time'] / 1000).isoformat(),
+                'opened_ts': position_tracker.opened_ms.get(symbol)
+            }
             
-            if positions_info['retCode'] == 0 and positions_info['result']['list']:
-                position = positions_info['result']['list'][0]
-                
-                if float(position['size']) > 0:
-                    is_position_open = True
-                
-                # 포지션이 닫힌 시점 감지
-                if is_position_open and float(position['size']) == 0:
-                    print(MESSAGES['position_closed_success'].format(symbol=symbol))
-                    
-                    # ✅ 수정된 로직 시작
-                    closed_timestamp = int(time.time() * 1000)
-                    start_time = closed_timestamp - (5 * 60 * 1000) # 5분 전까지의 기록을 조회
-                    end_time = closed_timestamp + 5000 
-                    
-                    closed_pnl_records = []
-                    
-                    # API에서 해당 시간대의 모든 기록을 가져옵니다.
-                    closed_pnl_info = bybit_client.get_closed_pnl(
-                        category="linear",
-                        symbol=symbol,
-                        limit=50, # 더 많은 기록을 가져와서 합산할 가능성 높임
-                        startTime=start_time,
-                        endTime=end_time
-                    )
-                    
-                    if closed_pnl_info['retCode'] == 0 and closed_pnl_info['result']['list']:
-                        closed_pnl_records = closed_pnl_info['result']['list']
-                    
-                    if closed_pnl_records:
-                        # ✅ bot.py의 합산 함수를 호출하여 하나의 포지션으로 만듭니다.
-                        aggregated_position = aggregate_closed_positions(closed_pnl_records)[0]
-                        
-                        trade_result = {
-                            'symbol': aggregated_position['symbol'],
-                            'side': aggregated_position['side'],
-                            'entry_price': aggregated_position['avg_entry_price'],
-                            'exit_price': aggregated_position['avg_exit_price'],
-                            'qty': aggregated_position['total_qty'],
-                            'pnl': aggregated_position['total_pnl'],
-                            'fee': aggregated_position['total_fee'],
-                            'created_at': datetime.fromtimestamp(aggregated_position['created_time'] / 1000).isoformat()
-                        }
-                        
-                        print(f"✅ 포지션 청산 완료! PNL 기록({trade_result['pnl']:.2f})을 저장합니다.")
-                        record_trade_result_db(conn, trade_result)
-                        update_filled_status(conn, message_id, True)
-                        print(MESSAGES['trade_record_saved_success'].format(symbol=symbol))
-                        await bybit_bot.send_message(
-                            chat_id=TELE_BYBIT_LOG_CHAT_ID,
-                            text=MESSAGES['trade_closed_pnl_message'].format(symbol=symbol, pnl=trade_result['pnl'])
-                        )
-                        return # 함수 종료
-                    else:
-                        log_error_and_send_message(f"⚠️ {symbol} 포지션에 대한 청산 거래 기록을 찾을 수 없습니다. 수동 확인이 필요합니다.", chat_id=TELE_BYBIT_LOG_CHAT_ID)
-                        return # 기록을 찾지 못했으므로 종료
-                    
-            await asyncio.sleep(5)
+            print(f"✅ 포지션 청산 완료! PNL 기록({trade_result['pnl']:.2f})을 저장합니다.")
+            with latency_tracker.span('db.record_trade_result'):
+                inserted = await asyncio.to_thread(record_trade_result_db, conn, trade_result)
+            order_store.set_filled(message_id, True)
+            if inserted:
+                print(MESSAGES['trade_record_saved_success'].format(symbol=symbol))
+            else:
+                print(f"ℹ️ {symbol} 청산 기록이 이미 저장되어 있어 다시 저장하지 않았습니다.")
+            notifier.send(
+                chat_id=TELE_BYBIT_LOG_CHAT_ID,
+                text=MESSAGES['trade_closed_pnl_message'].format(symbol=symbol, pnl=trade_result['pnl'])
+            )
+        else:
+            log_error_and_send_message(f"⚠️ {symbol} 포지션에 대한 청산 거래 기록을 찾을 수 없습니다. 수동 확인이 필요합니다.", chat_id=TELE_BYBIT_LOG_CHAT_ID)
 
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
         log_error_and_send_message(f"포지션 모니터링 중 오류 발생: {e}", exc=e, chat_id=TELE_BYBIT_LOG_CHAT_ID)
     finally:
-        if message_id in monitored_trade_ids:
-            monitored_trade_ids.remove(message_id)
+        monitored_trade_ids.discard(message_id)
+
+async def confirm_position_update(delay=POSITION_CONFIRM_DELAY):
+    """
+    주문 접수 후 잠시 기다렸다가 포지션 추적기가 최신 상태인지 확인합니다.
+    비공개 스트림이 연결되어 있으면 포지션 변경이 이미 전달되므로 호출이 없고,
+    아니면 한 번의 REST 재동기화로 청산 모니터들이 보는 포지션을 맞춥니다.
+    주문을 처리한 종목 레인 밖(백그라운드)에서 실행되므로 다음 신호를 지연시키지 않습니다.
+    """
+    await asyncio.sleep(delay)
+    if position_tracker.stream_connected:
+        return
+    try:
+        await position_tracker.resync()
+    except Exception as e:
+        log_error_and_send_message(MESSAGES['position_info_error'], exc=e)
 
-def execute_bybit_order(conn, order_info, message_id):
+async def execute_bybit_order(conn, order_info, message_id):
     """
     Bybit API를 사용하여 주문을 실행합니다.
     """
     # active_orders 전역 변수 사용 제거
     
-    # === 소수점 종목 자동 변환 로직 추가 ===
+    started_at = time.perf_counter()
     original_symbol = order_info['symbol']
     
     try:
-        # 1. 먼저 원래 종목명으로 주문을 시도
-        print(f"Bybit 주문 실행 중: {original_symbol}")
+        # 1. 채널 종목명을 실제 Bybit 종목명과 가격 배수로 변환 (예: PEPEUSDT -> 1000PEPEUSDT, x1000)
+        resolved = await symbol_resolver.resolve(original_symbol)
+        if not resolved:
+            log_error_and_send_message(
+                MESSAGES['all_scaling_failed'].format(original_symbol=original_symbol)
+            )
+            return
+
+        symbol, multiplier = resolved
+        if multiplier != 1:
+            print(MESSAGES['scaled_symbol_resolved'].format(original_symbol=original_symbol, symbol=symbol, multiplier=multiplier))
+            order_info['symbol'] = symbol
+            if order_info['entry_price'] != 'NOW':
+                order_info['entry_price'] *= multiplier
+                print(MESSAGES['scaled_entry_price'].format(entry_price=order_info['entry_price']))
+            order_info['stop_loss'] *= multiplier
+            order_info['targets'] = [tp * multiplier for tp in order_info['targets']]
+
+        print(f"Bybit 주문 실행 중: {symbol}")
         
         # 'NOW' 진입가일 경우 시장가 주문
-        if order_info['entry_price'] == 'NOW':
-            order_type = "Market"
-            order_price = None
-        else:
-            order_type = "Limit"
-            order_price = str(order_info['entry_price'])
+        order_type = "Market" if order_info['entry_price'] == 'NOW' else "Limit"
 
-        # 1-1. 계좌 잔고 조회 및 주문 수량 계산 (로직 유지)
-        wallet_balance = bybit_client.get_wallet_balance(accountType="UNIFIED")
-        usdt_balance = next((item for item in wallet_balance['result']['list'][0]['coin'] if item['coin'] == 'USDT'), None)
-        if not usdt_balance:
+        # 1-1. 계좌 잔고(스트림으로 갱신되는 캐시) 확인 및 주문 수량 계산
+        total_usdt = await account_state.usdt_equity()
+        if total_usdt is None:
             log_error_and_send_message(MESSAGES['usdt_balance_not_found'])
             return
 
-        total_usdt = float(usdt_balance['equity'])
         trade_amount = total_usdt * order_info['fund_percentage']
 
         if order_info['entry_price'] == 'NOW':
-            # Entry NOW일 때 종목별 레버리지 설정 로직 추가
-            symbol = original_symbol
-            if symbol == 'BTCUSDT' or symbol == 'ETHUSDT':
+            # Entry NOW일 때 종목별 레버리지 설정 로직 추가 (채널 종목명 기준)
+            if original_symbol == 'BTCUSDT' or original_symbol == 'ETHUSDT':
                 order_info['leverage'] = 100
-            elif symbol == 'SOLUSDT':
+            elif original_symbol == 'SOLUSDT':
                 order_info['leverage'] = 35
             else:
                 order_info['leverage'] = 10
-            
-            ticker_info = bybit_client.get_tickers(category="linear", symbol=original_symbol)
-            current_price = float(ticker_info['result']['list'][0]['lastPrice'])
+
+        # 최대 레버리지로 먼저 제한하여 실제 적용될 레버리지로 수량을 계산합니다. (캐시된 종목 정보 사용)
+        order_info['leverage'] = await leverage_cache.clamp(symbol, order_info['leverage'])
+
+        if order_info['entry_price'] == 'NOW':
+            current_price = await ticker_cache.last_price(symbol)
             order_qty = (trade_amount * order_info['leverage']) / current_price
         else:
             order_qty = (trade_amount * order_info['leverage']) / float(order_info['entry_price'])
 
-        # 1-2. 종목 정보 조회 및 주문 수량 정밀도 조정 (로직 유지)
-        instrument_info = bybit_client.get_instruments_info(category="linear", symbol=original_symbol)
-        lot_size_filter = instrument_info['result']['list'][0]['lotSizeFilter']
-        qty_step = float(lot_size_filter['qtyStep'])
-        adjusted_qty = round(order_qty / qty_step) * qty_step
-        adjusted_qty_decimal = decimal.Decimal(adjusted_qty)
-        precision = len(str(qty_step).split('.')[1]) if '.' in str(qty_step) else 0
-        quantized_qty = adjusted_qty_decimal.quantize(decimal.Decimal('0.' + '0'*precision))
+        # 1-2. 종목 규격에 맞춰 수량(qtyStep)과 진입 / TP / SL 가격(tickSize)을 정수 연산으로 조정
+        spec = await order_sizer.spec(symbol)
+        quantized_qty = spec.quantity(order_qty, market=order_type == "Market")
+        adjusted_qty = float(quantized_qty)
+        order_price = spec.price(order_info['entry_price']) if order_type == "Limit" else None
 
-        # 1-3. 레버리지 설정 (로직 유지)
+        # 1-3. 레버리지 설정 (위에서 제한한 값, 캐시된 현재 값과 같으면 호출 없음)
         try:
-            position_info = bybit_client.get_positions(category="linear", symbol=original_symbol)
-            current_leverage = int(position_info['result']['list'][0]['leverage']) if position_info['retCode'] == 0 and position_info['result']['list'] else 0
-            
-            # 현재 레버리지와 요청된 레버리지가 다를 경우에만 설정
-            if float(current_leverage) != order_info['leverage']:
-                bybit_client.set_leverage(
-                    category="linear",
-                    symbol=original_symbol,
-                    buyLeverage=str(order_info['leverage']),
-                    sellLeverage=str(order_info['leverage'])
-                )
-            else:
-                print("ℹ️ 레버리지가 이미 설정된 값과 동일합니다. 변경을 건너뜁니다.")
-        
+            order_info['leverage'] = await leverage_cache.ensure(symbol, order_info['leverage'])
         except Exception as e:
-            error_message = str(e)
-            # 레버리지 관련 에러인지 확인
-            if 'leverage invalid' in error_message or 'leverage not modified' in error_message:
-                print(f"⚠️ 레버리지 설정 오류 발생. 최대 레버리지를 확인합니다.")
-                # 종목 정보 조회
-                instrument_info = bybit_client.get_instruments_info(category="linear", symbol=original_symbol)
-                if instrument_info['retCode'] == 0 and instrument_info['result']['list']:
-                    max_leverage = instrument_info['result']['list'][0]['leverageFilter']['maxLeverage']
-                    
-                    if order_info['leverage'] > float(max_leverage):
-                        # 요청 레버리지 조정
-                        order_info['leverage'] = float(max_leverage)
-                        print(MESSAGES['leverage_exceeded_warning'].format(
-                            requested_leverage=int(order_info['leverage']),
-                            max_leverage=max_leverage
-                        ))
-                    
-                    # 레버리지를 재조정했더라도, 현재 포지션의 레버리지와 비교하여 불필요한 호출을 막음
-                    position_info_after_adjust = bybit_client.get_positions(category="linear", symbol=original_symbol)
-                    current_leverage_after_adjust = int(position_info_after_adjust['result']['list'][0]['leverage']) if position_info_after_adjust['retCode'] == 0 and position_info_after_adjust['result']['list'] else 0
-
-                    if float(current_leverage_after_adjust) != order_info['leverage']:
-                        bybit_client.set_leverage(
-                            category="linear",
-                            symbol=original_symbol,
-                            buyLeverage=str(order_info['leverage']),
-                            sellLeverage=str(order_info['leverage'])
-                        )
-                    else:
-                        print("ℹ️ 레버리지 자동 조정 후 확인 결과, 이미 설정된 값과 동일합니다. 변경을 건너뜁니다.")
-
-                else:
-                    print("종목 정보를 가져오는 데 실패했습니다. 레버리지 자동 조정 불가.")
-                    log_error_and_send_message(
-                        f"레버리지 조정을 위한 종목 정보 가져오기 실패.",
-                        exc=e
-                    )
-                    return
-            else:
-                # 레버리지 관련 오류가 아닌 경우
-                log_error_and_send_message(
-                    f"Bybit 레버리지 설정 중 알 수 없는 오류 발생.",
-                    exc=e
-                )
-                return
+            log_error_and_send_message(
+                f"Bybit 레버리지 설정 중 알 수 없는 오류 발생.",
+                exc=e
+            )
+            return
 
         # 1-4. 주문 실행
-        order_result = bybit_client.place_order(
+        order_result = await bybit_gateway.place_order(
             category="linear",
-            symbol=original_symbol,
+            symbol=symbol,
             side=order_info['side'],
             orderType=order_type,
-            qty=str(quantized_qty),
+            qty=quantized_qty,
             price=order_price,
-            takeProfit=str(order_info['targets'][0]),
-            stopLoss=str(order_info['stop_loss'])
+            takeProfit=spec.price(order_info['targets'][0]),
+            stopLoss=spec.price(order_info['stop_loss'])
         )
+        # 주문 함수 시작부터 거래소 응답(ack)까지
+        latency_tracker.record('order.execute_to_ack', time.perf_counter() - started_at)
     
     except Exception as e:
-        # 2. 주문이 실패했을 경우, 특히 종목명 오류(10001)일 때 스케일링을 시도
-        error_message = str(e)
-        if '10001' in error_message:
-            print(MESSAGES['scaling_attempt'].format(original_symbol=original_symbol))
-            
-            # 2-1. 스케일링된 종목명으로 주문 재시도
-            found_symbol = None
-            for factor in SCALING_FACTORS:
-                symbol_to_check = f"{factor}{original_symbol}"
-                
-                try:
-                    # 종목 유효성 검증
-                    instrument_info = bybit_client.get_instruments_info(category="linear", symbol=symbol_to_check)
-                    if instrument_info['retCode'] == 0 and instrument_info['result']['list']:
-                        # 주문 정보 업데이트
-                        order_info['symbol'] = symbol_to_check
-                        if order_info['entry_price'] != 'NOW':
-                            order_info['entry_price'] *= factor
-                            print(MESSAGES['scaled_entry_price'].format(entry_price=order_info['entry_price']))
-                        order_info['stop_loss'] *= factor
-                        order_info['targets'] = [tp * factor for tp in order_info['targets']]
-
-                        # 레버리지 설정 및 재계산 (수정된 로직 적용)
-                        try:
-                            position_info_scaled = bybit_client.get_positions(category="linear", symbol=symbol_to_check)
-                            current_leverage_scaled = float(position_info_scaled['result']['list'][0]['leverage']) if position_info_scaled['retCode'] == 0 and position_info_scaled['result']['list'] else 0
-                            
-                            if float(current_leverage_scaled) != float(order_info['leverage']):
-                                bybit_client.set_leverage(
-                                    category="linear",
-                                    symbol=symbol_to_check,
-                                    buyLeverage=str(order_info['leverage']),
-                                    sellLeverage=str(order_info['leverage'])
-                                )
-                            else:
-                                print(f"ℹ️ {symbol_to_check}의 레버리지가 이미 설정된 값과 동일합니다. 변경을 건너뜁니다.")
-                        except Exception as lev_e:
-                            lev_error_message = str(lev_e)
-                            if 'leverage invalid' in lev_error_message or 'leverage not modified' in lev_error_message:
-                                print(f"⚠️ {symbol_to_check} 레버리지 설정 오류 발생. 최대 레버리지를 확인합니다.")
-                                instrument_info_lev = bybit_client.get_instruments_info(category="linear", symbol=symbol_to_check)
-                                if instrument_info_lev['retCode'] == 0 and instrument_info_lev['result']['list']:
-                                    max_leverage = instrument_info_lev['result']['list'][0]['leverageFilter']['maxLeverage']
-                                    if float(order_info['leverage']) > float(max_leverage):
-                                        order_info['leverage'] = float(max_leverage)
-                                        print(MESSAGES['leverage_exceeded_warning'].format(
-                                            requested_leverage=int(order_info['leverage']),
-                                            max_leverage=max_leverage
-                                        ))
-                                    
-                                    # 레버리지를 재조정했더라도, 현재 포지션의 레버리지와 비교하여 불필요한 호출을 막음
-                                    position_info_after_adjust = bybit_client.get_positions(category="linear", symbol=symbol_to_check)
-                                    current_leverage_after_adjust = float(position_info_after_adjust['result']['list'][0]['leverage']) if position_info_after_adjust['retCode'] == 0 and position_info_after_adjust['result']['list'] else 0
-
-                                    if float(current_leverage_after_adjust) != float(order_info['leverage']):
-                                        bybit_client.set_leverage(
-                                            category="linear",
-                                            symbol=symbol_to_check,
-                                            buyLeverage=str(order_info['leverage']),
-                                            sellLeverage=str(order_info['leverage'])
-                                        )
-                                    else:
-                                        print("ℹ️ 레버리지 자동 조정 후 확인 결과, 이미 설정된 값과 동일합니다. 변경을 건너뜁니다.")
-
-                                else:
-                                    print("종목 정보를 가져오는 데 실패했습니다. 레버리지 자동 조정 불가.")
-                                    raise lev_e
-                            else:
-                                print(f"Bybit 레버리지 설정 중 알 수 없는 오류 발생: {lev_e}")
-                                raise lev_e
-                        
-                        # 주문 수량 재계산
-                        if order_info['entry_price'] == 'NOW':
-                            ticker_info = bybit_client.get_tickers(category="linear", symbol=symbol_to_check)
-                            current_price = float(ticker_info['result']['list'][0]['lastPrice'])
-                            order_qty = (trade_amount * order_info['leverage']) / current_price
-                        else:
-                            # 스케일링된 가격과 레버리지로 주문 수량 다시 계산
-                            order_qty = (trade_amount * order_info['leverage']) / float(order_info['entry_price'])
-                        
-                        lot_size_filter = instrument_info['result']['list'][0]['lotSizeFilter']
-                        qty_step = float(lot_size_filter['qtyStep'])
-                        max_qty = float(lot_size_filter['maxOrderQty'])
-                        
-                        if order_qty > max_qty:
-                            print(MESSAGES['qty_exceeded_warning'].format(calculated_qty=order_qty, max_qty=max_qty))
-                            adjusted_qty = max_qty
-                        else:
-                            adjusted_qty = round(order_qty / qty_step) * qty_step
-                        
-                        adjusted_qty_decimal = decimal.Decimal(adjusted_qty)
-                        precision = len(str(qty_step).split('.')[1]) if '.' in str(qty_step) else 0
-                        quantized_qty = adjusted_qty_decimal.quantize(decimal.Decimal('0.' + '0' * precision))
-                        
-                        # 재주문 실행
-                        order_result = bybit_client.place_order(
-                            category="linear",
-                            symbol=order_info['symbol'],
-                            side=order_info['side'],
-                            orderType=order_type,
-                            qty=str(quantized_qty),
-                            price=order_info['entry_price'],
-                            takeProfit=str(order_info['targets'][0]),
-                            stopLoss=str(order_info['stop_loss'])
-                        )
-                        
-                        if order_result and order_result['retCode'] == 0:
-                            found_symbol = order_info['symbol']
-                            print(MESSAGES['scaled_symbol_found_success'].format(found_symbol=found_symbol))
-                            break # 루프 종료
-                            
-                    else:
-                        print(MESSAGES['scaled_symbol_not_found'].format(symbol=symbol_to_check))
-
-                except Exception as inner_e:
-                    print(MESSAGES['scaled_reorder_error'], inner_e)
-                    
-            # 2-2. 스케일링 시도 후 성공 여부 확인
-            if not found_symbol:
-                log_error_and_send_message(
-                    MESSAGES['all_scaling_failed'].format(original_symbol=original_symbol),
-                    exc=e
-                )
-                return
-            
-        else: # 다른 종류의 오류일 경우
-            log_error_and_send_message(
-                MESSAGES['order_edit_system_error'].format(error_msg=e),
-                exc=e
-            )
-            return
+        # 2. 주문 실패 시 종목 정보가 바뀌었을 수 있으므로 캐시에서 제거 (다음 조회 시 다시 불러옴)
+        instrument_cache.invalidate(order_info['symbol'])
+        log_error_and_send_message(
+            MESSAGES['order_edit_system_error'].format(error_msg=e),
+            exc=e
+        )
+        return
 
     # 3. 주문 성공 시 후속 로직 실행
     if order_result and order_result['retCode'] == 0:
@@ -398,49 +255,29 @@ def execute_bybit_order(conn, order_info, message_id):
         # 주문 ID를 order_result에서 추출
         bybit_order_id = order_result['result']['orderId']
         
-        # 주문이 체결된 후 포지션 정보를 가져옵니다.
-        time.sleep(1) # 포지션 업데이트 대기
-        positions_info = bybit_client.get_positions(category="linear", symbol=order_info['symbol'])
-        if positions_info['retCode'] == 0 and positions_info['result']['list']:
-            # position_data = positions_info['result']['list'][0]
-            # print(f"포지션 정보: {position_data}")
-            # position_side = position_data['side']
-            # print(f"포지션: {position_side}")
-            # position_idx = position_data['positionIdx']
-            
-            # ✅ 수정: DB 저장을 위해 message_id를 포함하여 주문 정보를 딕셔너리에 담음
-            order_data_to_save = {
-                'message_id': message_id,
-                'symbol': order_info['symbol'],
-                'side': order_info['side'], 
-                'entry_price': order_info['entry_price'],
-                'targets': order_info['targets'],
-                'orderId': bybit_order_id,
-                'fund_percentage': order_info['fund_percentage'],
-                'leverage': order_info['leverage'],
-                'original_message': order_info['original_message'],
-                'filled': False
-            }
-            save_active_order(conn, order_data_to_save)
-            
-
-            # ✅ 수정: 청산 모니터링을 위한 비동기 함수 시작
-            print(MESSAGES['monitor_position_close'].format(symbol=order_info['symbol']))
-            asyncio.run_coroutine_threadsafe(
-                record_trade_result_on_close(conn, order_info['symbol'], message_id),
-                asyncio.get_event_loop()
-            )
-
-            # 텔레그램 요약 메시지 전송
-            asyncio.run_coroutine_threadsafe(
-                send_bybit_summary_msg(order_info, adjusted_qty, order_result),
-                asyncio.get_event_loop()
-            )
-
-        else:
-            log_error_and_send_message(
-                MESSAGES['position_info_error']
-            )
+        # ✅ 수정: DB 저장을 위해 message_id를 포함하여 주문 정보를 딕셔너리에 담음
+        # 접수 응답(ack)을 받는 즉시 저장하여 종목 레인을 바로 비웁니다. (포지션 확인은 백그라운드에서)
+        order_data_to_save = {
+            'message_id': message_id,
+            'symbol': order_info['symbol'],
+            'side': order_info['side'], 
+            'entry_price': order_info['entry_price'],
+            'targets': order_info['targets'],
+            'orderId': bybit_order_id,
+            'fund_percentage': order_info['fund_percentage'],
+            'leverage': order_info['leverage'],
+            'original_message': order_info['original_message'],
+            'filled': False
+        }
+        order_store.put(order_data_to_save)
+
+        # ✅ 수정: 청산 모니터링을 위한 비동기 함수 시작
+        print(MESSAGES['monitor_position_close'].format(symbol=order_info['symbol']))
+        spawn_background_task(record_trade_result_on_close(conn, order_info['symbol'], message_id))
+        spawn_background_task(confirm_position_update())
+
+        # 텔레그램 요약 메시지 전송
+        send_bybit_summary_msg(order_info, adjusted_qty, order_result)
 
     else:
         # 이전에 처리되지 않은 다른 주문 실패
@@ -456,7 +293,7 @@ async def cancel_bybit_order(conn, symbol_to_cancel):
     
     try:
         # Bybit API를 통해 해당 종목의 모든 미체결 주문을 취소합니다.
-        cancel_all_result = bybit_client.cancel_all_orders(
+        cancel_all_result = await bybit_gateway.cancel_all_orders(
             category="linear",
             symbol=symbol_to_cancel
         )
@@ -464,13 +301,11 @@ async def cancel_bybit_order(conn, symbol_to_cancel):
         if cancel_all_result['retCode'] == 0:
             if cancel_all_result['result']['list']:
                 print(MESSAGES['cancel_all_success'].format(symbol=symbol_to_cancel))
-                await send_bybit_cancel_msg(symbol_to_cancel)
+                send_bybit_cancel_msg(symbol_to_cancel)
 
-                # ✅ 수정: DB에서 해당 종목 주문 삭제
-                active_orders_from_db = get_active_orders(conn)
-                orders_to_remove = [msg_id for msg_id, order_info in active_orders_from_db.items() if order_info['symbol'] == symbol_to_cancel]
-                for msg_id in orders_to_remove:
-                    delete_active_order(conn, msg_id)
+                # ✅ 수정: 해당 종목 주문 삭제 (DB 반영은 저장소가 백그라운드에서 처리)
+                for order_info in order_store.for_symbol(symbol_to_cancel):
+                    order_store.remove(order_info['message_id'])
             else:
                 log_error_and_send_message(
                     MESSAGES['no_open_order_to_cancel'],
@@ -489,31 +324,40 @@ async def cancel_bybit_order(conn, symbol_to_cancel):
         )
 
 
+async def resolve_stop_loss_price(symbol, price):
+    """
+    SL로 보낼 가격을 종목의 가격 단위(tickSize)에 맞춘 문자열로 반환합니다.
+    Entry NOW 주문의 진입가('NOW')는 현재 시장 가격으로 바꾸며, 가격을 가져오지 못하면 None을 반환합니다.
+    """
+    spec = await order_sizer.spec(symbol)
+    if price != "NOW":
+        return spec.price(price)
+
+    current_price = await ticker_cache.last_price(symbol)
+    if current_price is None:
+        log_error_and_send_message(
+            "현재 가격 정보를 가져오는 데 실패했습니다.",
+            chat_id=TELE_BYBIT_LOG_CHAT_ID
+        )
+        return None
+    new_sl = spec.price(current_price)
+    notifier.send(
+        chat_id=TELE_BYBIT_LOG_CHAT_ID,
+        text=MESSAGES['sl_move_to_market_price'].format(price=new_sl)
+    )
+    return new_sl
+
 async def update_stop_loss_to_entry(symbol, side, position_idx, entry_price):
     """
     지정된 주문의 Stop Loss를 진입가로 수정합니다.
     """
     try:
         # Entry NOW 주문일 경우 현재 시장 가격을 SL로 설정
-        if entry_price == "NOW":
-            ticker_info = bybit_client.get_tickers(category="linear", symbol=symbol)
-            if ticker_info['retCode'] == 0 and ticker_info['result']['list']:
-                current_price = float(ticker_info['result']['list'][0]['lastPrice'])
-                new_sl = str(current_price)
-                await bybit_bot.send_message(
-                    chat_id=TELE_BYBIT_LOG_CHAT_ID,
-                    text=MESSAGES['sl_move_to_market_price'].format(price=new_sl)
-                )
-            else:
-                log_error_and_send_message(
-                    "현재 가격 정보를 가져오는 데 실패했습니다.",
-                    chat_id=TELE_BYBIT_LOG_CHAT_ID
-                )
-                return
-        else:
-            new_sl = str(entry_price)
+        new_sl = await resolve_stop_loss_price(symbol, entry_price)
+        if new_sl is None:
+            return
 
-        amend_result = bybit_client.set_trading_stop(
+        amend_result = await bybit_gateway.set_trading_stop(
             category="linear",
             symbol=symbol,
             side=side,
@@ -523,7 +367,7 @@ async def update_stop_loss_to_entry(symbol, side, position_idx, entry_price):
         
         if amend_result['retCode'] == 0:
             print(MESSAGES['sl_update_success'].format(symbol=symbol, new_sl=new_sl))
-            await bybit_bot.send_message(
+            notifier.send(
                 chat_id=TELE_BYBIT_LOG_CHAT_ID,
                 text=MESSAGES['sl_update_complete'].format(symbol=symbol, new_sl=new_sl)
             )
@@ -544,8 +388,8 @@ async def update_stop_loss_to_tp1(symbol, side, position_idx, tp1_price):
     지정된 주문의 Stop Loss를 TP1 가격으로 수정합니다.
     """
     try:
-        new_sl = str(tp1_price)
-        amend_result = bybit_client.set_trading_stop(
+        new_sl = (await order_sizer.spec(symbol)).price(tp1_price)
+        amend_result = await bybit_gateway.set_trading_stop(
             category="linear",
             symbol=symbol,
             side=side,
@@ -555,7 +399,7 @@ async def update_stop_loss_to_tp1(symbol, side, position_idx, tp1_price):
         
         if amend_result['retCode'] == 0:
             print(MESSAGES['sl_update_success'].format(symbol=symbol, new_sl=new_sl))
-            await bybit_bot.send_message(
+            notifier.send(
                 chat_id=TELE_BYBIT_LOG_CHAT_ID,
                 text=MESSAGES['sl_update_complete'].format(symbol=symbol, new_sl=new_sl)
             )
@@ -576,8 +420,8 @@ async def update_stop_loss_to_tp2(symbol, side, position_idx, tp2_price):
     지정된 주문의 Stop Loss를 TP2 가격으로 수정합니다.
     """
     try:
-        new_sl = str(tp2_price)
-        amend_result = bybit_client.set_trading_stop(
+        new_sl = (await order_sizer.spec(symbol)).price(tp2_price)
+        amend_result = await bybit_gateway.set_trading_stop(
             category="linear",
             symbol=symbol,
             side=side,
@@ -587,7 +431,7 @@ async def update_stop_loss_to_tp2(symbol, side, position_idx, tp2_price):
         
         if amend_result['retCode'] == 0:
             print(MESSAGES['sl_update_success'].format(symbol=symbol, new_sl=new_sl))
-            await bybit_bot.send_message(
+            notifier.send(
                 chat_id=TELE_BYBIT_LOG_CHAT_ID,
                 text=MESSAGES['sl_update_complete'].format(symbol=symbol, new_sl=new_sl)
             )
@@ -608,24 +452,28 @@ async def update_stop_loss_to_value(symbol, side, position_idx, new_sl_price):
     지정된 주문의 Stop Loss를 특정 가격으로 수정합니다.
     """
     try:
-        amend_result = bybit_client.set_trading_stop(
+        # /movesl entry로 Entry NOW 주문의 진입가('NOW')가 넘어오면 현재 시장 가격으로 바꿉니다.
+        new_sl = await resolve_stop_loss_price(symbol, new_sl_price)
+        if new_sl is None:
+            return
+        amend_result = await bybit_gateway.set_trading_stop(
             category="linear",
             symbol=symbol,
             side=side,
             positionIdx=position_idx,
-            stopLoss=str(new_sl_price)
+            stopLoss=new_sl
         )
 
         if amend_result['retCode'] == 0:
-            print(MESSAGES['sl_update_success'].format(symbol=symbol, new_sl=new_sl_price))
-            await bybit_bot.send_message(
+            print(MESSAGES['sl_update_success'].format(symbol=symbol, new_sl=new_sl))
+            notifier.send(
                 chat_id=TELE_BYBIT_LOG_CHAT_ID,
-                text=MESSAGES['sl_update_complete'].format(symbol=symbol, new_sl=new_sl_price)
+                text=MESSAGES['sl_update_complete'].format(symbol=symbol, new_sl=new_sl)
             )
         elif amend_result['retCode'] == 34040:
             # ErrCode 34040은 "not modified"를 의미하며, 이미 동일한 값으로 설정되어 있다는 뜻입니다.
-            print(f"ℹ️ SL 값이 이미 {new_sl_price}로 설정되어 있어 변경을 건너뜁니다. (ErrCode: 34040)")
-            await bybit_bot.send_message(
+            print(f"ℹ️ SL 값이 이미 {new_sl}로 설정되어 있어 변경을 건너뜁니다. (ErrCode: 34040)")
+            notifier.send(
                 chat_id=TELE_BYBIT_LOG_CHAT_ID,
                 text=f"ℹ️ **{symbol}** SL 값 변경 실패\n사유: `이미 설정된 값과 동일`"
             )
@@ -642,7 +490,7 @@ async def update_stop_loss_to_value(symbol, side, position_idx, new_sl_price):
         )
 
 # DCA 주문을 실행하는 함수
-def place_dca_order(conn, order_info, dca_price):
+async def place_dca_order(conn, order_info, dca_price):
     """
     DCA (Dollar-Cost Averaging) 주문을 실행합니다.
     """
@@ -650,32 +498,28 @@ def place_dca_order(conn, order_info, dca_price):
         # ✅ 수정: 추가한 'dca_order_placed' 키 사용
         print(MESSAGES['dca_order_placed'].format(symbol=order_info['symbol'], price=dca_price))
     
-        # 재고 잔액 및 거래량 계산
-        wallet_balance = bybit_client.get_wallet_balance(accountType="UNIFIED")
-        usdt_balance = next((item for item in wallet_balance['result']['list'][0]['coin'] if item['coin'] == 'USDT'), None)
-        total_usdt = float(usdt_balance['equity'])
+        # 재고 잔액(캐시) 및 거래량 계산
+        total_usdt = await account_state.usdt_equity()
+        if total_usdt is None:
+            log_error_and_send_message(MESSAGES['usdt_balance_not_found'])
+            return
         trade_amount = total_usdt * order_info['fund_percentage']
         
-        # 'leverage' 오류 해결
-        order_qty = (trade_amount * order_info['leverage']) / dca_price
-
-        # 정밀도 조정
-        instrument_info = bybit_client.get_instruments_info(category="linear", symbol=order_info['symbol'])
-        lot_size_filter = instrument_info['result']['list'][0]['lotSizeFilter']
-        qty_step = float(lot_size_filter['qtyStep'])
-        adjusted_qty = round(order_qty / qty_step) * qty_step
-        adjusted_qty_decimal = decimal.Decimal(adjusted_qty)
-        precision = len(str(qty_step).split('.')[1]) if '.' in str(qty_step) else 0
-        quantized_qty = adjusted_qty_decimal.quantize(decimal.Decimal('0.' + '0' * precision))
+        # 'leverage' 오류 해결 (저장된 값이 최대 레버리지를 넘으면 실제 적용된 최대값으로 계산)
+        leverage = await leverage_cache.clamp(order_info['symbol'], order_info['leverage'])
+        order_qty = (trade_amount * leverage) / dca_price
+
+        # 정밀도 조정 (qtyStep / tickSize 배수)
+        spec = await order_sizer.spec(order_info['symbol'])
 
         # DCA 주문 실행
-        bybit_client.place_order(
+        await bybit_gateway.place_order(
             category="linear",
             symbol=order_info['symbol'],
             side=order_info['side'], # 동일한 방향
             orderType="Limit",
-            qty=str(quantized_qty),
-            price=str(dca_price)
+            qty=spec.quantity(order_qty),
+            price=spec.price(dca_price)
         )
         # ✅ 수정: 추가한 'dca_order_success' 키 사용
         print(MESSAGES['dca_order_success'])
@@ -690,12 +534,14 @@ def place_dca_order(conn, order_info, dca_price):
 async def close_all_positions(conn):
     """
     모든 활성 포지션을 청산합니다.
+    reduce-only 시장가 주문을 배치 엔드포인트로 묶어 동시에 보내고,
+    종목별 결과와 전체 소요 시간을 알린 뒤 한 번의 포지션 조회로 청산 여부를 확인합니다.
     """
     print("모든 포지션을 청산합니다...")
     try:
         # 1. 모든 활성 포지션 조회
-        # ✅ 수정: settleCoin='USDT' 파라미터를 추가하여 오류 해결
-        positions_info = bybit_client.get_positions(category="linear", settleCoin="USDT")
+        # ✅ 수정: settleCoin='USDT' 파라미터를 추가하여 오류 해결 (한 페이지에 모두 담기지 않으면 다음 페이지까지 조회)
+        positions_info = await bybit_gateway.get_all_positions(category="linear", settleCoin="USDT")
         
         if positions_info['retCode'] != 0 or not positions_info['result']['list']:
             log_error_and_send_message("활성 포지션이 없습니다.", chat_id=TELE_BYBIT_LOG_CHAT_ID)
@@ -707,28 +553,46 @@ async def close_all_positions(conn):
             log_error_and_send_message("청산할 포지션이 없습니다.", chat_id=TELE_BYBIT_LOG_CHAT_ID)
             return
 
-        for position in active_positions:
-            symbol = position['symbol']
-            side = "Sell" if position['side'] == "Buy" else "Buy" # 반대 방향 주문
-            qty = position['size']
-            
-            print(f"✅ {symbol} 포지션 청산 주문 실행: {qty} {side}")
-
-            # 2. 시장가로 청산 주문 실행
-            bybit_client.place_order(
-                category="linear",
-                symbol=symbol,
-                side=side,
-                orderType="Market",
-                qty=qty,
-                reduceOnly=True # 이 주문은 포지션 청산만 가능하도록 설정
-            )
-            print(f"✅ {symbol} 포지션 청산 주문 성공.")
-        
-        # 3. 텔레그램으로 완료 메시지 전송
-        await bybit_bot.send_message(
+        # 2. 반대 방향 reduce-only 시장가 주문을 배치로 동시에 실행
+        close_requests = [
+            {
+                'symbol': position['symbol'],
+                'side': "Sell" if position['side'] == "Buy" else "Buy", # 반대 방향 주문
+                'orderType': "Market",
+                'qty': position['size'],
+                'positionIdx': int(position.get('positionIdx') or 0),
+                'reduceOnly': True # 이 주문은 포지션 청산만 가능하도록 설정
+            }
+            for position in active_positions
+        ]
+        started_at = time.monotonic()
+        results = await bybit_gateway.run_batch('place_batch_order', "linear", close_requests)
+        elapsed = time.monotonic() - started_at
+
+        report_lines = []
+        for result in results:
+            request = result['request']
+            if result['success']:
+                print(f"✅ {request['symbol']} 포지션 청산 주문 성공: {request['qty']} {request['side']}")
+                report_lines.append(f"✅ {request['symbol']} {request['side']} {request['qty']}")
+            else:
+                print(f"⚠️ {request['symbol']} 포지션 청산 주문 실패: {result['msg']}")
+                report_lines.append(f"❌ {request['symbol']} {request['side']} {request['qty']}: {result['msg']}")
+
+        # 3. 한 번의 포지션 조회로 청산 여부 확인 (포지션 추적기도 함께 갱신)
+        await position_tracker.resync()
+        requested_symbols = {request['symbol'] for request in close_requests}
+        still_open = sorted(requested_symbols & position_tracker.open_symbols())
+
+        # 4. 텔레그램으로 결과 메시지 전송
+        summary = f"⏱ {len(close_requests)}개 포지션 청산 주문 소요 시간: {elapsed:.2f}초"
+        if still_open:
+            summary += f"\n⚠️ 아직 열려 있는 포지션: {', '.join(still_open)}"
+        else:
+            summary += "\n✅ 모든 활성 포지션이 성공적으로 청산되었습니다."
+        notifier.send(
             chat_id=TELE_BYBIT_LOG_CHAT_ID,
-            text="✅ 모든 활성 포지션이 성공적으로 청산되었습니다."
+            text="\n".join(report_lines) + "\n\n" + summary
         )
 
     except Exception as e:
@@ -3,6 +3,7 @@ import os
 from dotenv import load_dotenv
 import asyncio
 from api_clients import bybit_bot, TELE_BYBIT_LOG_CHAT_ID
+from notifier import notifier
 
 load_dotenv()
 
@@ -31,6 +32,7 @@ MESSAGES = load_messages()
 def log_error_and_send_message(msg: str, exc: Exception = None, chat_id: int = TELE_BYBIT_LOG_CHAT_ID) -> None:
     """
     에러 메시지를 콘솔에 출력하고, 텔레그램 봇으로 메시지를 전송합니다.
+    이벤트 루프 안에서는 알림 대기열(notifier)에 넣기만 하고 바로 반환합니다.
     """
     error_msg = f"ERROR: {msg}"
     if exc:
@@ -38,7 +40,11 @@ def log_error_and_send_message(msg: str, exc: Exception = None, chat_id: int = T
     
     print(error_msg)
     
-    # 텔레그램 메시지 전송 (비동기 처리)
+    # 이벤트 루프가 실행 중이면 대기열에 넣고 백그라운드에서 전송
+    if notifier.send(chat_id, error_msg, parse_mode='Markdown'):
+        return
+
+    # 이벤트 루프가 없는 경우 (동기 컨텍스트) 직접 전송
     async def send_tele_msg():
         try:
             await bybit_bot.send_message(
@@ -49,16 +55,6 @@ def log_error_and_send_message(msg: str, exc: Exception = None, chat_id: int = T
         except Exception as e:
             print(f"⚠️ 텔레그램 메시지 전송 실패: {e}")
 
-    # 이벤트 루프가 이미 실행 중인 경우
-    try:
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        loop = None
-    
-    if loop and loop.is_running():
-        asyncio.run_coroutine_threadsafe(send_tele_msg(), loop)
-    else:
-        # 이벤트 루프가 없는 경우 (동기 컨텍스트)
-        asyncio.run(send_tele_msg())
+    asyncio.run(send_tele_msg())
 
 __all__ = ['load_messages', 'MESSAGES', 'log_error_and_send_message']
\ No newline at end of file
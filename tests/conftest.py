@@ -0,0 +1,34 @@
+import os
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+
+# src 폴더의 모듈은 서로를 최상위 이름으로 import하므로 경로에 추가합니다.
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+# 모듈이 불러올 때 DB / 심볼 매핑 경로와 API 설정을 읽으므로, 어떤 모듈보다 먼저
+# 재생 도구와 같은 방식으로 임시 폴더와 가짜 설정을 채웁니다. (실제 DB나 네트워크를 사용하지 않음)
+from replay import configure_environment  # noqa: E402
+
+TEST_WORKDIR = tempfile.mkdtemp(prefix='tests-')
+configure_environment(TEST_WORKDIR)
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """
+    테스트마다 새 SQLite 파일과 전용 기록 스레드를 사용합니다.
+    database_manager의 쓰기 함수는 모듈의 db_writer를 사용하므로 이 테스트용 기록기로 바꿔 둡니다.
+    """
+    import database_manager
+
+    writer = database_manager.DatabaseWriter(str(tmp_path / 'trading_bot.db'))
+    monkeypatch.setattr(database_manager, 'db_writer', writer)
+    conn = sqlite3.connect(writer.path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    writer.stop()
+    conn.close()
@@ -0,0 +1,96 @@
+import pytest
+
+from database_manager import (
+    SCHEMA_VERSION, get_trade_summary, record_trade_result_db, setup_database, to_epoch_ms,
+)
+
+# 스키마 v0 (created_ts / trade_key / opened_ts 추가 이전)의 trade_log
+V0_TRADE_LOG = '''
+    CREATE TABLE trade_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        symbol TEXT NOT NULL,
+        side TEXT NOT NULL,
+        entry_price REAL,
+        exit_price REAL,
+        qty REAL,
+        pnl REAL,
+        fee REAL,
+        created_at TEXT NOT NULL
+    )
+'''
+
+OLD_TRADES = [
+    ('BTCUSDT', 'Buy', 65000.0, 66000.0, 0.01, 10.0, 0.5, '2024-05-01T10:15:00'),
+    ('ETHUSDT', 'Sell', 3000.0, 3100.0, 1.0, -100.0, 1.0, '2024-05-01T11:00:00'),
+    # /pnl 수동 기록으로 같은 청산이 두 번 저장된 경우
+    ('BTCUSDT', 'Buy', 65000.0, 66000.0, 0.01, 10.0, 0.5, '2024-05-01T10:15:00'),
+    ('SOLUSDT', 'Buy', 150.0, 160.0, 2.0, 20.0, 0.2, '2024-05-02T09:30:00'),
+]
+
+
+def create_old_database(conn, version):
+    conn.execute(V0_TRADE_LOG)
+    conn.executemany(
+        'INSERT INTO trade_log (symbol, side, entry_price, exit_price, qty, pnl, fee, created_at) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        OLD_TRADES
+    )
+    if version >= 1:
+        # v1: created_ts 컬럼과 인덱스까지만 있고 trade_key는 없음
+        conn.execute('ALTER TABLE trade_log ADD COLUMN created_ts INTEGER')
+        for row in conn.execute('SELECT id, created_at FROM trade_log').fetchall():
+            conn.execute('UPDATE trade_log SET created_ts = ? WHERE id = ?', (to_epoch_ms(row['created_at']), row['id']))
+        conn.execute('CREATE INDEX idx_trade_log_created_ts ON trade_log (created_ts)')
+        conn.execute('CREATE INDEX idx_trade_log_symbol_side_ts ON trade_log (symbol, side, created_ts)')
+    conn.execute(f'PRAGMA user_version = {version}')
+    conn.commit()
+
+
+def index_names(conn):
+    return {row['name'] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+@pytest.mark.parametrize('version', [0, 1])
+def test_migrates_old_schema_to_current(temp_db, version):
+    create_old_database(temp_db, version)
+
+    setup_database(temp_db)
+
+    assert temp_db.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+    rows = temp_db.execute('SELECT * FROM trade_log ORDER BY id').fetchall()
+    # 나중에 저장된 중복 행(id 3)만 삭제됩니다.
+    assert [row['id'] for row in rows] == [1, 2, 4]
+    for row in rows:
+        assert row['created_ts'] == to_epoch_ms(row['created_at'])
+        assert row['trade_key'] is not None
+        assert row['opened_ts'] is None
+    assert len({row['trade_key'] for row in rows}) == len(rows)
+    assert {
+        'idx_trade_log_created_ts', 'idx_trade_log_symbol_side_ts', 'idx_trade_log_trade_key'
+    } <= index_names(temp_db)
+
+    # 집계 테이블이 남은 거래 기록과 일치합니다.
+    assert get_trade_summary(temp_db) == (3, 2, pytest.approx(-70.0))
+    # 마이그레이션 중의 중복 삭제는 분석 데이터 재적재 횟수에 포함되지 않습니다.
+    assert temp_db.execute('SELECT rewrites FROM trade_log_changes').fetchone()[0] == 0
+
+
+def test_trade_key_rejects_duplicate_inserts_after_migration(temp_db):
+    create_old_database(temp_db, 0)
+    setup_database(temp_db)
+
+    symbol, side, entry_price, exit_price, qty, pnl, fee, created_at = OLD_TRADES[0]
+    trade = {
+        'symbol': symbol, 'side': side, 'entry_price': entry_price, 'exit_price': exit_price,
+        'qty': qty, 'pnl': pnl, 'fee': fee, 'created_at': created_at,
+    }
+    assert record_trade_result_db(temp_db, trade) is False
+    assert record_trade_result_db(temp_db, dict(trade, created_at='2024-05-03T12:00:00')) is True
+    assert get_trade_summary(temp_db) == (4, 3, pytest.approx(-60.0))
+
+
+def test_setup_database_is_idempotent(temp_db):
+    setup_database(temp_db)
+    setup_database(temp_db)
+    assert temp_db.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+    assert get_trade_summary(temp_db) == (0, 0, 0.0)
@@ -0,0 +1,106 @@
+import asyncio
+
+from execution_lanes import ExecutionLanes
+
+
+def test_same_key_runs_in_submission_order():
+    async def scenario():
+        lanes = ExecutionLanes(max_parallel=4)
+        log = []
+
+        async def job(name, delay):
+            log.append(('start', name))
+            await asyncio.sleep(delay)
+            log.append(('end', name))
+            return name
+
+        # 먼저 접수된 작업이 더 오래 걸려도 같은 종목에서는 순서대로 하나씩 실행됩니다.
+        futures = [
+            lanes.submit('BTCUSDT', job, 'first', 0.03),
+            lanes.submit('BTCUSDT', job, 'second', 0.0),
+            lanes.submit('BTCUSDT', job, 'third', 0.01),
+        ]
+        results = await asyncio.gather(*futures)
+        await lanes.join()
+        return results, log, lanes.stats()
+
+    results, log, stats = asyncio.run(scenario())
+    assert results == ['first', 'second', 'third']
+    assert log == [
+        ('start', 'first'), ('end', 'first'),
+        ('start', 'second'), ('end', 'second'),
+        ('start', 'third'), ('end', 'third'),
+    ]
+    assert stats['lanes'] == {} and stats['queued'] == 0 and stats['running'] == 0
+
+
+def test_different_keys_run_in_parallel_up_to_limit():
+    async def scenario():
+        lanes = ExecutionLanes(max_parallel=2)
+        running = 0
+        peak = 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        await asyncio.gather(*(lanes.run(f"COIN{i}USDT", job) for i in range(6)))
+        return peak
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_error_is_returned_to_caller_and_lane_continues():
+    async def scenario():
+        lanes = ExecutionLanes()
+
+        async def fail():
+            raise ValueError("boom")
+
+        async def ok():
+            return 'ok'
+
+        failed = lanes.submit('ETHUSDT', fail)
+        succeeded = lanes.submit('ETHUSDT', ok)
+        return await asyncio.gather(failed, succeeded, return_exceptions=True)
+
+    error, result = asyncio.run(scenario())
+    assert isinstance(error, ValueError)
+    assert result == 'ok'
+
+
+def test_run_exclusive_waits_for_earlier_jobs_and_blocks_later_ones():
+    async def scenario():
+        lanes = ExecutionLanes(max_parallel=4)
+        log = []
+
+        async def job(name, delay):
+            log.append(('start', name))
+            await asyncio.sleep(delay)
+            log.append(('end', name))
+
+        async def close_all():
+            log.append(('start', 'close_all'))
+            await asyncio.sleep(0.01)
+            log.append(('end', 'close_all'))
+
+        before = [
+            lanes.submit('BTCUSDT', job, 'btc', 0.02),
+            lanes.submit('ETHUSDT', job, 'eth', 0.01),
+        ]
+        exclusive = asyncio.ensure_future(lanes.run_exclusive(close_all))
+        # 단독 작업보다 나중에 접수된 작업은 단독 작업이 끝난 뒤 실행됩니다.
+        await asyncio.sleep(0)
+        after = lanes.submit('SOLUSDT', job, 'sol', 0.0)
+        await asyncio.gather(*before, exclusive, after)
+        return log
+
+    log = asyncio.run(scenario())
+    close_all_start = log.index(('start', 'close_all'))
+    close_all_end = log.index(('end', 'close_all'))
+    assert log.index(('end', 'btc')) < close_all_start
+    assert log.index(('end', 'eth')) < close_all_start
+    assert log.index(('start', 'sol')) > close_all_end
@@ -0,0 +1,74 @@
+import pytest
+
+from message_parser import classify_message, guess_signal_symbol
+
+SIGNAL = "$BTC Long\nLeverage: x20\nFund: 5%\nEntry: 65000\nTP1: 66000\nTP2: 67000\nStop Loss: 64000"
+
+
+def test_signal_is_parsed():
+    kind, order_info = classify_message(SIGNAL)
+    assert kind == 'signal'
+    assert order_info['symbol'] == 'BTCUSDT'
+    assert order_info['side'] == 'Buy'
+    assert order_info['leverage'] == 20
+    assert order_info['fund_percentage'] == 0.05
+    assert order_info['entry_price'] == 65000.0
+    assert order_info['targets'] == [66000.0, 67000.0]
+    assert order_info['stop_loss'] == 64000.0
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("Close all positions", ('close_all', None)),
+    ("Take all profit now", ('close_all', None)),
+    ("PF", ('report', 'all')),
+    ("pf week", ('report', 'week')),
+    ("PF monty", ('report', 'month')),
+    ("pf yesterday", ('report', 'all')),
+    ("Cancel $APT", ('cancel', 'APTUSDT')),
+    ("good morning", ('noise', None)),
+    ("", ('noise', None)),
+])
+def test_channel_message_routing(text, expected):
+    assert classify_message(text) == expected
+
+
+def test_close_all_wins_over_cancel():
+    assert classify_message("Cancel orders and close all") == ('close_all', None)
+
+
+def test_cancel_is_checked_before_signal():
+    # 취소 문구가 있는 신호 형식 메시지는 신규 주문이 아니라 취소로 처리됩니다.
+    assert classify_message("Cancel $BTC\n" + SIGNAL) == ('cancel', 'BTCUSDT')
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("DCA Limit 213, Move SL = 216", ('dca', (213.0, 216.0))),
+    ("movesl=entry", ('movesl', 'entry')),
+    ("Move SL to TP1", ('movesl', 'tp1')),
+    ("move sl to tp2 now", ('movesl', 'tp2')),
+    ("Cancel", ('cancel', None)),
+    ("Close all", ('close_all', None)),
+    ("nice trade", ('noise', None)),
+])
+def test_reply_routing(text, expected):
+    assert classify_message(text, is_reply=True) == expected
+
+
+def test_incomplete_dca_reply_falls_through_to_movesl():
+    # DCA 가격이 없으면 같은 답장의 SL 이동 명령으로 처리됩니다.
+    assert classify_message("DCA soon, movesl=entry", is_reply=True) == ('movesl', 'entry')
+
+
+def test_replies_are_never_signals_or_reports():
+    assert classify_message(SIGNAL, is_reply=True) == ('noise', None)
+    assert classify_message("pf week", is_reply=True) == ('noise', None)
+
+
+@pytest.mark.parametrize('text, expected', [
+    (SIGNAL, 'BTCUSDT'),
+    ("🚀 PEPE/USDT\nEntry NOW\nTP: 1-2\nStop Loss: 0.5", 'PEPEUSDT'),
+    ("$BTC to the moon", None),
+    ("Stop Loss hit", None),
+])
+def test_guess_signal_symbol(text, expected):
+    assert guess_signal_symbol(text) == expected
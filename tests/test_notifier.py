@@ -0,0 +1,51 @@
+import asyncio
+
+from notifier import NotificationOutbox, TELEGRAM_MESSAGE_LIMIT
+
+
+class RecordingBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, parse_mode=None, **kwargs):
+        self.sent.append((chat_id, parse_mode, text))
+
+
+def test_merge_joins_texts_in_order():
+    assert NotificationOutbox._merge(['a', 'b', 'c']) == ['a\n\nb\n\nc']
+
+
+def test_merge_splits_at_telegram_limit():
+    half = 'x' * (TELEGRAM_MESSAGE_LIMIT // 2)
+    merged = NotificationOutbox._merge([half, half, 'tail'])
+    assert merged == [half, half + '\n\ntail']
+    assert all(len(text) <= TELEGRAM_MESSAGE_LIMIT for text in merged)
+
+
+def test_merge_truncates_oversized_text():
+    merged = NotificationOutbox._merge(['y' * (TELEGRAM_MESSAGE_LIMIT + 10), 'z'])
+    assert merged == ['y' * TELEGRAM_MESSAGE_LIMIT, 'z']
+
+
+def test_outbox_merges_per_chat_and_parse_mode():
+    async def scenario():
+        bot = RecordingBot()
+        outbox = NotificationOutbox(bot, merge_window=0.01, chat_interval=0)
+        outbox.send(1, 'first')
+        outbox.send(2, 'other chat')
+        outbox.send(1, 'second')
+        outbox.send(1, '*bold*', parse_mode='Markdown')
+        await outbox.flush(timeout=1)
+        return bot.sent
+
+    sent = asyncio.run(scenario())
+    assert sorted(sent, key=str) == sorted([
+        (1, None, 'first\n\nsecond'),
+        (2, None, 'other chat'),
+        (1, 'Markdown', '*bold*'),
+    ], key=str)
+
+
+def test_send_without_event_loop_returns_false():
+    outbox = NotificationOutbox(RecordingBot())
+    assert outbox.send(1, 'text') is False
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from order_sizing import InstrumentSpec, OrderSizer, OrderSizingError
+
+
+def make_instrument(qty_step='0.001', min_qty='0.001', max_qty='100', max_market_qty=None, tick_size='0.1'):
+    lot_size_filter = {'qtyStep': qty_step, 'minOrderQty': min_qty, 'maxOrderQty': max_qty}
+    if max_market_qty is not None:
+        lot_size_filter['maxMktOrderQty'] = max_market_qty
+    return {
+        'symbol': 'TESTUSDT',
+        'lotSizeFilter': lot_size_filter,
+        'priceFilter': {'tickSize': tick_size},
+    }
+
+
+@pytest.mark.parametrize('order_qty, expected', [
+    (1.23449, '1.234'),
+    (1.2345, '1.235'),
+    (0.1 + 0.2, '0.300'),
+    (7, '7.000'),
+])
+def test_quantity_rounds_to_qty_step(order_qty, expected):
+    spec = InstrumentSpec(make_instrument())
+    assert spec.quantity(order_qty) == expected
+
+
+def test_quantity_uses_coarse_step_without_float_error():
+    spec = InstrumentSpec(make_instrument(qty_step='0.01', min_qty='0.01'))
+    # 0.07 / 0.01 은 부동소수점으로 7.000000000000001 이 됩니다.
+    assert spec.quantity(0.07) == '0.07'
+    assert spec.quantity(2.675) == '2.68'
+
+
+def test_quantity_with_integer_step():
+    spec = InstrumentSpec(make_instrument(qty_step='10', min_qty='10', max_qty='100000'))
+    assert spec.quantity(1234) == '1230'
+    assert spec.quantity(1235) == '1240'
+
+
+def test_quantity_caps_at_max_order_qty():
+    spec = InstrumentSpec(make_instrument(max_qty='5', max_market_qty='2'))
+    assert spec.quantity(9.5) == '5.000'
+    assert spec.quantity(9.5, market=True) == '2.000'
+
+
+def test_quantity_below_minimum_raises():
+    spec = InstrumentSpec(make_instrument(min_qty='0.01'))
+    with pytest.raises(OrderSizingError):
+        spec.quantity(0.004)
+
+
+@pytest.mark.parametrize('tick_size, price, expected', [
+    ('0.1', 65000.04, '65000.0'),
+    ('0.1', 65000.05, '65000.1'),
+    ('0.5', 1.26, '1.5'),
+    ('0.0001', 0.123456, '0.1235'),
+    ('1', 64999.5, '65000'),
+])
+def test_price_rounds_to_tick(tick_size, price, expected):
+    spec = InstrumentSpec(make_instrument(tick_size=tick_size))
+    assert spec.price(price) == expected
+
+
+class FakeInstruments:
+    def __init__(self, instrument):
+        self.instrument = instrument
+
+    async def fetch(self, symbol):
+        return self.instrument
+
+
+def test_sizer_rebuilds_spec_when_instrument_changes():
+    instruments = FakeInstruments(make_instrument(tick_size='0.1'))
+    sizer = OrderSizer(instruments)
+
+    async def scenario():
+        first = await sizer.spec('TESTUSDT')
+        assert await sizer.spec('TESTUSDT') is first
+        instruments.instrument = make_instrument(tick_size='0.01')
+        second = await sizer.spec('TESTUSDT')
+        assert second is not first
+        return second
+
+    assert asyncio.run(scenario()).price(1.234) == '1.23'
@@ -0,0 +1,80 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+import order_store as order_store_module
+from database_manager import record_trade_result_db, setup_database
+from order_store import ActiveOrderStore
+
+ORDER = {
+    'message_id': 1, 'symbol': 'BTCUSDT', 'side': 'Buy', 'entry_price': 65000.0, 'targets': [66000.0, 64000.0],
+    'orderId': 'order-1', 'fund_percentage': 5.0, 'leverage': 20, 'original_message': '$BTC Long', 'filled': False,
+}
+
+
+@pytest.fixture
+def store(temp_db, monkeypatch):
+    setup_database(temp_db)
+    monkeypatch.setattr(order_store_module, 'get_db_connection', lambda: temp_db)
+    store = ActiveOrderStore()
+    store.load(temp_db)
+    return store
+
+
+def external_insert(temp_db, message_id):
+    """따로 실행한 bot.py처럼 다른 연결에서 활성 주문을 추가합니다."""
+    conn = sqlite3.connect(temp_db.execute('PRAGMA database_list').fetchone()['file'])
+    with conn:
+        conn.execute(
+            'INSERT INTO active_orders (message_id, symbol, side, targets, orderId, filled) VALUES (?, ?, ?, ?, ?, 0)',
+            (message_id, 'ETHUSDT', 'Sell', '[2800.0, 3100.0]', f'order-{message_id}')
+        )
+    conn.close()
+
+
+def test_own_commits_do_not_trigger_reload(store, temp_db):
+    async def scenario():
+        store.start()
+        store.put(dict(ORDER))
+        store.set_filled(1, True)
+        await store.flush()
+        record_trade_result_db(temp_db, {
+            'symbol': 'BTCUSDT', 'side': 'Buy', 'entry_price': 65000.0, 'exit_price': 66000.0,
+            'qty': 0.01, 'pnl': 10.0, 'fee': 0.5, 'created_at': '2024-05-01T10:15:00',
+        })
+        return await store.refresh()
+
+    assert asyncio.run(scenario()) is False
+    assert store.get(1)['filled'] is True
+    assert temp_db.execute('SELECT filled FROM active_orders WHERE message_id = 1').fetchone()[0] == 1
+
+
+def test_refresh_picks_up_other_process_changes(store, temp_db):
+    async def scenario():
+        store.start()
+        store.put(dict(ORDER))
+        await store.flush()
+        external_insert(temp_db, 2)
+        reloaded = await store.refresh()
+        return reloaded, await store.refresh()
+
+    assert asyncio.run(scenario()) == (True, False)
+    assert set(store.orders) == {1, 2}
+    assert store.get_by_order_id('order-2')['symbol'] == 'ETHUSDT'
+
+
+def test_refresh_keeps_local_changes_made_while_reading(store, temp_db):
+    async def scenario():
+        store.start()
+        external_insert(temp_db, 2)
+        # 다시 읽는 도중 이 프로세스가 바꾼 주문은 덮어쓰지 않고 다음 확인으로 미룹니다.
+        refresh = asyncio.create_task(store.refresh())
+        await asyncio.sleep(0)
+        store.put(dict(ORDER))
+        first = await refresh
+        await store.flush()
+        return first, await store.refresh()
+
+    assert asyncio.run(scenario()) == (False, True)
+    assert set(store.orders) == {1, 2}
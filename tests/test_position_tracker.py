@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+import bybit_gateway as gateway_module
+import position_tracker as position_tracker_module
+from bybit_gateway import bybit_gateway
+from position_tracker import PositionTracker
+from simulated_exchange import SimulatedExchange
+
+SYMBOLS = [f"COIN{i}USDT" for i in range(25)]
+
+
+class FakeStream:
+    """연결되지 않은 비공개 스트림 (REST 재동기화만 사용)"""
+
+    connected = False
+
+    def add_handler(self, topic, handler):
+        pass
+
+    async def start(self):
+        raise ConnectionError("stream unavailable")
+
+
+@pytest.fixture
+def exchange(monkeypatch):
+    exchange = SimulatedExchange(SYMBOLS)
+    for symbol in SYMBOLS:
+        exchange.place_order(category='linear', symbol=symbol, side='Buy', orderType='Market', qty='1')
+    monkeypatch.setattr(bybit_gateway, 'client', exchange)
+    return exchange
+
+
+def test_get_all_positions_follows_next_page_cursor(exchange, monkeypatch):
+    monkeypatch.setattr(gateway_module, 'POSITION_PAGE_LIMIT', 10)
+
+    result = asyncio.run(bybit_gateway.get_all_positions(category='linear', settleCoin='USDT'))
+
+    assert result['retCode'] == 0
+    assert [position['symbol'] for position in result['result']['list']] == SYMBOLS
+    assert exchange.request_count == len(SYMBOLS) + 3
+
+
+def test_resync_does_not_close_positions_beyond_the_first_page(exchange):
+    tracker = PositionTracker(bybit_gateway, FakeStream())
+
+    async def scenario():
+        await tracker.resync()
+        closes = {symbol: tracker.subscribe(symbol, message_id) for message_id, symbol in enumerate(SYMBOLS)}
+        await tracker.resync()
+        still_open = {symbol for symbol, future in closes.items() if not future.done()}
+
+        # 실제로 청산된 포지션은 그대로 감지됩니다.
+        exchange.place_order(category='linear', symbol='COIN24USDT', side='Sell', orderType='Market', qty='1')
+        await tracker.resync()
+        return still_open, closes['COIN24USDT'].done(), tracker.open_symbols()
+
+    still_open, closed, open_symbols = asyncio.run(scenario())
+    assert still_open == set(SYMBOLS)
+    assert closed
+    assert open_symbols == set(SYMBOLS) - {'COIN24USDT'}
+
+
+def test_fallback_poll_keeps_positions_beyond_the_first_page_open(exchange):
+    tracker = PositionTracker(bybit_gateway, FakeStream(), min_interval=0.01, max_interval=0.01)
+
+    async def scenario():
+        await tracker.start()
+        closes = [tracker.subscribe(symbol, message_id) for message_id, symbol in enumerate(SYMBOLS)]
+        requests_before = exchange.request_count
+        # 스트림이 끊긴 동안 폴링이 전체 스냅샷을 여러 번 다시 적용합니다.
+        await asyncio.sleep(0.2)
+        tracker._poll_task.cancel()
+        return exchange.request_count - requests_before, [future for future in closes if future.done()]
+
+    polls, closed = asyncio.run(scenario())
+    assert polls >= 3
+    assert closed == []
+    assert tracker.open_symbols() == set(SYMBOLS)
+
+
+def test_poll_interval_grows_with_snapshot_pages(exchange, monkeypatch):
+    # 요청 여유에 따른 조정은 빼고 페이지 수의 영향만 봅니다.
+    monkeypatch.setattr(bybit_gateway, 'headroom', lambda: 1.0)
+    tracker = PositionTracker(bybit_gateway, FakeStream(), resync_interval=1000, min_interval=1, max_interval=10)
+
+    async def scenario():
+        tracker.subscribe('COIN0USDT', 1)
+        await tracker.resync()
+        single_page = tracker.poll_interval()
+        # 한 페이지에 10개씩이면 25개 포지션을 받는 데 3번 호출합니다.
+        monkeypatch.setattr(gateway_module, 'POSITION_PAGE_LIMIT', 10)
+        monkeypatch.setattr(position_tracker_module, 'POSITION_PAGE_LIMIT', 10)
+        await tracker.resync()
+        return single_page, tracker.poll_interval()
+
+    single_page, three_pages = asyncio.run(scenario())
+    assert (single_page, three_pages) == (10, 30)
@@ -0,0 +1,56 @@
+import asyncio
+import gc
+
+import prefetch
+from prefetch import SignalPrefetcher
+
+SIGNAL = "$BTC Long\nLeverage: x20\nFund: 5%\nEntry: 65000\nTP1: 66000\nStop Loss: 64000"
+
+
+def run_and_collect(monkeypatch, scenario):
+    """시나리오를 실행하고 이벤트 루프의 예외 처리기로 넘어온 오류를 반환합니다."""
+    errors = []
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context['message']))
+        await scenario()
+        gc.collect()
+
+    asyncio.run(main())
+    return errors
+
+
+def test_failed_prefetch_exception_is_retrieved(monkeypatch, capsys):
+    def broken_lookup(channel_symbol):
+        raise RuntimeError("mapping unavailable")
+
+    monkeypatch.setattr(prefetch.symbol_resolver, 'cached', broken_lookup)
+    prefetcher = SignalPrefetcher()
+
+    async def scenario():
+        task = prefetcher.start(SIGNAL)
+        await asyncio.sleep(0.01)
+        assert task.done()
+
+    assert run_and_collect(monkeypatch, scenario) == []
+    assert prefetcher._tasks == set()
+    assert "mapping unavailable" in capsys.readouterr().out
+
+
+def test_cancelled_prefetch_is_released(monkeypatch):
+    async def slow_coin(coin):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(prefetch.account_state, 'get_coin', slow_coin)
+    prefetcher = SignalPrefetcher()
+
+    async def scenario():
+        task = prefetcher.start(SIGNAL)
+        await asyncio.sleep(0)
+        # 신호가 아닌 것으로 판명된 경우
+        task.cancel()
+        await asyncio.sleep(0.01)
+        assert task.cancelled()
+
+    assert run_and_collect(monkeypatch, scenario) == []
+    assert prefetcher._tasks == set()
@@ -0,0 +1,45 @@
+import asyncio
+import json
+
+from replay import load_events, parse_args, run_replay
+
+BTC_SIGNAL = "$BTC Long\nLeverage: x20\nFund: 5%\nEntry: 65000\nTP1: 66000\nStop Loss: 64000"
+ETH_SIGNAL = "$ETH Long\nLeverage: x10\nFund: 5%\nEntry: 2900\nTP1: 3100\nStop Loss: 2800"
+
+EVENTS = [
+    {"t": 0.0, "type": "price", "symbol": "ETHUSDT", "price": 3000},
+    {"t": 0.1, "type": "new", "id": 101, "text": BTC_SIGNAL},
+    # 익절가를 넘는 가격 -> 포지션 청산, trade_log 기록
+    {"t": 0.2, "type": "price", "symbol": "BTCUSDT", "price": 66100},
+    # 같은 종목 / 방향의 신호는 중복으로 거절됩니다.
+    {"t": 0.3, "type": "new", "id": 102, "text": BTC_SIGNAL.replace("66000", "67000")},
+    # 현재가보다 낮은 지정가 매수는 체결되지 않고 대기합니다.
+    {"t": 0.4, "type": "new", "id": 103, "text": ETH_SIGNAL},
+    {"t": 0.5, "type": "new", "id": 104, "text": "Cancel $ETH"},
+    {"t": 0.6, "type": "new", "id": 105, "text": "good luck everyone"},
+]
+
+
+def test_replay_end_to_end(tmp_path):
+    events_path = tmp_path / 'events.jsonl'
+    events_path.write_text('\n'.join(json.dumps(event) for event in EVENTS), encoding='utf-8')
+    args = parse_args([str(events_path), '--fast', '--drain-timeout', '2'])
+    args.workdir = str(tmp_path)
+
+    report = asyncio.run(run_replay(load_events(str(events_path)), args))
+
+    assert report['events'] == len(EVENTS)
+    assert report['handlers']['my_event_handler']['count'] == 5
+    assert report['trade_log_rows'] == 1
+
+    exchange = report['exchange']
+    assert exchange['positions'] == []
+    assert exchange['open_orders'] == []
+    assert exchange['closed_trades'] == 1
+    assert exchange['balance'] > 10000.0
+
+    # 체결된 BTC 주문만 남고, 중복 신호와 취소된 ETH 주문은 활성 주문에 없습니다.
+    assert report['active_orders'] == [
+        {'message_id': 101, 'symbol': 'BTCUSDT', 'side': 'Buy', 'filled': True},
+    ]
+    assert report['notifications'] > 0
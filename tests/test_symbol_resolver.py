@@ -0,0 +1,77 @@
+import asyncio
+import json
+import threading
+
+from symbol_resolver import SymbolResolver
+
+
+def make_instrument(symbol):
+    return {'symbol': symbol, 'baseCoin': symbol[:-len('USDT')], 'quoteCoin': 'USDT', 'settleCoin': 'USDT'}
+
+
+class FakeInstrumentCache:
+    """warm_up()이 돌려줄 종목 목록을 테스트에서 바꿀 수 있는 종목 캐시"""
+
+    def __init__(self, symbols):
+        self.listing = {symbol: make_instrument(symbol) for symbol in symbols}
+        self.instruments = {}
+        self.warm_ups = 0
+        self._listeners = []
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    async def warm_up(self):
+        self.warm_ups += 1
+        new_symbols = set(self.listing) - set(self.instruments)
+        self.instruments = dict(self.listing)
+        for listener in self._listeners:
+            listener(self.instruments, new_symbols)
+        return self.instruments
+
+
+def make_resolver(tmp_path, monkeypatch, symbols):
+    cache = FakeInstrumentCache(symbols)
+    resolver = SymbolResolver(cache, map_path=str(tmp_path / 'symbol_map.json'), miss_ttl=0, refresh_cooldown=0)
+    saves = []
+    save = resolver.save
+
+    def record_save(*args):
+        saves.append(threading.current_thread() is threading.main_thread())
+        save(*args)
+
+    monkeypatch.setattr(resolver, 'save', record_save)
+    return cache, resolver, saves
+
+
+def test_unknown_symbol_does_not_rewrite_map_without_new_instruments(tmp_path, monkeypatch):
+    cache, resolver, saves = make_resolver(tmp_path, monkeypatch, ['BTCUSDT', '1000PEPEUSDT'])
+
+    async def scenario():
+        await cache.warm_up()
+        await resolver.flush()
+        saves.clear()
+        results = [await resolver.resolve('NOPEUSDT') for _ in range(3)]
+        await resolver.flush()
+        return results
+
+    assert asyncio.run(scenario()) == [None, None, None]
+    assert cache.warm_ups == 4
+    assert saves == []
+    assert resolver.cached('PEPEUSDT') == ('1000PEPEUSDT', 1000)
+
+
+def test_new_listing_is_saved_off_the_event_loop(tmp_path, monkeypatch):
+    cache, resolver, saves = make_resolver(tmp_path, monkeypatch, ['BTCUSDT'])
+
+    async def scenario():
+        await cache.warm_up()
+        cache.listing['NEWUSDT'] = make_instrument('NEWUSDT')
+        resolved = await resolver.resolve('NEWUSDT')
+        await resolver.flush()
+        return resolved
+
+    assert asyncio.run(scenario()) == ('NEWUSDT', 1)
+    assert saves == [False, False]
+    with open(resolver.map_path, encoding='utf-8') as f:
+        assert set(json.load(f)) == {'BTCUSDT', 'NEWUSDT'}
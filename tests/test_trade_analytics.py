@@ -0,0 +1,150 @@
+import math
+import statistics
+from datetime import datetime, timedelta
+
+import pytest
+
+from database_manager import record_trade_result_db, setup_database, to_epoch_ms
+import trade_analytics
+from trade_analytics import TradeAnalytics, TradeColumns, compute_metrics
+
+HOLD_MS = 60 * 1000
+
+
+def make_trade(symbol, side, pnl, closed_at, entry_price=100.0, qty=1.0):
+    created_at = closed_at.isoformat(timespec='seconds')
+    return {
+        'symbol': symbol, 'side': side, 'entry_price': entry_price, 'exit_price': entry_price,
+        'qty': qty, 'pnl': pnl, 'fee': 0.1, 'created_at': created_at,
+        'opened_ts': to_epoch_ms(created_at) - HOLD_MS,
+    }
+
+
+def recent_trades():
+    now = datetime.now().replace(microsecond=0)
+    return [
+        make_trade('BTCUSDT', 'Buy', 10.0, now - timedelta(hours=4)),
+        make_trade('ETHUSDT', 'Sell', -4.0, now - timedelta(hours=3)),
+        make_trade('BTCUSDT', 'Buy', 6.0, now - timedelta(hours=2)),
+        make_trade('ETHUSDT', 'Buy', -8.0, now - timedelta(hours=1)),
+    ]
+
+
+def test_compute_metrics_on_columns():
+    columns = TradeColumns(capacity=2)
+    rows = [
+        (i + 1, trade['symbol'], trade['side'], trade['entry_price'], trade['qty'], trade['pnl'],
+         trade['fee'], to_epoch_ms(trade['created_at']), trade['opened_ts'])
+        for i, trade in enumerate(recent_trades())
+    ]
+    columns.append(rows)
+
+    stats = compute_metrics(columns)
+
+    assert stats['trades'] == 4
+    assert stats['wins'] == 2 and stats['losses'] == 2
+    assert stats['win_rate'] == 50.0
+    assert stats['net_pnl'] == pytest.approx(4.0)
+    assert stats['fees'] == pytest.approx(0.4)
+    assert list(stats['equity_curve']) == pytest.approx([10.0, 6.0, 12.0, 4.0])
+    assert stats['max_drawdown'] == pytest.approx(8.0)
+    assert stats['profit_factor'] == pytest.approx(16.0 / 12.0)
+    assert stats['expectancy'] == pytest.approx(1.0)
+    assert stats['avg_win'] == pytest.approx(8.0)
+    assert stats['avg_loss'] == pytest.approx(-6.0)
+    assert stats['avg_hold_ms'] == HOLD_MS
+
+    returns = [0.10, -0.04, 0.06, -0.08]
+    assert stats['sharpe'] == pytest.approx(statistics.mean(returns) / statistics.stdev(returns))
+    downside = math.sqrt(sum(min(r, 0.0) ** 2 for r in returns) / len(returns))
+    assert stats['sortino'] == pytest.approx(statistics.mean(returns) / downside)
+
+    assert stats['by_symbol'] == [
+        {'name': 'BTCUSDT', 'trades': 2, 'pnl': pytest.approx(16.0), 'win_rate': 100.0},
+        {'name': 'ETHUSDT', 'trades': 2, 'pnl': pytest.approx(-12.0), 'win_rate': 0.0},
+    ]
+    assert [row['name'] for row in stats['by_side']] == ['Buy', 'Sell']
+
+
+def test_compute_metrics_without_losses_or_trades():
+    columns = TradeColumns()
+    assert compute_metrics(columns) is None
+
+    columns.append([(1, 'BTCUSDT', 'Buy', 100.0, 1.0, 5.0, None, 1000, None)])
+    stats = compute_metrics(columns)
+    assert stats['profit_factor'] == math.inf
+    assert stats['max_drawdown'] == 0.0
+    assert stats['sharpe'] is None
+    assert stats['avg_hold_ms'] is None
+    assert stats['fees'] == 0.0
+
+
+def test_report_reads_trade_log_incrementally_and_by_period(temp_db):
+    setup_database(temp_db)
+    old_trade = make_trade('SOLUSDT', 'Buy', 100.0, datetime.now() - timedelta(days=40))
+    for trade in [old_trade] + recent_trades():
+        record_trade_result_db(temp_db, trade)
+
+    analytics = TradeAnalytics(cache_ttl=60)
+    all_stats = analytics.report(temp_db, 'all')
+    assert all_stats['trades'] == 5
+    assert all_stats['net_pnl'] == pytest.approx(104.0)
+
+    day_stats = analytics.report(temp_db, 'day')
+    assert day_stats['trades'] == 4
+    assert day_stats['net_pnl'] == pytest.approx(4.0)
+    assert day_stats['max_drawdown'] == pytest.approx(8.0)
+
+    # 새 거래가 추가되면 캐시를 버리고 추가된 행만 읽어 다시 계산합니다.
+    record_trade_result_db(temp_db, make_trade('BTCUSDT', 'Sell', 2.5, datetime.now() - timedelta(minutes=5)))
+    assert analytics.report(temp_db, 'day')['trades'] == 5
+    assert analytics.report(temp_db, 'all')['net_pnl'] == pytest.approx(106.5)
+    assert analytics.columns.size == 6
+
+
+def test_report_reloads_after_deletion(temp_db):
+    setup_database(temp_db)
+    for trade in recent_trades():
+        record_trade_result_db(temp_db, trade)
+    analytics = TradeAnalytics(cache_ttl=60)
+    assert analytics.report(temp_db)['trades'] == 4
+
+    import database_manager
+    database_manager.db_writer.run(lambda write_conn: write_conn.execute('DELETE FROM trade_log WHERE pnl < 0'))
+
+    stats = analytics.report(temp_db)
+    assert stats['trades'] == 2
+    assert stats['net_pnl'] == pytest.approx(16.0)
+
+
+def test_sync_reads_new_rows_in_chunks_without_reloading(temp_db, monkeypatch):
+    monkeypatch.setattr(trade_analytics, 'SYNC_CHUNK_ROWS', 2)
+    setup_database(temp_db)
+    trades = recent_trades()
+    for trade in trades[:3]:
+        record_trade_result_db(temp_db, trade)
+    analytics = TradeAnalytics(cache_ttl=60)
+    assert analytics.sync(temp_db) is True
+    columns = analytics.columns
+    assert analytics.sync(temp_db) is False
+
+    record_trade_result_db(temp_db, trades[3])
+    assert analytics.sync(temp_db) is True
+    # 새 행은 기존 배열 끝에 이어 붙입니다.
+    assert analytics.columns is columns
+    assert list(analytics.columns['id']) == [1, 2, 3, 4]
+
+
+def test_report_reloads_after_update_with_equal_row_count(temp_db):
+    setup_database(temp_db)
+    for trade in recent_trades():
+        record_trade_result_db(temp_db, trade)
+    analytics = TradeAnalytics(cache_ttl=60)
+    assert analytics.report(temp_db)['net_pnl'] == pytest.approx(4.0)
+
+    import database_manager
+    database_manager.db_writer.run(lambda write_conn: write_conn.execute('UPDATE trade_log SET pnl = 0 WHERE pnl < 0'))
+
+    stats = analytics.report(temp_db)
+    assert stats['trades'] == 4
+    assert stats['net_pnl'] == pytest.approx(16.0)
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+import trade_executor
+from bybit_gateway import bybit_gateway
+from simulated_exchange import SimulatedExchange
+from trade_executor import update_stop_loss_to_tp1, update_stop_loss_to_tp2, update_stop_loss_to_value
+
+# 시뮬레이터의 가격 단위는 0.0001입니다.
+SYMBOL = 'SLTICKUSDT'
+
+
+@pytest.fixture
+def exchange(monkeypatch):
+    exchange = SimulatedExchange([SYMBOL], prices={SYMBOL: 1.23456789})
+    exchange.place_order(category='linear', symbol=SYMBOL, side='Buy', orderType='Market', qty='10')
+    monkeypatch.setattr(bybit_gateway, 'client', exchange)
+    sent = []
+    monkeypatch.setattr(trade_executor.notifier, 'send', lambda chat_id, text, parse_mode=None: sent.append(text))
+    return exchange
+
+
+@pytest.mark.parametrize('update', [update_stop_loss_to_tp1, update_stop_loss_to_tp2, update_stop_loss_to_value])
+def test_stop_loss_is_rounded_to_tick(exchange, monkeypatch, update):
+    requests = []
+    set_trading_stop = exchange.set_trading_stop
+    monkeypatch.setattr(exchange, 'set_trading_stop', lambda **kwargs: requests.append(kwargs) or set_trading_stop(**kwargs))
+
+    asyncio.run(update(SYMBOL, 'Buy', 0, 1.1111111))
+
+    assert requests[0]['stopLoss'] == '1.1111'
+    assert exchange.positions[SYMBOL]['stopLoss'] == 1.1111
+
+
+def test_stop_loss_to_entry_now_uses_market_price(exchange):
+    # /movesl entry는 Entry NOW 주문이면 진입가 대신 'NOW'를 넘깁니다.
+    asyncio.run(update_stop_loss_to_value(SYMBOL, 'Buy', 0, 'NOW'))
+
+    assert exchange.positions[SYMBOL]['stopLoss'] == 1.2346
+
+
+def test_dca_order_is_sized_with_the_applied_leverage(exchange, monkeypatch):
+    async def usdt_equity():
+        return 10000.0
+
+    monkeypatch.setattr(trade_executor.account_state, 'usdt_equity', usdt_equity)
+    order_info = {'symbol': SYMBOL, 'side': 'Buy', 'fund_percentage': 0.01, 'leverage': 150}
+
+    asyncio.run(trade_executor.place_dca_order(None, order_info, 1.0))
+
+    # 최대 레버리지(100)로 계산: 10000 * 0.01 * 100 / 1.0
+    [order] = exchange.orders.values()
+    assert float(order['qty']) == 10000.0